@@ -133,7 +133,7 @@ def graphql_query_with_org(graphql_client, organization):
     """
 
     def execute(query, variables=None):
-        # Set organization in thread-local for testing
+        # Set organization in the tenant context for testing
         from core.middleware.tenant import set_current_organization
 
         set_current_organization(organization)
@@ -15,7 +15,10 @@ class ProjectAdmin(admin.ModelAdmin):
     list_display = ['name', 'organization', 'status', 'start_date', 'end_date', 'created_at']
     search_fields = ['name', 'description']
     list_filter = ['status', 'organization', 'created_at']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = [
+        'task_count', 'todo_task_count', 'in_progress_task_count',
+        'review_task_count', 'completed_task_count', 'created_at', 'updated_at',
+    ]
     raw_id_fields = ['organization']
 
 
@@ -24,7 +27,7 @@ class TaskAdmin(admin.ModelAdmin):
     list_display = ['title', 'project', 'status', 'priority', 'due_date', 'created_at']
     search_fields = ['title', 'description']
     list_filter = ['status', 'priority', 'created_at']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['comment_count', 'created_at', 'updated_at']
     raw_id_fields = ['project']
 
 
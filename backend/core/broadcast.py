@@ -0,0 +1,282 @@
+import asyncio
+import logging
+import queue
+import threading
+import ujson
+from collections import defaultdict
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from core.event_log import get_event_log
+from core.models import Task, TaskComment
+
+logger = logging.getLogger(__name__)
+
+# Client message type sent by the consumers for each channel layer event type
+CLIENT_MESSAGE_TYPES = {
+    'task_create': 'task_created',
+    'task_update': 'task_updated',
+    'task_patch': 'task_patched',
+    'task_delete': 'task_deleted',
+    'tasks_create': 'tasks_created',
+    'tasks_update': 'tasks_updated',
+    'comment_create': 'comment_created',
+    'project_create': 'project_created',
+    'project_update': 'project_updated',
+    'project_delete': 'project_deleted',
+}
+
+
+def serialize_task(task):
+    """Serialize a task for WebSocket payloads"""
+    return {
+        'id': str(task.id),
+        'title': task.title,
+        'description': task.description,
+        'status': task.status,
+        'priority': task.priority,
+        'order': task.order,
+        'version': task.version,
+        'commentCount': task.comment_count,
+        'dueDate': task.due_date.isoformat() if task.due_date else None,
+        'createdAt': task.created_at.isoformat(),
+        'updatedAt': task.updated_at.isoformat(),
+    }
+
+
+def deserialize_task(data, project_id):
+    """Rebuild an unsaved Task instance from a serialized WebSocket payload"""
+    return Task(
+        id=data['id'],
+        project_id=project_id,
+        title=data['title'],
+        description=data['description'],
+        status=data['status'],
+        priority=data['priority'],
+        order=data['order'],
+        version=data['version'],
+        comment_count=data.get('commentCount', 0),
+        due_date=parse_datetime(data['dueDate']) if data['dueDate'] else None,
+        created_at=parse_datetime(data['createdAt']),
+        updated_at=parse_datetime(data['updatedAt']),
+    )
+
+
+def serialize_comment(comment):
+    """Serialize a comment for WebSocket payloads"""
+    return {
+        'id': str(comment.id),
+        'taskId': str(comment.task_id),
+        'authorName': comment.author_name,
+        'authorEmail': comment.author_email,
+        'content': comment.content,
+        'createdAt': comment.created_at.isoformat(),
+        'updatedAt': comment.updated_at.isoformat(),
+    }
+
+
+def deserialize_comment(data):
+    """Rebuild an unsaved TaskComment instance from a serialized WebSocket payload"""
+    return TaskComment(
+        id=data['id'],
+        task_id=data['taskId'],
+        author_name=data['authorName'],
+        author_email=data['authorEmail'],
+        content=data['content'],
+        created_at=parse_datetime(data['createdAt']),
+        updated_at=parse_datetime(data['updatedAt']),
+    )
+
+
+def serialize_project(project):
+    """Serialize a project for WebSocket payloads"""
+    return {
+        'id': str(project.id),
+        'name': project.name,
+        'description': project.description,
+        'status': project.status,
+        'startDate': project.start_date.isoformat() if project.start_date else None,
+        'endDate': project.end_date.isoformat() if project.end_date else None,
+        'createdAt': project.created_at.isoformat(),
+        'updatedAt': project.updated_at.isoformat(),
+    }
+
+
+def encode_json(content):
+    """Encode a WebSocket text frame"""
+    return ujson.dumps(content, escape_forward_slashes=False)
+
+
+def encode_frame(message):
+    """
+    Encode the client frame for a channel layer event once, for every consumer
+    in the group to forward verbatim. Returns None for event types that have
+    no client frame.
+    """
+    client_type = CLIENT_MESSAGE_TYPES.get(message['type'])
+    if client_type is None:
+        return None
+    return encode_json({**message, 'type': client_type})
+
+
+def routing_keys(message):
+    """Return the event attributes consumers route and filter on"""
+    keys = {key: message[key] for key in ('seq', 'project_id', 'task_id') if key in message}
+    status = None
+    if 'task' in message:
+        keys['task_id'] = message['task']['id']
+        status = message['task'].get('status')
+    elif 'changes' in message:
+        status = message['changes'].get('status')
+    elif 'comment' in message:
+        keys['task_id'] = message['comment']['taskId']
+    if status is not None:
+        keys['status'] = status
+    return keys
+
+
+def envelope(group, message):
+    """
+    Build the channel layer message for an event sent to a group: the client
+    frame plus the keys returned by routing_keys(), so the payload crosses the
+    channel layer once. Events without a client frame are sent whole.
+    """
+    frame = encode_frame(message)
+    if frame is None:
+        return {**message, 'stream': group}
+    return {'type': message['type'], 'stream': group, 'frame': frame, **routing_keys(message)}
+
+
+def client_message(event):
+    """Return the client message of a channel layer event, decoding its frame if it has one"""
+    if 'frame' in event:
+        return ujson.loads(event['frame'])
+    message = {key: value for key, value in event.items() if key != 'stream'}
+    message['type'] = CLIENT_MESSAGE_TYPES[event['type']]
+    return message
+
+
+def expand_event(event):
+    """Return a channel layer event with the payload its frame carries"""
+    if 'frame' not in event:
+        return event
+    return {**ujson.loads(event['frame']), 'type': event['type']}
+
+
+def task_changes(before, after):
+    """Return the serialized fields that differ between two task snapshots"""
+    return {
+        key: value for key, value in after.items()
+        if key not in ('id', 'version') and before.get(key) != value
+    }
+
+
+class Broadcaster:
+    """
+    Sends channel layer group messages from a background thread.
+
+    Messages are queued only once the surrounding transaction commits, so
+    rolled back writes are never broadcast and mutations never wait on the
+    channel layer. Each message is appended to the group's event log before
+    sending. The channel layer gets only its envelope (see envelope()): the
+    client frame pre-encoded once as "frame", the resulting sequence id as
+    "seq", the group as "stream" and the few keys consumers filter on. The
+    sender drains the queue in batches, sending to different groups
+    concurrently while keeping each group's messages in order. The queue is
+    bounded: if the channel layer falls behind, new messages are dropped
+    with a warning instead of slowing down writes.
+    """
+
+    def __init__(self, max_queue=1000, batch_size=100, send_timeout=5.0):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.send_timeout = send_timeout
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def publish(self, group, message):
+        """Send a group message after the current transaction commits"""
+        transaction.on_commit(lambda: self.enqueue(group, message))
+
+    def enqueue(self, group, message):
+        """Queue a group message for the sender without blocking"""
+        self._ensure_started()
+        try:
+            self.queue.put_nowait((group, message))
+        except queue.Full:
+            logger.warning('Broadcast queue full, dropping %s for %s', message.get('type'), group)
+
+    def flush(self, timeout=None):
+        """Wait until every queued message has been sent; returns False on timeout"""
+        with self.queue.all_tasks_done:
+            return self.queue.all_tasks_done.wait_for(
+                lambda: not self.queue.unfinished_tasks, timeout
+            )
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='broadcaster', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                loop.run_until_complete(self._send_batch(batch))
+            except Exception:
+                logger.exception('Failed to send broadcast batch')
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _send_batch(self, batch):
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+
+        by_group = defaultdict(list)
+        for group, message in batch:
+            by_group[group].append(message)
+
+        await asyncio.gather(*(
+            self._send_group(channel_layer, group, messages)
+            for group, messages in by_group.items()
+        ))
+
+    async def _send_group(self, channel_layer, group, messages):
+        for message in messages:
+            try:
+                await asyncio.wait_for(
+                    self._send(channel_layer, group, message), self.send_timeout
+                )
+            except Exception:
+                logger.warning(
+                    'Failed to broadcast %s to %s', message.get('type'), group, exc_info=True
+                )
+
+    async def _send(self, channel_layer, group, message):
+        # Record the message in the replay buffer first so it carries the
+        # sequence id reconnecting clients resume from
+        seq = await get_event_log().append(group, message)
+
+        # The frame needs the seq, so it is encoded here, once per group send
+        await channel_layer.group_send(group, envelope(group, {**message, 'seq': seq}))
+
+
+broadcaster = Broadcaster(
+    max_queue=getattr(settings, 'BROADCAST_QUEUE_SIZE', 1000),
+    batch_size=getattr(settings, 'BROADCAST_BATCH_SIZE', 100),
+    send_timeout=getattr(settings, 'BROADCAST_SEND_TIMEOUT', 5.0),
+)
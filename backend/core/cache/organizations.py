@@ -0,0 +1,85 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from core.cache.lru import LRUCache
+from core.models import Organization
+
+CACHE_KEY_PREFIX = 'tenant:organization:'
+
+_local_cache = LRUCache(
+    max_entries=getattr(settings, 'TENANT_CACHE_MAX_ENTRIES', 1024),
+    ttl=getattr(settings, 'TENANT_CACHE_TTL', 60),
+)
+
+
+def _shared_cache():
+    """Django cache used to share entries between workers, if configured"""
+    alias = getattr(settings, 'TENANT_CACHE_ALIAS', None)
+    return caches[alias] if alias else None
+
+
+def get_active_organization(slug):
+    """
+    Return the active organization for a slug, or None.
+
+    Lookups are served from the shared Django cache when TENANT_CACHE_ALIAS
+    is set, otherwise from an in-process LRU+TTL cache, and only then from
+    the database. The local layer is skipped when a shared cache is
+    configured, so an invalidation on one worker applies to every worker at
+    once. Misses are not cached so newly created organizations resolve
+    immediately.
+    """
+    shared = _shared_cache()
+    if shared is not None:
+        organization = shared.get(CACHE_KEY_PREFIX + slug)
+    else:
+        organization = _local_cache.get(slug)
+    if organization is not None:
+        return organization
+
+    try:
+        organization = Organization.objects.get(slug=slug, is_active=True)
+    except Organization.DoesNotExist:
+        return None
+
+    if shared is not None:
+        shared.set(CACHE_KEY_PREFIX + slug, organization, _local_cache.ttl)
+    else:
+        _local_cache.set(slug, organization)
+    return organization
+
+
+async def aget_active_organization(slug):
+    """Async variant of get_active_organization that only leaves the event loop on a miss"""
+    shared = _shared_cache()
+    if shared is not None:
+        organization = await shared.aget(CACHE_KEY_PREFIX + slug)
+    else:
+        organization = _local_cache.get(slug)
+    if organization is not None:
+        return organization
+    return await sync_to_async(get_active_organization)(slug)
+
+
+def invalidate_organization(slug):
+    """
+    Drop a slug from the local and shared caches.
+
+    The entry is dropped immediately and again once the transaction commits,
+    so a row another request read and cached before the commit is not
+    served for the rest of the TTL.
+    """
+    def drop():
+        _local_cache.delete(slug)
+        shared = _shared_cache()
+        if shared is not None:
+            shared.delete(CACHE_KEY_PREFIX + slug)
+
+    drop()
+    transaction.on_commit(drop)
+
+
+def clear_organization_cache():
+    """Drop every locally cached organization (the shared cache expires by TTL)"""
+    _local_cache.clear()
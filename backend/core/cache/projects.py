@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from core.cache.lru import LRUCache
+from core.models import Project
+
+# Projects never move between organizations, so entries only go stale when a
+# project is deleted
+_local_cache = LRUCache(
+    max_entries=getattr(settings, 'PROJECT_CACHE_MAX_ENTRIES', 4096),
+    ttl=getattr(settings, 'PROJECT_CACHE_TTL', 300),
+)
+
+
+async def aget_project_organization_id(project_id):
+    """
+    Return the id of the organization a project belongs to, or None.
+
+    Lookups are served from an in-process LRU+TTL cache and only then from
+    the database, so reconnect storms cost at most one query per project.
+    Misses are not cached so new projects resolve immediately.
+    """
+    key = str(project_id)
+    organization_id = _local_cache.get(key)
+    if organization_id is not None:
+        return organization_id
+
+    try:
+        organization_id = await (
+            Project.objects.filter(id=project_id)
+            .values_list('organization_id', flat=True)
+            .afirst()
+        )
+    except ValidationError:
+        return None
+
+    if organization_id is not None:
+        _local_cache.set(key, organization_id)
+    return organization_id
+
+
+def invalidate_project(project_id):
+    """Drop a project from the cache"""
+    _local_cache.delete(str(project_id))
+
+
+def clear_project_cache():
+    """Drop every cached project"""
+    _local_cache.clear()
@@ -0,0 +1,159 @@
+import hashlib
+import pickle
+import threading
+import time
+from functools import wraps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import QuerySet
+from core.cache.lru import LRUCache
+from core.middleware.tenant import get_current_organization
+
+CACHE_KEY_PREFIX = 'query:'
+VERSION_KEY_PREFIX = 'query-version:'
+
+_MISSING = object()
+
+_local_cache = LRUCache(
+    max_entries=getattr(settings, 'QUERY_CACHE_MAX_ENTRIES', 2048),
+    ttl=getattr(settings, 'QUERY_CACHE_TTL', 30),
+)
+# Version counters are never expired; an evicted counter restarts from the
+# clock, so it cannot fall back to a value that old entries were stored under
+_local_versions = LRUCache(max_entries=getattr(settings, 'QUERY_CACHE_MAX_ENTRIES', 2048) * 4)
+_versions_lock = threading.Lock()
+
+
+def _shared_cache():
+    """Django cache used to share entries and versions between workers, if configured"""
+    alias = getattr(settings, 'QUERY_CACHE_ALIAS', None)
+    return caches[alias] if alias else None
+
+
+def organization_scope(organization_id):
+    return f'organization:{organization_id}'
+
+
+def project_scope(project_id):
+    return f'project:{project_id}'
+
+
+def get_version(scope):
+    """Return the current version of a scope, starting it if unknown"""
+    shared = _shared_cache()
+    if shared is not None:
+        key = VERSION_KEY_PREFIX + scope
+        version = shared.get(key)
+        if version is None:
+            shared.add(key, time.time_ns(), None)
+            version = shared.get(key)
+        return version
+
+    with _versions_lock:
+        version = _local_versions.get(scope)
+        if version is None:
+            version = time.time_ns()
+            _local_versions.set(scope, version)
+        return version
+
+
+def bump_version(scope):
+    """Move a scope to a new version, orphaning every entry cached under the old one"""
+    shared = _shared_cache()
+    if shared is not None:
+        key = VERSION_KEY_PREFIX + scope
+        try:
+            shared.incr(key)
+        except ValueError:
+            shared.add(key, time.time_ns(), None)
+        return
+
+    with _versions_lock:
+        version = _local_versions.get(scope)
+        _local_versions.set(scope, version + 1 if version is not None else time.time_ns())
+
+
+def invalidate_queries(organization_id, project_id=None):
+    """
+    Invalidate cached query results of an organization and optionally a project.
+
+    Versions are bumped immediately, so reads later in the same transaction
+    miss, and again once it commits, so results other requests cached from
+    the pre-commit rows are never served.
+    """
+    scopes = [organization_scope(organization_id)]
+    if project_id is not None:
+        scopes.append(project_scope(project_id))
+
+    def bump():
+        for scope in scopes:
+            bump_version(scope)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def cached_query(project_arg=None):
+    """
+    Decorator for read-only root resolvers, applied below offload.
+
+    Results are cached per organization, resolver and arguments. Resolvers
+    scoped to one project (named by project_arg) are keyed on that project's
+    version, everything else on the organization's version. Mutations call
+    invalidate_queries(), so invalidation is a counter bump and stale entries
+    age out of the LRU. QUERY_CACHE_TTL=0 disables caching.
+    """
+
+    def decorator(resolver):
+        @wraps(resolver)
+        def wrapper(root, info, **kwargs):
+            organization = get_current_organization()
+            ttl = getattr(settings, 'QUERY_CACHE_TTL', 30)
+            if organization is None or not ttl:
+                return resolver(root, info, **kwargs)
+
+            project_id = kwargs.get(project_arg) if project_arg else None
+            if project_id is not None:
+                scope = project_scope(project_id)
+            else:
+                scope = organization_scope(organization.pk)
+
+            arguments = repr(sorted((name, str(value)) for name, value in kwargs.items()))
+            key = '{}{}:{}:{}:{}'.format(
+                CACHE_KEY_PREFIX,
+                resolver.__qualname__,
+                organization.pk,
+                get_version(scope),
+                hashlib.md5(arguments.encode()).hexdigest(),
+            )
+
+            shared = _shared_cache()
+            if shared is not None:
+                result = shared.get(key, _MISSING)
+                if result is not _MISSING:
+                    return result
+            else:
+                # Stored pickled, so every hit gets its own model instances
+                # and no request sees another's changes to them
+                pickled = _local_cache.get(key)
+                if pickled is not None:
+                    return pickle.loads(pickled)
+
+            result = resolver(root, info, **kwargs)
+            if isinstance(result, QuerySet):
+                result = list(result)
+            if shared is not None:
+                shared.set(key, result, ttl)
+            else:
+                _local_cache.set(key, pickle.dumps(result), ttl)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def clear_query_cache():
+    """Drop every locally cached query result (shared entries expire by TTL)"""
+    _local_cache.clear()
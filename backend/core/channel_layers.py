@@ -0,0 +1,61 @@
+import asyncio
+import time
+from copy import deepcopy
+from channels.layers import InMemoryChannelLayer
+
+
+class FanoutChannelLayer(InMemoryChannelLayer):
+    """
+    Process-local channel layer for single-node deployments and tests.
+
+    InMemoryChannelLayer deep-copies a group message and starts a task for
+    every member. This layer copies the message once and puts that copy on
+    each member's queue, the same way channels_redis's RedisPubSubChannelLayer
+    fans out a message it received once per process. Consumers must treat
+    group messages as read-only, as they already do.
+
+    Channel queues belong to the event loop the consumers receive on. Group
+    sends from another thread, such as the broadcaster's, are handed over
+    to that loop instead of touching its queues directly, which asyncio
+    does not allow across threads.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loop = None
+
+    async def receive(self, channel):
+        self.loop = asyncio.get_running_loop()
+        return await super().receive(channel)
+
+    async def group_send(self, group, message):
+        loop = self.loop
+        if loop is not None and loop.is_running() and loop is not asyncio.get_running_loop():
+            await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(self.fan_out(group, message), loop)
+            )
+            return
+        await self.fan_out(group, message)
+
+    async def fan_out(self, group, message):
+        """Put one copy of a group message on each member's queue, on the current loop"""
+        assert isinstance(message, dict), 'Message is not a dict'
+        self.require_valid_group_name(group)
+        self._clean_expired()
+
+        members = list(self.groups.get(group, ()))
+        if not members:
+            return
+
+        # One copy so later changes by the sender do not leak to receivers
+        message = deepcopy(message)
+        expires_at = time.time() + self.expiry
+        for channel in members:
+            queue = self.channels.setdefault(
+                channel, asyncio.Queue(maxsize=self.get_capacity(channel))
+            )
+            try:
+                queue.put_nowait((expires_at, message))
+            except asyncio.QueueFull:
+                # Full channels miss the message, as with InMemoryChannelLayer
+                pass
@@ -0,0 +1,103 @@
+import uuid
+from datetime import timezone
+import cbor2
+import msgpack
+from django.utils.dateparse import parse_datetime
+
+# Payload keys holding UUIDs and timestamps, sent in compact binary form
+UUID_KEYS = {'id', 'task_id', 'taskId', 'project_id', 'projectId'}
+DATETIME_KEYS = {'createdAt', 'updatedAt', 'dueDate'}
+
+
+def parse_uuid(value):
+    try:
+        return uuid.UUID(value)
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def compact(content, encode_uuid):
+    """
+    Return a copy of a JSON-style message with UUID and timestamp strings
+    under known keys replaced by native values; anything that does not
+    parse is left as is.
+    """
+    if isinstance(content, list):
+        return [compact(item, encode_uuid) for item in content]
+    if not isinstance(content, dict):
+        return content
+
+    result = {}
+    for key, value in content.items():
+        if key in UUID_KEYS and isinstance(value, str):
+            parsed = parse_uuid(value)
+            value = encode_uuid(parsed) if parsed else value
+        elif key in DATETIME_KEYS and isinstance(value, str):
+            parsed = parse_datetime(value)
+            value = parsed if parsed and parsed.tzinfo else value
+        elif isinstance(value, (dict, list)):
+            value = compact(value, encode_uuid)
+        result[key] = value
+    return result
+
+
+def expand(content, decode_uuid):
+    """Reverse of compact() for messages received from clients"""
+    if isinstance(content, list):
+        return [expand(item, decode_uuid) for item in content]
+    if isinstance(content, dict):
+        return {key: expand(value, decode_uuid) for key, value in content.items()}
+    return decode_uuid(content)
+
+
+class MessagePackCodec:
+    """
+    MessagePack frames. UUIDs are sent as 16-byte bin values and timestamps
+    with the standard timestamp extension type (-1).
+    """
+
+    subprotocol = 'msgpack'
+
+    def encode(self, content):
+        return msgpack.packb(compact(content, lambda value: value.bytes), datetime=True)
+
+    def decode(self, data):
+        return expand(msgpack.unpackb(data), self.decode_uuid)
+
+    @staticmethod
+    def decode_uuid(value):
+        if isinstance(value, bytes) and len(value) == 16:
+            return str(uuid.UUID(bytes=value))
+        return value
+
+
+class CBORCodec:
+    """
+    CBOR frames. UUIDs are sent with tag 37 and timestamps as epoch-based
+    date/times (tag 1).
+    """
+
+    subprotocol = 'cbor'
+
+    def encode(self, content):
+        return cbor2.dumps(
+            compact(content, lambda value: value),
+            datetime_as_timestamp=True,
+            timezone=timezone.utc,
+        )
+
+    def decode(self, data):
+        return expand(cbor2.loads(data), self.decode_uuid)
+
+    @staticmethod
+    def decode_uuid(value):
+        return str(value) if isinstance(value, uuid.UUID) else value
+
+
+# Binary codecs by Sec-WebSocket-Protocol name; JSON text frames are the default
+CODECS = {codec.subprotocol: codec for codec in (MessagePackCodec(), CBORCodec())}
+
+
+def negotiate(subprotocols):
+    """Pick the first offered subprotocol with a binary codec, or None for JSON"""
+    return next((CODECS[name] for name in subprotocols if name in CODECS), None)
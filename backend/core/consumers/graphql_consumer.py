@@ -0,0 +1,214 @@
+import asyncio
+from collections import defaultdict
+from urllib.parse import parse_qs
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from graphql import GraphQLError, OperationType, get_operation_ast, parse
+from core.cache.organizations import aget_active_organization
+from core.middleware.tenant import organization_context
+from core.schema import schema
+
+GRAPHQL_TRANSPORT_WS = 'graphql-transport-ws'
+GRAPHQL_WS = 'graphql-ws'
+
+# Message types that differ between graphql-transport-ws and the legacy
+# subscriptions-transport-ws (graphql-ws) protocol
+PROTOCOL_MESSAGES = {
+    GRAPHQL_TRANSPORT_WS: {'start': 'subscribe', 'stop': 'complete', 'data': 'next'},
+    GRAPHQL_WS: {'start': 'start', 'stop': 'stop', 'data': 'data'},
+}
+
+
+class OperationContext:
+    """GraphQL context for one operation running over a WebSocket"""
+
+    def __init__(self, consumer):
+        self.consumer = consumer
+        self.organization = consumer.organization
+        self.loaders = None
+
+    async def listen(self, group):
+        """Yield channel layer events sent to a group for as long as the operation runs"""
+        async for event in self.consumer.listen(group):
+            # Loaders cache rows, so start every event from fresh data
+            self.loaders = None
+            yield event
+
+
+class GraphQLConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Serves GraphQL operations over graphql-transport-ws and graphql-ws.
+
+    Subscriptions in core.schema.subscriptions are driven by the same channel
+    layer events as TaskConsumer, so clients select only the fields they need
+    per event. The organization comes from connectionParams.organizationSlug
+    or the ?organization=<slug> query string. Queries and mutations run
+    once, and subscriptions resolve every event, in that organization's
+    tenant context.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.protocol = None
+        self.messages = None
+        self.organization = None
+        self.initialized = False
+        self.operations = {}
+        self.listeners = defaultdict(set)
+
+    async def connect(self):
+        offered = self.scope.get('subprotocols', [])
+        protocol = next((p for p in (GRAPHQL_TRANSPORT_WS, GRAPHQL_WS) if p in offered), None)
+        if protocol is None:
+            await self.close(code=4406)
+            return
+
+        self.protocol = protocol
+        self.messages = PROTOCOL_MESSAGES[protocol]
+        await self.accept(subprotocol=protocol)
+
+    async def disconnect(self, close_code):
+        for task in list(self.operations.values()):
+            task.cancel()
+
+    async def receive_json(self, content):
+        message_type = content.get('type')
+
+        if message_type == 'connection_init':
+            await self.init_connection(content.get('payload') or {})
+
+        elif message_type == 'ping':
+            await self.send_json({'type': 'pong'})
+
+        elif not self.initialized:
+            await self.close(code=4401)
+
+        elif message_type == self.messages['start']:
+            await self.start_operation(content.get('id'), content.get('payload') or {})
+
+        elif message_type == self.messages['stop']:
+            task = self.operations.pop(content.get('id'), None)
+            if task is not None:
+                task.cancel()
+
+        elif message_type == 'connection_terminate':
+            await self.close()
+
+    async def init_connection(self, payload):
+        if self.initialized:
+            await self.close(code=4429)
+            return
+
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        slug = payload.get('organizationSlug') or query.get('organization', [None])[0]
+        self.organization = await aget_active_organization(slug) if slug else None
+        if self.organization is None:
+            if self.protocol == GRAPHQL_WS:
+                await self.send_json({
+                    'type': 'connection_error',
+                    'payload': {'message': 'Organization not specified or not found'}
+                })
+            await self.close(code=4403)
+            return
+
+        self.initialized = True
+        await self.send_json({'type': 'connection_ack'})
+
+    async def start_operation(self, op_id, payload):
+        if op_id in self.operations:
+            await self.close(code=4409)
+            return
+
+        query = payload.get('query') or ''
+        variables = payload.get('variables')
+        operation_name = payload.get('operationName')
+        context = OperationContext(self)
+
+        try:
+            operation = get_operation_ast(parse(query), operation_name)
+        except GraphQLError as error:
+            await self.send_error(op_id, [error])
+            return
+
+        if operation is None or operation.operation != OperationType.SUBSCRIPTION:
+            # Queries and mutations resolve once, as over HTTP
+            with organization_context(self.organization):
+                result = await schema.execute_async(
+                    query,
+                    variable_values=variables,
+                    operation_name=operation_name,
+                    context_value=context,
+                )
+            await self.send_result(op_id, result)
+            await self.send_json({'type': 'complete', 'id': op_id})
+            return
+
+        with organization_context(self.organization):
+            result = await schema.subscribe(
+                query,
+                variable_values=variables,
+                operation_name=operation_name,
+                context_value=context,
+            )
+        if not hasattr(result, '__aiter__'):
+            await self.send_error(op_id, result.errors)
+            return
+
+        self.operations[op_id] = asyncio.ensure_future(self.stream(op_id, result))
+
+    async def stream(self, op_id, results):
+        # Each event is resolved while iterating, in the same tenant context
+        # as queries and mutations
+        with organization_context(self.organization):
+            try:
+                async for result in results:
+                    await self.send_result(op_id, result)
+                await self.send_json({'type': 'complete', 'id': op_id})
+            except Exception as error:
+                if not isinstance(error, GraphQLError):
+                    error = GraphQLError(str(error), original_error=error)
+                await self.send_error(op_id, [error])
+            finally:
+                self.operations.pop(op_id, None)
+                await results.aclose()
+
+    async def send_result(self, op_id, result):
+        await self.send_json({
+            'type': self.messages['data'],
+            'id': op_id,
+            'payload': result.formatted
+        })
+
+    async def send_error(self, op_id, errors):
+        formatted = [error.formatted for error in errors]
+        await self.send_json({
+            'type': 'error',
+            'id': op_id,
+            # graphql-ws sends a single error object rather than a list
+            'payload': formatted if self.protocol == GRAPHQL_TRANSPORT_WS else formatted[0]
+        })
+
+    async def listen(self, group):
+        """Yield channel layer events for a group, joining it while anyone listens"""
+        queue = asyncio.Queue()
+        listeners = self.listeners[group]
+        if not listeners:
+            await self.channel_layer.group_add(group, self.channel_name)
+        listeners.add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            listeners.discard(queue)
+            if not listeners:
+                del self.listeners[group]
+                await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def dispatch(self, message):
+        if message['type'].startswith('websocket.'):
+            await super().dispatch(message)
+            return
+
+        # Channel layer events are routed to the subscriptions listening on
+        # their project group
+        for queue in self.listeners.get(f'project_{message.get("project_id")}', ()):
+            queue.put_nowait(message)
@@ -0,0 +1,146 @@
+import asyncio
+from channels.db import database_sync_to_async
+from django.core.exceptions import ValidationError
+from core.broadcast import serialize_task
+from core.consumers.task_consumer import TaskConsumer
+from core.models import Project, Task
+
+# Upper bound on the number of project groups one connection may join
+MAX_SUBSCRIBED_PROJECTS = 100
+
+
+class OrganizationConsumer(TaskConsumer):
+    """
+    One connection per tenant that multiplexes many projects.
+
+    The organization is taken from the ?organization=<slug> query string (or
+    the X-Organization-Slug header) and the connection joins the
+    organization group for project events. Clients then send
+    {"type": "subscribe", "project_ids": [...]} and
+    {"type": "unsubscribe", "project_ids": [...]} to join or leave project
+    groups. Task and comment messages carry the project_id they belong to,
+    as they do on TaskConsumer.
+
+    Batching, filters and snapshots work as in TaskConsumer; filters apply
+    to the whole connection, and each subscribe only changes the options it
+    names, so subscribing to more projects keeps the filters already set.
+    Subscribe may carry "resume_from": {project_id: seq} to replay missed
+    project events, and ?resume_from=<seq> on connect replays organization
+    events.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.project_ids = set()
+
+    async def connect(self):
+        self.organization = await self.get_organization()
+        if self.organization is None:
+            await self.close(code=4003)
+            return
+
+        self.room_group_name = f'organization_{self.organization.id}'
+        await self.channel_layer.group_add(self.room_group_name, self.channel_name)
+        await self.accept_negotiated()
+
+        resume_from = self.get_resume_from()
+        if resume_from is not None:
+            await self.replay(self.room_group_name, resume_from)
+
+    async def disconnect(self, close_code):
+        self.stop_sending()
+        if self.organization is None:
+            return
+
+        groups = [self.room_group_name] + [f'project_{pk}' for pk in self.project_ids]
+        await asyncio.gather(*(
+            self.channel_layer.group_discard(group, self.channel_name) for group in groups
+        ))
+
+    async def receive_json(self, content):
+        message_type = content.get('type')
+
+        if message_type in ('subscribe', 'unsubscribe'):
+            try:
+                project_ids = await self.get_organization_project_ids(content.get('project_ids'))
+            except ValidationError:
+                await self.send_json({
+                    'type': 'error',
+                    'message': 'Invalid project ids'
+                })
+                return
+
+            if message_type == 'subscribe':
+                # A rejected subscribe changes nothing, options included
+                joined = project_ids - self.project_ids
+                if len(self.project_ids) + len(joined) > MAX_SUBSCRIBED_PROJECTS:
+                    await self.send_json({
+                        'type': 'error',
+                        'message': f'A connection can follow at most {MAX_SUBSCRIBED_PROJECTS} projects'
+                    })
+                    return
+                self.apply_subscribe_options(content)
+                await self.update_project_groups(joined, self.channel_layer.group_add)
+                self.project_ids |= joined
+            else:
+                joined = set()
+                left = project_ids & self.project_ids
+                self.project_ids -= left
+                await self.update_project_groups(left, self.channel_layer.group_discard)
+
+            await self.send_json({
+                'type': 'subscription_success',
+                'project_ids': sorted(self.project_ids)
+            })
+
+            # Replay what newly joined projects sent since the client's last seq
+            resume_from = content.get('resume_from')
+            if isinstance(resume_from, dict):
+                for project_id, seq in resume_from.items():
+                    if project_id in joined and isinstance(seq, int):
+                        await self.replay(f'project_{project_id}', seq)
+
+        elif message_type == 'snapshot':
+            await super().receive_json(content)
+
+    async def update_project_groups(self, project_ids, operation):
+        """Join or leave several project groups concurrently"""
+        await asyncio.gather(*(
+            operation(f'project_{pk}', self.channel_name) for pk in project_ids
+        ))
+
+    @database_sync_to_async
+    def get_organization_project_ids(self, project_ids):
+        """Return the given project ids that belong to this organization"""
+        if not isinstance(project_ids, list) or not project_ids:
+            return set()
+        return {
+            str(pk) for pk in Project.objects.filter(
+                organization=self.organization, id__in=project_ids
+            ).values_list('id', flat=True)
+        }
+
+    @database_sync_to_async
+    def get_task_snapshot(self, task_ids=None):
+        """Serialize tasks of the followed projects, optionally limited to the given ids"""
+        tasks = Task.objects.filter(project_id__in=self.project_ids)
+        if task_ids:
+            tasks = tasks.filter(id__in=task_ids)
+        return [
+            {**serialize_task(task), 'projectId': str(task.project_id)}
+            for task in tasks
+        ]
+
+    async def project_create(self, event):
+        if self.wants('project_created'):
+            await self.forward(event)
+
+    async def project_update(self, event):
+        if self.wants('project_updated'):
+            await self.forward(event)
+
+    async def project_delete(self, event):
+        self.project_ids.discard(event['project_id'])
+        await self.channel_layer.group_discard(f'project_{event["project_id"]}', self.channel_name)
+        if self.wants('project_deleted'):
+            await self.forward(event)
@@ -1,21 +1,256 @@
+import asyncio
+import logging
+import ujson
+from collections import OrderedDict
+from itertools import count
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
-import json
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from core.broadcast import (
+    CLIENT_MESSAGE_TYPES, client_message, encode_json, envelope, serialize_task
+)
+from core.cache.organizations import aget_active_organization
+from core.cache.projects import aget_project_organization_id
+from core.consumers.codecs import negotiate
+from core.event_log import get_event_log
+from core.models import Task
+
+logger = logging.getLogger(__name__)
+
+# What to do when a connection's outbound buffer is full:
+# coalesce     - fold updates to a task still waiting to be sent, then drop the oldest message
+# drop_oldest  - drop the oldest message
+# disconnect   - send {"type": "resync_required"} and close, so the client resumes from its last seq
+OUTBOUND_POLICIES = ('coalesce', 'drop_oldest', 'disconnect')
+
+# Close code for connections that could not keep up
+SLOW_CONSUMER_CLOSE_CODE = 4008
+
+# Message types that subscription type filters treat as the same kind of event
+EVENT_FILTER_TYPES = {
+    'tasks_created': 'task_created',
+    'tasks_updated': 'task_updated',
+    'task_patched': 'task_updated',
+}
 
 
 class TaskConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Streams task and comment events for one project.
+
+    The organization is taken from the ?organization=<slug> query string or
+    the X-Organization-Slug header, and connections to projects outside it
+    are closed with 4003 before joining the project group. Both lookups are
+    cached (see core.cache).
+
+    Clients can opt into batching by subscribing with {"batch": true}. Events
+    arriving within WEBSOCKET_BATCH_WINDOW seconds are then sent as a single
+    {"type": "events"} frame, and repeated updates to the same task within
+    the window collapse to the latest one.
+
+    Updates are sent as task_patched messages carrying only the changed
+    fields plus base_version/version. A client that sees a base_version it
+    does not hold can send {"type": "snapshot", "task_ids": [...]} to get
+    the full tasks back.
+
+    A subscribe message may also carry filters, each a list: "events"
+    (message types such as task_updated or comment_created), "task_ids" and
+    "statuses". Events that do not match are dropped before being sent;
+    events that do not carry a filtered attribute are not filtered on it.
+    Later subscribe messages only change the options they name: a list
+    replaces that filter, null clears it, and "batch": false turns batching
+    off again.
+
+    Every event carries the "seq" id it was given in the project's event log.
+    A reconnecting client passes the last one it saw as ?resume_from=<seq>
+    and the missed events are replayed before live ones. If they are no
+    longer retained, the client gets {"type": "resync_required"} instead.
+    Live events that arrive out of order are briefly held back and sent in
+    seq order (see sequence()).
+
+    Broadcast events arrive as an envelope holding their client frame
+    pre-encoded and only the keys filters need (see core.broadcast.envelope).
+    A connection that sends JSON unbatched forwards the frame as is; the
+    frame is decoded only for batching, binary codecs, coalescing or
+    filtering the tasks of a bulk event.
+
+    Frames are JSON text by default. Clients that offer the "msgpack" or
+    "cbor" WebSocket subprotocol get binary frames in that format instead,
+    with compact UUIDs and timestamps (see core.consumers.codecs), and may
+    send binary frames in it too.
+
+    Events are not sent from the channel layer handlers directly. They go
+    into a per-connection buffer of at most WEBSOCKET_OUTBOUND_LIMIT messages
+    that a writer task drains, so a slow client never holds up the group's
+    inbox. WEBSOCKET_OUTBOUND_POLICY decides what happens when it fills up
+    (see OUTBOUND_POLICIES); dropped and coalesced messages are counted and
+    logged on disconnect.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batch_window = None
+        self.pending_events = {}
+        self.event_keys = count()
+        self.flush_task = None
+        self.event_types = None
+        self.task_ids = None
+        self.statuses = None
+        self.replayed_seqs = {}
+        self.next_seqs = {}
+        self.held_events = {}
+        self.release_tasks = {}
+        self.reorder_window = getattr(settings, 'WEBSOCKET_REORDER_WINDOW', 0.1)
+        self.event_seq = None
+        self.event_project_id = None
+        self.organization = None
+        self.codec = None
+        self.outbound = OrderedDict()
+        self.outbound_limit = getattr(settings, 'WEBSOCKET_OUTBOUND_LIMIT', 256)
+        self.outbound_policy = getattr(settings, 'WEBSOCKET_OUTBOUND_POLICY', 'coalesce')
+        self.writer_task = None
+        self.closing = False
+        self.dropped = 0
+        self.coalesced = 0
+
     async def connect(self):
         self.project_id = self.scope['url_route']['kwargs'].get('project_id')
         self.room_group_name = f'project_{self.project_id}'
 
+        # Validate project belongs to the connection's organization
+        self.organization = await self.get_organization()
+        if (
+            self.organization is None
+            or await aget_project_organization_id(self.project_id) != self.organization.id
+        ):
+            self.organization = None
+            await self.close(code=4003)
+            return
+
         await self.channel_layer.group_add(
             self.room_group_name,
             self.channel_name
         )
 
-        await self.accept()
+        await self.accept_negotiated()
+
+        resume_from = self.get_resume_from()
+        if resume_from is not None:
+            await self.replay(self.room_group_name, resume_from)
+
+    async def accept_negotiated(self):
+        """Accept the connection with the binary subprotocol the client prefers, if any"""
+        self.codec = negotiate(self.scope.get('subprotocols', []))
+        await self.accept(subprotocol=self.codec.subprotocol if self.codec else None)
+
+    async def get_organization(self):
+        """Return the active organization named by the query string or header, or None"""
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        slug = query.get('organization', [None])[0]
+        if not slug:
+            headers = dict(self.scope.get('headers', []))
+            slug = headers.get(b'x-organization-slug', b'').decode()
+        return await aget_active_organization(slug) if slug else None
+
+    def get_resume_from(self):
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        try:
+            return int(query['resume_from'][0])
+        except (KeyError, ValueError):
+            return None
+
+    async def replay(self, group, seq):
+        """Dispatch the events a group sent after seq, or ask the client to resync"""
+        events = await get_event_log().since(group, seq)
+        if events is None:
+            await self.send_json({
+                'type': 'resync_required',
+                'group': group
+            })
+            return
+        # Live events up to here were replayed; those after continue the sequence
+        self.next_seqs[group] = seq + 1
+        for event in events:
+            await self.dispatch(envelope(group, event))
+        self.replayed_seqs[group] = max([seq] + [event['seq'] for event in events])
+
+    async def dispatch(self, message):
+        # Events sent whole, not through the broadcaster, get the same envelope
+        if 'frame' not in message and message.get('type') in CLIENT_MESSAGE_TYPES:
+            event = {key: value for key, value in message.items() if key != 'stream'}
+            message = envelope(message.get('stream'), event)
+
+        seq = message.get('seq')
+        if seq is None:
+            await self.handle_event(message)
+            return
+
+        # Seq ids count per group, so they are tracked per stream (group name).
+        # Only events a replay already delivered are skipped
+        stream = message.get('stream')
+        if seq <= self.replayed_seqs.get(stream, 0):
+            return
+        await self.sequence(stream, message)
+
+    async def handle_event(self, message):
+        # Remember the sequence id and project of the event being handled so
+        # emit() can pass them on
+        self.event_seq = message.get('seq')
+        self.event_project_id = message.get('project_id')
+        try:
+            await super().dispatch(message)
+        finally:
+            self.event_seq = None
+            self.event_project_id = None
+
+    async def sequence(self, stream, message):
+        """
+        Handle the events of a stream in seq order. Workers broadcast
+        independently, so an event can arrive before the one numbered just
+        below it; it is held back until the gap fills or
+        WEBSOCKET_REORDER_WINDOW seconds pass. Nothing is dropped: an event
+        arriving after its gap was given up is still sent.
+        """
+        seq = message['seq']
+        expected = self.next_seqs.get(stream)
+        if expected is not None and seq > expected:
+            self.held_events.setdefault(stream, {})[seq] = message
+            if stream not in self.release_tasks:
+                self.release_tasks[stream] = asyncio.ensure_future(self.release_later(stream))
+            return
+
+        if expected is None or seq == expected:
+            self.next_seqs[stream] = seq + 1
+        await self.handle_event(message)
+        await self.release_held(stream)
+
+    async def release_held(self, stream, skip_gaps=False):
+        """Handle held events that are next in sequence, or all of them when skipping gaps"""
+        held = self.held_events.get(stream, {})
+        while held:
+            seq = self.next_seqs[stream] if self.next_seqs[stream] in held else min(held)
+            if seq != self.next_seqs[stream] and not skip_gaps:
+                break
+            self.next_seqs[stream] = seq + 1
+            await self.handle_event(held.pop(seq))
+
+        if not held:
+            self.held_events.pop(stream, None)
+            task = self.release_tasks.pop(stream, None)
+            if task is not None and task is not asyncio.current_task():
+                task.cancel()
+
+    async def release_later(self, stream):
+        await asyncio.sleep(self.reorder_window)
+        await self.release_held(stream, skip_gaps=True)
 
     async def disconnect(self, close_code):
+        self.stop_sending()
+        if self.organization is None:
+            return
+
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
@@ -25,31 +260,274 @@ class TaskConsumer(AsyncJsonWebsocketConsumer):
         message_type = content.get('type')
 
         if message_type == 'subscribe':
+            self.apply_subscribe_options(content)
             await self.send_json({
                 'type': 'subscription_success',
                 'message': 'Subscribed to project updates'
             })
 
-    async def task_update(self, event):
-        await self.send_json({
-            'type': 'task_updated',
-            'task': event['task']
+        elif message_type == 'snapshot':
+            try:
+                tasks = await self.get_task_snapshot(content.get('task_ids'))
+            except ValidationError:
+                await self.send_json({
+                    'type': 'error',
+                    'message': 'Invalid task ids'
+                })
+                return
+            await self.send_json({
+                'type': 'snapshot',
+                'tasks': tasks
+            })
+
+    def apply_subscribe_options(self, content):
+        """Merge batching and filters from a subscribe message into the current ones"""
+        if 'batch' in content:
+            self.batch_window = (
+                getattr(settings, 'WEBSOCKET_BATCH_WINDOW', 0.05) if content['batch'] else None
+            )
+        if 'events' in content:
+            self.event_types = self.parse_filter(content['events'])
+        if 'task_ids' in content:
+            self.task_ids = self.parse_filter(content['task_ids'])
+        if 'statuses' in content:
+            self.statuses = self.parse_filter(content['statuses'])
+
+    @staticmethod
+    def parse_filter(values):
+        """Turn an optional list filter into a set, or None to match everything"""
+        if not isinstance(values, list):
+            return None
+        return {str(value) for value in values}
+
+    def wants(self, message_type, task_id=None, status=None):
+        """Return whether the subscription filters accept an outgoing message"""
+        if self.event_types is not None:
+            if EVENT_FILTER_TYPES.get(message_type, message_type) not in self.event_types:
+                return False
+        if self.task_ids is not None and task_id is not None and task_id not in self.task_ids:
+            return False
+        if self.statuses is not None and status is not None and status not in self.statuses:
+            return False
+        return True
+
+    def wanted_tasks(self, message_type, tasks):
+        return [task for task in tasks if self.wants(message_type, task['id'], task.get('status'))]
+
+    @database_sync_to_async
+    def get_task_snapshot(self, task_ids=None):
+        """Serialize the project's tasks, optionally limited to the given ids"""
+        tasks = Task.objects.filter(project_id=self.project_id)
+        if task_ids:
+            tasks = tasks.filter(id__in=task_ids)
+        return [serialize_task(task) for task in tasks]
+
+    async def receive(self, text_data=None, bytes_data=None, **kwargs):
+        if bytes_data is not None and self.codec is not None:
+            await self.receive_json(self.codec.decode(bytes_data), **kwargs)
+            return
+        await super().receive(text_data=text_data, bytes_data=bytes_data, **kwargs)
+
+    async def send_json(self, content, close=False):
+        if self.codec is not None:
+            await self.send(bytes_data=self.codec.encode(content), close=close)
+            return
+        await super().send_json(content, close=close)
+
+    @classmethod
+    async def encode_json(cls, content):
+        return encode_json(content)
+
+    async def emit(self, message, key=None, frame=None):
+        """
+        Send a message, or queue it for the next events frame when batching.
+        frame is the broadcast's pre-encoded text for this exact message, if any.
+        """
+        if self.event_seq is not None:
+            message = {**message, 'seq': self.event_seq}
+        if self.event_project_id is not None:
+            message = {**message, 'project_id': self.event_project_id}
+
+        if self.batch_window is None:
+            self.deliver(message, key=key, frame=frame if self.codec is None else None)
+            return
+
+        # Keyed messages fold into a pending one with the same key
+        if key is None:
+            key = next(self.event_keys)
+        pending = self.pending_events.get(key)
+        self.pending_events[key] = merge_messages(pending, message) if pending else message
+
+        if self.flush_task is None:
+            self.flush_task = asyncio.ensure_future(self.flush_later())
+
+    async def forward(self, event, key=None):
+        """Emit a broadcast event, decoding its frame only when it cannot be sent as is"""
+        if self.batch_window is None and self.codec is None:
+            self.deliver(None, key=key, frame=event['frame'])
+            return
+        await self.emit(client_message(event), key=key)
+
+    async def flush_later(self):
+        await asyncio.sleep(self.batch_window)
+        events = list(self.pending_events.values())
+        self.pending_events = {}
+        self.flush_task = None
+        self.deliver({
+            'type': 'events',
+            'events': events
         })
 
+    def deliver(self, message, key=None, frame=None):
+        """
+        Add a message to the outbound buffer, applying the overflow policy.
+        message may be None when frame holds it already encoded.
+        """
+        if self.closing:
+            return
+
+        if key is not None and key in self.outbound and self.outbound_policy != 'drop_oldest':
+            # Fold into the unsent message for the same task and move it to the
+            # back, so messages still go out in sequence order
+            pending, pending_frame = self.outbound.pop(key)
+            self.outbound[key] = (merge_messages(
+                pending or ujson.loads(pending_frame), message or ujson.loads(frame)
+            ), None)
+            self.coalesced += 1
+            return
+
+        if key is None or self.outbound_policy == 'drop_oldest':
+            key = next(self.event_keys)
+
+        if len(self.outbound) >= self.outbound_limit:
+            if self.outbound_policy == 'disconnect':
+                self.dropped += len(self.outbound) + 1
+                self.outbound.clear()
+                self.outbound[key] = ({'type': 'resync_required', 'reason': 'slow_consumer'}, None)
+                self.closing = True
+                self.start_writer()
+                return
+            self.outbound.popitem(last=False)
+            self.dropped += 1
+
+        self.outbound[key] = (message, frame)
+        self.start_writer()
+
+    def start_writer(self):
+        if self.writer_task is None:
+            self.writer_task = asyncio.ensure_future(self.write_outbound())
+
+    async def write_outbound(self):
+        """Send buffered messages in order until the buffer is empty"""
+        try:
+            while self.outbound:
+                _, (message, frame) = self.outbound.popitem(last=False)
+                if frame is not None:
+                    await self.send(text_data=frame)
+                else:
+                    await self.send_json(message)
+            if self.closing:
+                await self.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        finally:
+            self.writer_task = None
+
+    def stop_sending(self):
+        """Cancel pending sends when the connection goes away"""
+        for task in (self.flush_task, self.writer_task, *self.release_tasks.values()):
+            if task is not None:
+                task.cancel()
+        if self.dropped or self.coalesced:
+            logger.info(
+                'WebSocket %s dropped %d and coalesced %d outbound messages',
+                self.channel_name, self.dropped, self.coalesced
+            )
+
+    async def task_update(self, event):
+        if not self.wants('task_updated', event['task_id'], event.get('status')):
+            return
+        await self.forward(event, key=('task', event['task_id']))
+
+    async def task_patch(self, event):
+        if not self.wants('task_updated', event['task_id'], event.get('status')):
+            return
+        # Keyed by task so it folds into a pending update to the same task
+        await self.forward(event, key=('task', event['task_id']))
+
     async def task_create(self, event):
-        await self.send_json({
-            'type': 'task_created',
-            'task': event['task']
+        if not self.wants('task_created', event['task_id'], event.get('status')):
+            return
+        await self.forward(event)
+
+    async def tasks_create(self, event):
+        if self.task_ids is None and self.statuses is None:
+            if self.wants('tasks_created'):
+                await self.forward(event)
+            return
+
+        tasks = self.wanted_tasks('tasks_created', client_message(event)['tasks'])
+        if not tasks:
+            return
+        await self.emit({
+            'type': 'tasks_created',
+            'tasks': tasks
         })
 
+    async def tasks_update(self, event):
+        if self.batch_window is None and self.task_ids is None and self.statuses is None:
+            if self.wants('tasks_updated'):
+                await self.forward(event)
+            return
+
+        tasks = self.wanted_tasks('tasks_updated', client_message(event)['tasks'])
+        if not tasks:
+            return
+
+        if self.batch_window is None:
+            await self.emit({
+                'type': 'tasks_updated',
+                'tasks': tasks
+            })
+            return
+
+        # Split so each task collapses with other pending updates to it
+        for task in tasks:
+            await self.emit({
+                'type': 'task_updated',
+                'task': task
+            }, key=('task', task['id']))
+
     async def task_delete(self, event):
-        await self.send_json({
-            'type': 'task_deleted',
-            'task_id': event['task_id']
-        })
+        if not self.wants('task_deleted', event['task_id']):
+            return
+        # Pending updates to a deleted task are no longer worth sending
+        self.pending_events.pop(('task', event['task_id']), None)
+        self.outbound.pop(('task', event['task_id']), None)
+        await self.forward(event)
 
     async def comment_create(self, event):
-        await self.send_json({
-            'type': 'comment_created',
-            'comment': event['comment']
-        })
+        if not self.wants('comment_created', event['task_id']):
+            return
+        await self.forward(event)
+
+
+def merge_messages(pending, message):
+    """
+    Fold a message into an unsent one for the same task. Patches accumulate
+    their changes; full task messages replace what was pending.
+    """
+    if message['type'] != 'task_patched':
+        return message
+
+    if pending['type'] == 'task_patched':
+        return {
+            **message,
+            'base_version': pending['base_version'],
+            'changes': {**pending['changes'], **message['changes']}
+        }
+
+    # A full task followed by a patch stays a full task
+    task = {**pending['task'], **message['changes'], 'version': message['version']}
+    merged = {**pending, 'task': task}
+    if 'seq' in message:
+        merged['seq'] = message['seq']
+    return merged
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import threading
+import weakref
+from collections import defaultdict, deque
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+class InMemoryEventLog:
+    """
+    Process-local replay buffer, for tests and single-process development.
+
+    Each group keeps a sequence counter and its last max_events messages.
+    """
+
+    def __init__(self, max_events=1000):
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self._sequences = defaultdict(int)
+        self._events = defaultdict(lambda: deque(maxlen=self.max_events))
+
+    async def append(self, group, message):
+        """Store a message and return its sequence id within the group"""
+        with self._lock:
+            self._sequences[group] += 1
+            seq = self._sequences[group]
+            self._events[group].append({**message, 'seq': seq})
+        return seq
+
+    async def since(self, group, seq):
+        """Return the messages after seq, or None if some are no longer retained"""
+        with self._lock:
+            last = self._sequences[group]
+            events = list(self._events[group])
+        return replay_slice(events, seq, last)
+
+
+class RedisEventLog:
+    """
+    Replay buffer shared by every worker, stored as one Redis stream per group.
+
+    Entry ids are the group's sequence ids, assigned with INCR in the same
+    script as the XADD so concurrent publishers cannot reorder them. Streams
+    are trimmed to roughly max_events and expire after ttl seconds of quiet.
+    """
+
+    APPEND_SCRIPT = """
+        local seq = redis.call('INCR', KEYS[1])
+        redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[2], seq .. '-0', 'message', ARGV[1])
+        redis.call('EXPIRE', KEYS[1], ARGV[3])
+        redis.call('EXPIRE', KEYS[2], ARGV[3])
+        return seq
+    """
+
+    def __init__(self, url, max_events=1000, ttl=86400, prefix='events:'):
+        import redis.asyncio
+
+        self.redis = redis.asyncio
+        self.url = url
+        self.max_events = max_events
+        self.ttl = ttl
+        self.prefix = prefix
+        # Redis connections belong to the event loop that opened them
+        self._clients = weakref.WeakKeyDictionary()
+
+    def client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self.redis.from_url(self.url)
+            self._clients[loop] = client
+        return client
+
+    def keys(self, group):
+        return f'{self.prefix}{group}:seq', f'{self.prefix}{group}:stream'
+
+    async def append(self, group, message):
+        """Store a message and return its sequence id within the group"""
+        seq = await self.client().eval(
+            self.APPEND_SCRIPT, 2, *self.keys(group),
+            json.dumps(message), self.max_events, self.ttl
+        )
+        return int(seq)
+
+    async def since(self, group, seq):
+        """Return the messages after seq, or None if some are no longer retained"""
+        seq_key, stream_key = self.keys(group)
+        client = self.client()
+        last = int(await client.get(seq_key) or 0)
+        if seq >= last:
+            return replay_slice([], seq, last)
+
+        entries = await client.xrange(stream_key, min=f'{seq + 1}-0', max='+')
+        events = [
+            {**json.loads(fields[b'message']), 'seq': int(entry_id.split(b'-')[0])}
+            for entry_id, fields in entries
+        ]
+        return replay_slice(events, seq, last)
+
+
+def replay_slice(events, seq, last):
+    """
+    Pick the retained events after seq. None means the client is too far
+    behind (or ahead, after the log was reset) to replay and must resync.
+    """
+    if seq > last:
+        return None
+    missed = [event for event in events if event['seq'] > seq]
+    if seq < last and (not missed or missed[0]['seq'] != seq + 1):
+        return None
+    return missed
+
+
+_event_log = None
+
+
+def get_event_log():
+    """Return the event log configured by settings.EVENT_LOG"""
+    global _event_log
+    if _event_log is None:
+        config = getattr(settings, 'EVENT_LOG', None) or {
+            'BACKEND': 'core.event_log.InMemoryEventLog',
+        }
+        _event_log = import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+    return _event_log
+
+
+@receiver(setting_changed)
+def reset_event_log(setting, **kwargs):
+    global _event_log
+    if setting == 'EVENT_LOG':
+        _event_log = None
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from core.models import Project, Task
+from core.models.project import TASK_COUNTER_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized task and comment counters and repair any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted rows without writing the corrected counters',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rows written per bulk UPDATE',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        batch_size = options['batch_size']
+
+        with transaction.atomic():
+            projects = self.repair_projects(dry_run, batch_size)
+            tasks = self.repair_tasks(dry_run, batch_size)
+
+        verb = 'Found' if dry_run else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {projects} project(s) and {tasks} task(s) with drifted counters'
+        ))
+
+    def repair_projects(self, dry_run, batch_size):
+        drifted = []
+        queryset = Project.objects.with_task_stats().only(*TASK_COUNTER_FIELDS)
+
+        for project in queryset.iterator(chunk_size=batch_size):
+            actual = {
+                'task_count': project.task_total,
+                'todo_task_count': project.task_todo,
+                'in_progress_task_count': project.task_in_progress,
+                'review_task_count': project.task_review,
+                'completed_task_count': project.task_completed,
+            }
+            if any(getattr(project, field) != value for field, value in actual.items()):
+                for field, value in actual.items():
+                    setattr(project, field, value)
+                drifted.append(project)
+
+        if drifted and not dry_run:
+            Project.objects.bulk_update(drifted, TASK_COUNTER_FIELDS, batch_size=batch_size)
+        return len(drifted)
+
+    def repair_tasks(self, dry_run, batch_size):
+        drifted = []
+        queryset = Task.objects.annotate(actual_comment_count=Count('comments')).only(
+            'comment_count'
+        )
+
+        for task in queryset.iterator(chunk_size=batch_size):
+            if task.comment_count != task.actual_comment_count:
+                task.comment_count = task.actual_comment_count
+                drifted.append(task)
+
+        if drifted and not dry_run:
+            Task.objects.bulk_update(drifted, ['comment_count'], batch_size=batch_size)
+        return len(drifted)
@@ -1,39 +1,63 @@
-from django.utils.deprecation import MiddlewareMixin
-from core.models import Organization
-import threading
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from contextlib import contextmanager
+from contextvars import ContextVar
+from core.cache.organizations import aget_active_organization, get_active_organization
 
-_thread_locals = threading.local()
+# A context variable (rather than a thread-local) follows the request across
+# sync_to_async/async_to_sync thread hops and is isolated per asyncio task.
+_current_organization = ContextVar('current_organization', default=None)
 
 
 def get_current_organization():
-    return getattr(_thread_locals, 'organization', None)
+    return _current_organization.get()
 
 
 def set_current_organization(org):
-    _thread_locals.organization = org
+    return _current_organization.set(org)
 
 
-class TenantMiddleware(MiddlewareMixin):
+@contextmanager
+def organization_context(org):
+    """Set the current organization for the duration of the block"""
+    token = _current_organization.set(org)
+    try:
+        yield org
+    finally:
+        _current_organization.reset(token)
+
+
+class TenantMiddleware:
     """
     Middleware to extract organization slug from request headers
-    and set it in thread-local storage for tenant isolation
+    and set it in a context variable for tenant isolation.
+
+    Supports both the sync (WSGI) and async (ASGI) request paths, so it does
+    not force Django to run the async middleware chain in a thread.
     """
 
-    def process_request(self, request):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        org_slug = request.headers.get('X-Organization-Slug')
+        organization = get_active_organization(org_slug) if org_slug else None
+        request.organization = organization
+
+        with organization_context(organization):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
         org_slug = request.headers.get('X-Organization-Slug')
+        organization = await aget_active_organization(org_slug) if org_slug else None
+        request.organization = organization
 
-        if org_slug:
-            try:
-                organization = Organization.objects.get(slug=org_slug, is_active=True)
-                set_current_organization(organization)
-                request.organization = organization
-            except Organization.DoesNotExist:
-                set_current_organization(None)
-                request.organization = None
-        else:
-            set_current_organization(None)
-            request.organization = None
-
-    def process_response(self, request, response):
-        set_current_organization(None)
-        return response
+        with organization_context(organization):
+            return await self.get_response(request)
@@ -0,0 +1,73 @@
+# Generated by Django 6.0 on 2026-10-17 01:19
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+STATUS_COUNTER_FIELDS = {
+    'todo': 'todo_task_count',
+    'in_progress': 'in_progress_task_count',
+    'review': 'review_task_count',
+    'completed': 'completed_task_count',
+}
+
+
+def backfill_counters(apps, schema_editor):
+    Project = apps.get_model('core', 'Project')
+    Task = apps.get_model('core', 'Task')
+
+    counters = {}
+    rows = Task.objects.values('project_id', 'status').annotate(count=Count('id')).order_by()
+    for row in rows:
+        counts = counters.setdefault(row['project_id'], {'task_count': 0})
+        counts['task_count'] += row['count']
+        if row['status'] in STATUS_COUNTER_FIELDS:
+            counts[STATUS_COUNTER_FIELDS[row['status']]] = row['count']
+
+    for project_id, counts in counters.items():
+        Project.objects.filter(pk=project_id).update(**counts)
+
+    tasks = Task.objects.annotate(total=Count('comments')).filter(total__gt=0)
+    for task in tasks:
+        Task.objects.filter(pk=task.pk).update(comment_count=task.total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_taskcomment_author_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='completed_task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='in_progress_task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='review_task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='todo_task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+ORDER_GAP = 1024
+
+
+def respace_task_order(apps, schema_editor):
+    Task = apps.get_model('core', 'Task')
+
+    # Keep the order tasks are displayed in today, including ties on order
+    tasks = Task.objects.only('id', 'project_id', 'order').order_by('project_id', 'order', '-created_at')
+    changed = []
+    position = {}
+    for task in tasks.iterator():
+        index = position.get(task.project_id, 0)
+        position[task.project_id] = index + 1
+        if task.order != index * ORDER_GAP:
+            task.order = index * ORDER_GAP
+            changed.append(task)
+
+    Task.objects.bulk_update(changed, ['order'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_search_vectors'),
+    ]
+
+    operations = [
+        migrations.RunPython(respace_task_order, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,33 @@
+from collections import Counter
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
 import uuid
 
+# Denormalized counter column for each task status
+TASK_STATUS_COUNTER_FIELDS = {
+    'todo': 'todo_task_count',
+    'in_progress': 'in_progress_task_count',
+    'review': 'review_task_count',
+    'completed': 'completed_task_count',
+}
+
+TASK_COUNTER_FIELDS = ['task_count', *TASK_STATUS_COUNTER_FIELDS.values()]
+
+
+class ProjectQuerySet(models.QuerySet):
+    def with_task_stats(self):
+        """Annotate each project with its task counts in a single grouped query"""
+        return self.annotate(
+            task_total=Count('tasks'),
+            task_todo=Count('tasks', filter=Q(tasks__status='todo')),
+            task_in_progress=Count('tasks', filter=Q(tasks__status='in_progress')),
+            task_review=Count('tasks', filter=Q(tasks__status='review')),
+            task_completed=Count('tasks', filter=Q(tasks__status='completed')),
+        )
+
 
 class Project(models.Model):
     STATUS_CHOICES = [
@@ -22,39 +49,89 @@ class Project(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='planning')
     start_date = models.DateField(null=True, blank=True)
     end_date = models.DateField(null=True, blank=True)
+    task_count = models.PositiveIntegerField(default=0)
+    todo_task_count = models.PositiveIntegerField(default=0)
+    in_progress_task_count = models.PositiveIntegerField(default=0)
+    review_task_count = models.PositiveIntegerField(default=0)
+    completed_task_count = models.PositiveIntegerField(default=0)
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('name', weight='A', config='english')
+            + SearchVector('description', weight='B', config='english')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProjectQuerySet.as_manager()
+
     class Meta:
         db_table = 'projects'
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['organization', 'status']),
             models.Index(fields=['organization', '-created_at']),
+            GinIndex(fields=['search_vector']),
         ]
 
     def __str__(self):
         return f"{self.name} ({self.organization.name})"
 
-    @property
-    def task_stats(self):
-        """Calculate task statistics for this project"""
-        tasks = self.tasks.all()
-        total = tasks.count()
-        if total == 0:
-            return {
-                'total': 0,
-                'todo': 0,
-                'in_progress': 0,
-                'completed': 0,
-                'completion_rate': 0
-            }
-
-        completed = tasks.filter(status='completed').count()
+    @staticmethod
+    def build_task_stats(total, todo, in_progress, review, completed):
+        """Build the task statistics dict from per-status counts"""
         return {
             'total': total,
-            'todo': tasks.filter(status='todo').count(),
-            'in_progress': tasks.filter(status='in_progress').count(),
+            'todo': todo,
+            'in_progress': in_progress,
+            'review': review,
             'completed': completed,
-            'completion_rate': round((completed / total) * 100, 2)
+            'completion_rate': round((completed / total) * 100, 2) if total else 0
+        }
+
+    @property
+    def task_stats(self):
+        """Task statistics for this project, read from the counter columns"""
+        return self.build_task_stats(
+            self.task_count,
+            self.todo_task_count,
+            self.in_progress_task_count,
+            self.review_task_count,
+            self.completed_task_count,
+        )
+
+    def adjust_task_counters(self, added=(), removed=()):
+        """
+        Apply tasks entering (added) and/or leaving (removed) statuses to the
+        counter columns with a single UPDATE using F() expressions. Both
+        arguments are iterables of task statuses.
+        """
+        fields = Project.update_task_counters(self.pk, added, removed)
+        if fields:
+            self.refresh_from_db(fields=fields)
+
+    @staticmethod
+    def update_task_counters(project_id, added=(), removed=()):
+        """
+        Counter UPDATE behind adjust_task_counters() for callers without a
+        loaded project. Decrements are clamped at zero, so rows written before
+        the counters existed cannot push a column below zero. Returns the
+        fields written.
+        """
+        deltas = Counter()
+        for statuses, delta in ((added, 1), (removed, -1)):
+            for status in statuses:
+                deltas['task_count'] += delta
+                field = TASK_STATUS_COUNTER_FIELDS.get(status)
+                if field:
+                    deltas[field] += delta
+
+        updates = {
+            field: F(field) + delta if delta > 0 else Greatest(F(field) + delta, 0)
+            for field, delta in deltas.items() if delta
         }
+        if updates:
+            Project.objects.filter(pk=project_id).update(**updates)
+        return list(updates)
@@ -1,4 +1,9 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models import F, Max
+from django.db.models.functions import Greatest
+from django.utils import timezone
 import uuid
 
 
@@ -17,6 +22,12 @@ class Task(models.Model):
         ('urgent', 'Urgent'),
     ]
 
+    # Spacing between consecutive order values, leaving room to insert a task
+    # between two neighbours without renumbering the rest of the project
+    ORDER_GAP = 1024
+    ORDER_MIN = -2 ** 31
+    ORDER_MAX = 2 ** 31 - 1
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     project = models.ForeignKey(
         'Project',
@@ -29,6 +40,17 @@ class Task(models.Model):
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='medium')
     due_date = models.DateTimeField(null=True, blank=True)
     order = models.IntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    # Incremented on every write so WebSocket clients can detect missed updates
+    version = models.PositiveIntegerField(default=1)
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('title', weight='A', config='english')
+            + SearchVector('description', weight='B', config='english')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -38,7 +60,104 @@ class Task(models.Model):
         indexes = [
             models.Index(fields=['project', 'status']),
             models.Index(fields=['project', 'order']),
+            GinIndex(fields=['search_vector']),
         ]
 
     def __str__(self):
         return f"{self.title} - {self.project.name}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        task = super().from_db(db, field_names, values)
+        # Project and status as stored, so core.signals can move the counters
+        # on save without reading the row again
+        if 'project_id' in task.__dict__ and 'status' in task.__dict__:
+            task._counted = (task.project_id, task.status)
+        return task
+
+    def adjust_comment_count(self, delta):
+        """Apply a comment count change with a single UPDATE using an F() expression"""
+        Task.update_comment_count(self.pk, delta)
+        self.refresh_from_db(fields=['comment_count'])
+
+    @staticmethod
+    def update_comment_count(task_id, delta):
+        """Comment count UPDATE behind adjust_comment_count(), clamped at zero"""
+        Task.objects.filter(pk=task_id).update(
+            comment_count=Greatest(F('comment_count') + delta, 0)
+        )
+
+    @classmethod
+    def next_order(cls, project):
+        """Return an order value that places a new task at the end of the project"""
+        last = cls.objects.filter(project=project).aggregate(Max('order'))['order__max']
+        return 0 if last is None else last + cls.ORDER_GAP
+
+    def move(self, before=None, after=None):
+        """
+        Place the task between two neighbours of the same project, where before
+        should precede it and after should follow it.
+
+        The common case writes only this row. When the neighbours have no gap
+        left, every task in the project is respaced by ORDER_GAP. Returns the
+        tasks whose order was written.
+        """
+        order = self._order_between(before, after)
+        if order is None:
+            return self._rebalance(before, after)
+
+        self.order = order
+        self.version += 1
+        self.save(update_fields=['order', 'status', 'version', 'updated_at'])
+        return [self]
+
+    def _order_between(self, before, after):
+        if before is None and after is None:
+            last = (
+                Task.objects.filter(project_id=self.project_id)
+                .exclude(pk=self.pk)
+                .aggregate(Max('order'))['order__max']
+            )
+            order = 0 if last is None else last + self.ORDER_GAP
+        elif before is None:
+            order = after.order - self.ORDER_GAP
+        elif after is None:
+            order = before.order + self.ORDER_GAP
+        elif after.order - before.order > 1:
+            order = (before.order + after.order) // 2
+        else:
+            return None
+
+        if self.ORDER_MIN <= order <= self.ORDER_MAX:
+            return order
+        return None
+
+    def _rebalance(self, before, after):
+        tasks = list(
+            Task.objects.filter(project_id=self.project_id)
+            .exclude(pk=self.pk)
+            .order_by('order', 'id')
+        )
+        ids = [task.pk for task in tasks]
+        if before is not None:
+            position = ids.index(before.pk) + 1
+        elif after is not None:
+            position = ids.index(after.pk)
+        else:
+            position = len(tasks)
+        tasks.insert(position, self)
+
+        now = timezone.now()
+        moved = []
+        for index, task in enumerate(tasks):
+            if task is not self and task.order != index * self.ORDER_GAP:
+                task.order = index * self.ORDER_GAP
+                task.version += 1
+                task.updated_at = now
+                moved.append(task)
+        Task.objects.bulk_update(moved, ['order', 'version', 'updated_at'])
+
+        self.order = position * self.ORDER_GAP
+        self.version += 1
+        self.save(update_fields=['order', 'status', 'version', 'updated_at'])
+        return moved + [self]
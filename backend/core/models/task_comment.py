@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
 import uuid
 
@@ -12,6 +14,11 @@ class TaskComment(models.Model):
     author_name = models.CharField(max_length=255)
     author_email = models.EmailField(max_length=255, blank=True)
     content = models.TextField()
+    search_vector = models.GeneratedField(
+        expression=SearchVector('content', config='english'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -20,6 +27,7 @@ class TaskComment(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['task', '-created_at']),
+            GinIndex(fields=['search_vector']),
         ]
 
     def __str__(self):
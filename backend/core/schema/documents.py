@@ -0,0 +1,127 @@
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import caches
+from graphql import GraphQLError, parse, validate
+from core.cache.lru import LRUCache
+
+CACHE_KEY_PREFIX = 'graphql:persisted:'
+
+# Parsed and validated documents, keyed by the sha256 of the query text
+_documents = LRUCache(max_entries=getattr(settings, 'GRAPHQL_DOCUMENT_CACHE_SIZE', 512))
+
+# Query texts registered through automatic persisted queries
+_persisted = LRUCache(max_entries=getattr(settings, 'PERSISTED_QUERY_MAX_ENTRIES', 4096))
+_manifest = None
+
+
+class PersistedQueryNotFound(GraphQLError):
+    """The client sent a hash the server has no query for; it should retry with the text"""
+
+    def __init__(self):
+        super().__init__(
+            'PersistedQueryNotFound',
+            extensions={'code': 'PERSISTED_QUERY_NOT_FOUND'},
+        )
+
+
+def query_hash(query):
+    """Return the sha256 hex digest identifying a query document"""
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+def _shared_cache():
+    """Django cache used to share registered queries between workers, if configured"""
+    alias = getattr(settings, 'PERSISTED_QUERY_CACHE_ALIAS', None)
+    return caches[alias] if alias else None
+
+
+def _load_manifest():
+    """Pre-registered queries from the PERSISTED_QUERIES_MANIFEST JSON file ({hash: query})"""
+    global _manifest
+    if _manifest is None:
+        path = getattr(settings, 'PERSISTED_QUERIES_MANIFEST', None)
+        if path:
+            with open(path) as manifest:
+                _manifest = json.load(manifest)
+        else:
+            _manifest = {}
+    return _manifest
+
+
+def get_persisted_query(sha256_hash):
+    """Return the query text registered for a hash, or None"""
+    query = _load_manifest().get(sha256_hash) or _persisted.get(sha256_hash)
+    if query is None:
+        shared = _shared_cache()
+        if shared is not None:
+            query = shared.get(CACHE_KEY_PREFIX + sha256_hash)
+            if query is not None:
+                _persisted.set(sha256_hash, query)
+    return query
+
+
+def register_persisted_query(sha256_hash, query):
+    """Register a query sent together with its hash, after checking the hash matches"""
+    if query_hash(query) != sha256_hash:
+        raise GraphQLError('provided sha does not match query')
+    if not getattr(settings, 'PERSISTED_QUERIES_AUTO_REGISTER', True):
+        return
+    # Oversized documents still run, they are just not remembered
+    if len(query) > getattr(settings, 'PERSISTED_QUERY_MAX_LENGTH', 20000):
+        return
+    _persisted.set(sha256_hash, query)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.set(
+            CACHE_KEY_PREFIX + sha256_hash, query, getattr(settings, 'PERSISTED_QUERY_TTL', 86400)
+        )
+
+
+def resolve_persisted_query(query, extensions):
+    """
+    Return the query text for a request, following the automatic persisted
+    queries protocol: a request may carry
+    extensions.persistedQuery.sha256Hash instead of (or along with) the text.
+    """
+    persisted = (extensions or {}).get('persistedQuery')
+    if not isinstance(persisted, dict):
+        return query
+    if persisted.get('version', 1) != 1:
+        raise GraphQLError('Unsupported persisted query version')
+
+    sha256_hash = persisted.get('sha256Hash')
+    if not isinstance(sha256_hash, str):
+        raise GraphQLError('Persisted query hash is missing')
+
+    if query:
+        register_persisted_query(sha256_hash, query)
+        return query
+
+    query = get_persisted_query(sha256_hash)
+    if query is None:
+        raise PersistedQueryNotFound()
+    return query
+
+
+def get_document(schema, query, rules=None, max_errors=None):
+    """
+    Parse and validate a query, reusing the result for repeated documents.
+
+    Returns (document, errors); a syntax error is returned as the only error.
+    Results are keyed by the query hash, so identical documents sent by many
+    clients are parsed and validated once per process.
+    """
+    key = (query_hash(query), id(schema), tuple(rules) if rules else None)
+    cached = _documents.get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        document = parse(query)
+    except GraphQLError as error:
+        return None, [error]
+
+    errors = validate(schema, document, rules, max_errors)
+    _documents.set(key, (document, errors))
+    return document, errors
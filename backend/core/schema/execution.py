@@ -0,0 +1,106 @@
+import asyncio
+import inspect
+import pickle
+from functools import wraps
+from weakref import WeakKeyDictionary
+from channels.db import database_sync_to_async
+from django.db.models import QuerySet
+from core.middleware.tenant import get_current_organization
+
+
+def in_event_loop():
+    """Return True when called from a running event loop (async execution)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def offload(resolver):
+    """
+    Decorator for ORM-backed Query and Mutation resolvers.
+
+    Under synchronous execution (GraphQLView, graphene's test client) the
+    resolver is called directly. Under async execution it returns a coroutine
+    that runs the resolver in a worker thread and evaluates any QuerySet it
+    returns there, so independent root fields run concurrently and the event
+    loop never blocks on the database.
+    """
+
+    def run(*args, **kwargs):
+        result = resolver(*args, **kwargs)
+        if isinstance(result, QuerySet):
+            result = list(result)
+        return result
+
+    @wraps(resolver)
+    def wrapper(*args, **kwargs):
+        if not in_event_loop():
+            return resolver(*args, **kwargs)
+        return database_sync_to_async(run, thread_sensitive=False)(*args, **kwargs)
+
+    return wrapper
+
+
+class SingleFlight:
+    """
+    Share one execution between concurrent calls with the same key.
+
+    Calls run on the event loop. The first caller starts the call as a task
+    and callers arriving while it is in flight await the same future, so
+    waiting never holds a worker thread. The result is pickled once and every
+    caller unpickles its own copy, so callers never share model instances;
+    exceptions are raised to every caller. Nothing is cached once the call
+    completes.
+    """
+
+    def __init__(self):
+        # In-flight calls per event loop, as their futures cannot be awaited from another
+        self._calls = WeakKeyDictionary()
+
+    async def do(self, key, fn):
+        calls = self._calls.setdefault(asyncio.get_running_loop(), {})
+        call = calls.get(key)
+        if call is None:
+            call = calls[key] = asyncio.ensure_future(self._run(fn))
+            call.add_done_callback(lambda _: calls.pop(key, None))
+        # Shielded so a caller going away does not cancel the call for the rest
+        return pickle.loads(await asyncio.shield(call))
+
+    @staticmethod
+    async def _run(fn):
+        result = fn()
+        if inspect.isawaitable(result):
+            result = await result
+        return pickle.dumps(result)
+
+
+_single_flight = SingleFlight()
+
+
+def coalesce(resolver):
+    """
+    Decorator for read-only root resolvers, applied above offload.
+
+    Under async execution, identical concurrent calls for the same
+    organization and arguments share one database execution, so a burst of
+    reconnecting clients costs one query instead of thousands. Each call gets
+    its own copy of the rows. Under synchronous execution the resolver is
+    called directly.
+    """
+
+    @wraps(resolver)
+    def wrapper(root, info, **kwargs):
+        if not in_event_loop():
+            return resolver(root, info, **kwargs)
+
+        organization = get_current_organization()
+        key = (
+            resolver.__qualname__,
+            organization.pk if organization else None,
+            tuple(sorted((name, str(value)) for name, value in kwargs.items())),
+        )
+        return _single_flight.do(key, lambda: resolver(root, info, **kwargs))
+
+    return wrapper
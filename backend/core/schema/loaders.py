@@ -0,0 +1,193 @@
+import asyncio
+import threading
+from collections import defaultdict
+from inspect import isawaitable
+from channels.db import database_sync_to_async
+from django.db.models import QuerySet
+from core.models import Organization, Project, Task, TaskComment
+from core.schema.execution import in_event_loop
+
+
+class DataLoader:
+    """
+    Request-scoped loader that batches lookups by key.
+
+    Keys queued with prime() are fetched together with the first key that
+    misses the cache, so resolving a field for N parents costs one query.
+    Under async execution a miss returns an awaitable instead, and all keys
+    requested in the same tick share one batch run in a worker thread.
+    """
+
+    def __init__(self):
+        self._cache = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._batch = None
+
+    def batch_load(self, keys):
+        """Return a dict mapping keys to values; missing keys get default()"""
+        raise NotImplementedError
+
+    def default(self):
+        return None
+
+    def prime(self, keys):
+        with self._lock:
+            for key in keys:
+                if key not in self._cache:
+                    self._pending[key] = None
+
+    def seed(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+            self._pending.pop(key, None)
+
+    def load(self, key):
+        if key in self._cache:
+            return self._cache[key]
+
+        self.prime([key])
+        if in_event_loop():
+            return self._load_async(key)
+
+        self._dispatch()
+        return self._cache[key]
+
+    def _dispatch(self):
+        with self._lock:
+            keys = list(self._pending)
+            self._pending.clear()
+        if not keys:
+            return
+
+        results = self.batch_load(keys)
+        for batch_key in keys:
+            self._cache[batch_key] = results.get(batch_key, self.default())
+
+    async def _load_async(self, key):
+        # Keys primed while a batch is in flight are picked up by the next one
+        while key not in self._cache:
+            if self._batch is None:
+                self._batch = asyncio.ensure_future(self._dispatch_async())
+            await self._batch
+        return self._cache[key]
+
+    async def _dispatch_async(self):
+        try:
+            await database_sync_to_async(self._dispatch, thread_sensitive=False)()
+        finally:
+            self._batch = None
+
+
+class ModelLoader(DataLoader):
+    """Load model instances by primary key with a single IN query"""
+
+    def __init__(self, loaders, model):
+        super().__init__()
+        self.loaders = loaders
+        self.model = model
+
+    def batch_load(self, keys):
+        objs = list(self.model.objects.filter(pk__in=keys))
+        # Rows loaded for other parents are only returned later, so prime their
+        # children now to keep the next level batched as well
+        self.loaders.prime_from(objs)
+        return {obj.pk: obj for obj in objs}
+
+
+class RelatedListLoader(DataLoader):
+    """Load reverse relation rows for many parents with a single IN query"""
+
+    def __init__(self, loaders, model, parent_field):
+        super().__init__()
+        self.loaders = loaders
+        self.model = model
+        self.parent_field = parent_field
+
+    def default(self):
+        return []
+
+    def batch_load(self, keys):
+        attname = f'{self.parent_field}_id'
+        objs = list(self.model.objects.filter(**{f'{attname}__in': keys}))
+        self.loaders.prime_from(objs)
+
+        grouped = defaultdict(list)
+        for obj in objs:
+            grouped[getattr(obj, attname)].append(obj)
+        return grouped
+
+
+class Loaders:
+    """All loaders for a single GraphQL request"""
+
+    def __init__(self):
+        self.organization = ModelLoader(self, Organization)
+        self.project = ModelLoader(self, Project)
+        self.task = ModelLoader(self, Task)
+        self.projects_by_organization = RelatedListLoader(self, Project, 'organization')
+        self.tasks_by_project = RelatedListLoader(self, Task, 'project')
+        self.comments_by_task = RelatedListLoader(self, TaskComment, 'task')
+
+    def prime_from(self, instances):
+        """Queue the keys of loaders whose parents are the given instances"""
+        for instance in instances:
+            if isinstance(instance, Organization):
+                self.organization.seed(instance.pk, instance)
+                self.projects_by_organization.prime([instance.pk])
+            elif isinstance(instance, Project):
+                self.project.seed(instance.pk, instance)
+                self.organization.prime([instance.organization_id])
+                self.tasks_by_project.prime([instance.pk])
+            elif isinstance(instance, Task):
+                self.task.seed(instance.pk, instance)
+                self.project.prime([instance.project_id])
+                self.comments_by_task.prime([instance.pk])
+            elif isinstance(instance, TaskComment):
+                self.task.prime([instance.task_id])
+
+
+def get_loaders(info):
+    """Return the loaders attached to the request context, creating them once"""
+    context = info.context
+    if context is None:
+        return Loaders()
+
+    loaders = getattr(context, 'loaders', None)
+    if loaders is None:
+        loaders = Loaders()
+        context.loaders = loaders
+    return loaders
+
+
+def load_related(info, instance, field_name, loader):
+    """Resolve a forward relation, using the loader unless it is already cached"""
+    field = instance._meta.get_field(field_name)
+    if field.is_cached(instance):
+        return getattr(instance, field_name)
+    return loader.load(getattr(instance, field.attname))
+
+
+class DataLoaderMiddleware:
+    """
+    Graphene middleware that primes the request loaders with every list of
+    model instances returned by a resolver, so child fields batch together.
+    """
+
+    def resolve(self, next, root, info, **args):
+        result = next(root, info, **args)
+        if isawaitable(result):
+            return self._prime_awaited(result, info)
+        return self._prime(result, info)
+
+    async def _prime_awaited(self, result, info):
+        return self._prime(await result, info)
+
+    def _prime(self, result, info):
+        if isinstance(result, QuerySet):
+            result = list(result)
+
+        if isinstance(result, list) and result:
+            get_loaders(info).prime_from(result)
+
+        return result
@@ -1,86 +1,125 @@
 import graphene
+from collections import defaultdict
 from graphql import GraphQLError
+from django.db import transaction
+from django.utils import timezone
 from core.models import Organization, Project, Task, TaskComment
 from core.schema.types import OrganizationType, ProjectType, TaskType, TaskCommentType
 from core.middleware.tenant import get_current_organization
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from core.schema.execution import offload
+from core.broadcast import (
+    broadcaster, serialize_comment, serialize_project, serialize_task, task_changes
+)
+from core.cache.projects import invalidate_project
+from core.cache.query_results import invalidate_queries
+
+# Upper bound on the number of tasks a single bulk mutation may touch
+MAX_BULK_TASKS = 500
 
 
 # Helper functions for WebSocket broadcasting
 def broadcast_task_event(event_type, task, project_id=None):
-    """Broadcast task events via WebSocket"""
-    channel_layer = get_channel_layer()
-    if not channel_layer:
-        return
-
+    """Broadcast task events via WebSocket once the transaction commits"""
     if project_id is None:
         project_id = str(task.project.id)
 
     room_group_name = f'project_{project_id}'
 
-    task_data = {
-        'id': str(task.id),
-        'title': task.title,
-        'description': task.description,
-        'status': task.status,
-        'priority': task.priority,
-        'order': task.order,
-        'dueDate': task.due_date.isoformat() if task.due_date else None,
-        'createdAt': task.created_at.isoformat(),
-        'updatedAt': task.updated_at.isoformat(),
-    }
-
-    async_to_sync(channel_layer.group_send)(
+    broadcaster.publish(
         room_group_name,
         {
             'type': event_type,
-            'task': task_data
+            'project_id': str(project_id),
+            'task': serialize_task(task)
         }
     )
 
 
-def broadcast_task_delete(task_id, project_id):
-    """Broadcast task deletion via WebSocket"""
-    channel_layer = get_channel_layer()
-    if not channel_layer:
+def broadcast_task_patch(task, before):
+    """Broadcast only the fields of a task that changed since the before snapshot"""
+    room_group_name = f'project_{task.project_id}'
+
+    broadcaster.publish(
+        room_group_name,
+        {
+            'type': 'task_patch',
+            'project_id': str(task.project_id),
+            'task_id': str(task.id),
+            'base_version': before['version'],
+            'version': task.version,
+            'changes': task_changes(before, serialize_task(task))
+        }
+    )
+
+
+def broadcast_tasks_event(event_type, tasks, project_id):
+    """Broadcast a single coalesced event for many tasks of one project via WebSocket"""
+    if not tasks:
         return
 
     room_group_name = f'project_{project_id}'
 
-    async_to_sync(channel_layer.group_send)(
+    broadcaster.publish(
+        room_group_name,
+        {
+            'type': event_type,
+            'project_id': str(project_id),
+            'tasks': [serialize_task(task) for task in tasks]
+        }
+    )
+
+
+def broadcast_task_delete(task_id, project_id):
+    """Broadcast task deletion via WebSocket once the transaction commits"""
+    room_group_name = f'project_{project_id}'
+
+    broadcaster.publish(
         room_group_name,
         {
             'type': 'task_delete',
+            'project_id': str(project_id),
             'task_id': str(task_id)
         }
     )
 
 
 def broadcast_comment_event(comment, task):
-    """Broadcast comment events via WebSocket"""
-    channel_layer = get_channel_layer()
-    if not channel_layer:
-        return
-
+    """Broadcast comment events via WebSocket once the transaction commits"""
     project_id = str(task.project.id)
     room_group_name = f'project_{project_id}'
 
-    comment_data = {
-        'id': str(comment.id),
-        'taskId': str(comment.task.id),
-        'authorName': comment.author_name,
-        'authorEmail': comment.author_email,
-        'content': comment.content,
-        'createdAt': comment.created_at.isoformat(),
-        'updatedAt': comment.updated_at.isoformat(),
-    }
-
-    async_to_sync(channel_layer.group_send)(
+    broadcaster.publish(
         room_group_name,
         {
             'type': 'comment_create',
-            'comment': comment_data
+            'project_id': project_id,
+            'comment': serialize_comment(comment)
+        }
+    )
+
+
+def broadcast_project_event(event_type, project):
+    """Broadcast project events to the organization group once the transaction commits"""
+    room_group_name = f'organization_{project.organization_id}'
+
+    broadcaster.publish(
+        room_group_name,
+        {
+            'type': event_type,
+            'project': serialize_project(project)
+        }
+    )
+
+
+def broadcast_project_delete(project_id, organization_id):
+    """Broadcast project deletion to the organization group once the transaction commits"""
+    room_group_name = f'organization_{organization_id}'
+
+    broadcaster.publish(
+        room_group_name,
+        {
+            'type': 'project_delete',
+            'project_id': str(project_id)
         }
     )
 
@@ -94,6 +133,7 @@ class CreateOrganization(graphene.Mutation):
 
     organization = graphene.Field(OrganizationType)
 
+    @offload
     def mutate(self, info, name, description='', contact_email=''):
         organization = Organization.objects.create(
             name=name,
@@ -115,6 +155,7 @@ class CreateProject(graphene.Mutation):
 
     project = graphene.Field(ProjectType)
 
+    @offload
     def mutate(self, info, organization_id, name, description='',
                status='planning', start_date=None, end_date=None):
         # Get current organization from middleware
@@ -139,6 +180,13 @@ class CreateProject(graphene.Mutation):
             start_date=start_date,
             end_date=end_date
         )
+
+        # Invalidate cached query results
+        invalidate_queries(organization.id, project.id)
+
+        # Broadcast project creation via WebSocket
+        broadcast_project_event('project_create', project)
+
         return CreateProject(project=project)
 
 
@@ -153,6 +201,7 @@ class UpdateProject(graphene.Mutation):
 
     project = graphene.Field(ProjectType)
 
+    @offload
     def mutate(self, info, id, **kwargs):
         # Get current organization from middleware
         organization = get_current_organization()
@@ -170,6 +219,12 @@ class UpdateProject(graphene.Mutation):
                 setattr(project, key, value)
 
         project.save()
+        # Invalidate cached query results
+        invalidate_queries(organization.id, project.id)
+
+        # Broadcast project update via WebSocket
+        broadcast_project_event('project_update', project)
+
         return UpdateProject(project=project)
 
 
@@ -179,6 +234,7 @@ class DeleteProject(graphene.Mutation):
 
     success = graphene.Boolean()
 
+    @offload
     def mutate(self, info, id):
         # Get current organization from middleware
         organization = get_current_organization()
@@ -188,7 +244,13 @@ class DeleteProject(graphene.Mutation):
         # Validate project belongs to current organization
         try:
             project = Project.objects.get(id=id, organization=organization)
+            project_id = project.id
             project.delete()
+            invalidate_queries(organization.id, project_id)
+            invalidate_project(project_id)
+
+            # Broadcast project deletion via WebSocket
+            broadcast_project_delete(project_id, organization.id)
             return DeleteProject(success=True)
         except Project.DoesNotExist:
             raise GraphQLError(f"Project not found in your organization")
@@ -207,8 +269,9 @@ class CreateTask(graphene.Mutation):
 
     task = graphene.Field(TaskType)
 
+    @offload
     def mutate(self, info, project_id, title, description='',
-               status='todo', priority='medium', due_date=None, order=0):
+               status='todo', priority='medium', due_date=None, order=None):
         # Get current organization from middleware
         organization = get_current_organization()
         if not organization:
@@ -223,15 +286,21 @@ class CreateTask(graphene.Mutation):
         except Project.DoesNotExist:
             raise GraphQLError(f"Project not found in your organization")
 
-        task = Task.objects.create(
-            project=project,
-            title=title,
-            description=description,
-            status=status,
-            priority=priority,
-            due_date=due_date,
-            order=order
-        )
+        # New tasks go to the end of the project unless placed explicitly
+        if order is None:
+            order = Task.next_order(project)
+
+        with transaction.atomic():
+            task = Task.objects.create(
+                project=project,
+                title=title,
+                description=description,
+                status=status,
+                priority=priority,
+                due_date=due_date,
+                order=order
+            )
+            invalidate_queries(organization.id, project.id)
 
         # Broadcast task creation via WebSocket
         broadcast_task_event('task_create', task, str(project_id))
@@ -251,29 +320,39 @@ class UpdateTask(graphene.Mutation):
 
     task = graphene.Field(TaskType)
 
+    @offload
     def mutate(self, info, id, **kwargs):
         # Get current organization from middleware
         organization = get_current_organization()
         if not organization:
             raise GraphQLError("Organization not specified. Please select an organization.")
 
-        # Validate task belongs to current organization
-        try:
-            task = Task.objects.select_related('project__organization').get(
-                id=id,
-                project__organization=organization
-            )
-        except Task.DoesNotExist:
-            raise GraphQLError(f"Task not found in your organization")
-
-        for key, value in kwargs.items():
-            if value is not None:
-                setattr(task, key, value)
-
-        task.save()
-
-        # Broadcast task update via WebSocket
-        broadcast_task_event('task_update', task)
+        with transaction.atomic():
+            # Validate task belongs to current organization, locking it so the
+            # status counters (kept by core.signals) see a consistent previous status
+            try:
+                task = (
+                    Task.objects.select_related('project__organization')
+                    .select_for_update(of=('self',))
+                    .get(id=id, project__organization=organization)
+                )
+            except Task.DoesNotExist:
+                raise GraphQLError("Task not found in your organization")
+
+            before = serialize_task(task)
+
+            changed_fields = ['version', 'updated_at']
+            for key, value in kwargs.items():
+                if value is not None:
+                    setattr(task, key, value)
+                    changed_fields.append(key)
+
+            task.version += 1
+            task.save(update_fields=changed_fields)
+            invalidate_queries(organization.id, task.project_id)
+
+        # Broadcast only the changed fields via WebSocket
+        broadcast_task_patch(task, before)
 
         return UpdateTask(task=task)
 
@@ -284,28 +363,296 @@ class DeleteTask(graphene.Mutation):
 
     success = graphene.Boolean()
 
+    @offload
     def mutate(self, info, id):
         # Get current organization from middleware
         organization = get_current_organization()
         if not organization:
             raise GraphQLError("Organization not specified. Please select an organization.")
 
-        # Validate task belongs to current organization
-        try:
-            task = Task.objects.select_related('project__organization').get(
-                id=id,
-                project__organization=organization
-            )
+        with transaction.atomic():
+            # Validate task belongs to current organization, locking it so the
+            # counters are decremented for the status it is deleted with
+            try:
+                task = (
+                    Task.objects.select_related('project__organization')
+                    .select_for_update(of=('self',))
+                    .get(id=id, project__organization=organization)
+                )
+            except Task.DoesNotExist:
+                raise GraphQLError("Task not found in your organization")
+
             project_id = str(task.project.id)
             task_id = str(task.id)
 
-            # Broadcast task deletion via WebSocket BEFORE deleting
+            task.delete()
+            invalidate_queries(organization.id, project_id)
+
+            # Broadcast task deletion via WebSocket once the delete commits
             broadcast_task_delete(task_id, project_id)
+        return DeleteTask(success=True)
 
-            task.delete()
-            return DeleteTask(success=True)
-        except Task.DoesNotExist:
-            raise GraphQLError(f"Task not found in your organization")
+
+# Bulk Task Mutations
+class TaskInput(graphene.InputObjectType):
+    title = graphene.String(required=True)
+    description = graphene.String()
+    status = graphene.String()
+    priority = graphene.String()
+    due_date = graphene.DateTime()
+    order = graphene.Int()
+
+
+class TaskUpdateInput(graphene.InputObjectType):
+    id = graphene.UUID(required=True)
+    title = graphene.String()
+    description = graphene.String()
+    status = graphene.String()
+    priority = graphene.String()
+    due_date = graphene.DateTime()
+    order = graphene.Int()
+
+
+def check_bulk_size(items):
+    if len(items) > MAX_BULK_TASKS:
+        raise GraphQLError(f"Bulk mutations are limited to {MAX_BULK_TASKS} tasks")
+
+
+class BulkCreateTasks(graphene.Mutation):
+    class Arguments:
+        project_id = graphene.UUID(required=True)
+        tasks = graphene.List(graphene.NonNull(TaskInput), required=True)
+
+    tasks = graphene.List(TaskType)
+
+    @offload
+    def mutate(self, info, project_id, tasks):
+        # Get current organization from middleware
+        organization = get_current_organization()
+        if not organization:
+            raise GraphQLError("Organization not specified. Please select an organization.")
+
+        check_bulk_size(tasks)
+
+        # Validate project belongs to current organization
+        try:
+            project = Project.objects.get(id=project_id, organization=organization)
+        except Project.DoesNotExist:
+            raise GraphQLError("Project not found in your organization")
+
+        next_order = Task.next_order(project)
+        new_tasks = [
+            Task(
+                project=project,
+                title=item.title,
+                description=item.description or '',
+                status=item.status or 'todo',
+                priority=item.priority or 'medium',
+                due_date=item.due_date,
+                order=item.order if item.order is not None else next_order + index * Task.ORDER_GAP
+            )
+            for index, item in enumerate(tasks)
+        ]
+
+        with transaction.atomic():
+            # bulk_create() sends no signals, so the counters are applied here
+            Task.objects.bulk_create(new_tasks)
+            project.adjust_task_counters(added=[task.status for task in new_tasks])
+            invalidate_queries(organization.id, project.id)
+
+        # One coalesced broadcast for the whole batch
+        broadcast_tasks_event('tasks_create', new_tasks, str(project.id))
+
+        return BulkCreateTasks(tasks=new_tasks)
+
+
+def lock_organization_tasks(organization, task_ids):
+    """Lock the given tasks, requiring every one to belong to the organization"""
+    tasks = list(
+        Task.objects.select_related('project')
+        .select_for_update(of=('self',))
+        .filter(id__in=task_ids, project__organization=organization)
+    )
+    if len(tasks) != len(task_ids):
+        raise GraphQLError("Task not found in your organization")
+    return tasks
+
+
+def apply_task_updates(tasks, updates):
+    """
+    Apply TaskUpdateInput values to tasks in memory, bumping their versions.
+
+    Returns the fields to write and, per project, the (added, removed)
+    statuses for the project counters.
+    """
+    now = timezone.now()
+    changed_fields = {'version', 'updated_at'}
+    status_changes = defaultdict(lambda: ([], []))
+
+    for task in tasks:
+        previous_status = task.status
+        for key, value in updates[task.id].items():
+            if key != 'id' and value is not None:
+                setattr(task, key, value)
+                changed_fields.add(key)
+        task.version += 1
+        task.updated_at = now
+
+        if task.status != previous_status:
+            added, removed = status_changes[task.project_id]
+            added.append(task.status)
+            removed.append(previous_status)
+
+    return sorted(changed_fields), status_changes
+
+
+class BulkUpdateTasks(graphene.Mutation):
+    class Arguments:
+        tasks = graphene.List(graphene.NonNull(TaskUpdateInput), required=True)
+
+    tasks = graphene.List(TaskType)
+
+    @offload
+    def mutate(self, info, tasks):
+        # Get current organization from middleware
+        organization = get_current_organization()
+        if not organization:
+            raise GraphQLError("Organization not specified. Please select an organization.")
+
+        check_bulk_size(tasks)
+        updates = {item.id: item for item in tasks}
+
+        with transaction.atomic():
+            # Validate every task belongs to current organization in one query
+            existing = lock_organization_tasks(organization, updates)
+            changed_fields, status_changes = apply_task_updates(existing, updates)
+            projects = {task.project_id: task.project for task in existing}
+
+            # bulk_update() sends no signals, so the counters are applied here
+            Task.objects.bulk_update(existing, changed_fields)
+
+            for project_id, (added, removed) in status_changes.items():
+                projects[project_id].adjust_task_counters(added=added, removed=removed)
+            for project_id in projects:
+                invalidate_queries(organization.id, project_id)
+
+        # One coalesced broadcast per affected project
+        by_project = defaultdict(list)
+        for task in existing:
+            by_project[task.project_id].append(task)
+        for project_id, project_tasks in by_project.items():
+            broadcast_tasks_event('tasks_update', project_tasks, str(project_id))
+
+        return BulkUpdateTasks(tasks=existing)
+
+
+class ReorderTasks(graphene.Mutation):
+    class Arguments:
+        project_id = graphene.UUID(required=True)
+        task_ids = graphene.List(graphene.NonNull(graphene.UUID), required=True)
+
+    tasks = graphene.List(TaskType)
+
+    @offload
+    def mutate(self, info, project_id, task_ids):
+        # Get current organization from middleware
+        organization = get_current_organization()
+        if not organization:
+            raise GraphQLError("Organization not specified. Please select an organization.")
+
+        check_bulk_size(task_ids)
+
+        with transaction.atomic():
+            # Validate all tasks belong to the project in current organization
+            tasks = {
+                task.id: task
+                for task in Task.objects.select_for_update(of=('self',)).filter(
+                    id__in=task_ids,
+                    project_id=project_id,
+                    project__organization=organization
+                )
+            }
+            if len(tasks) != len(set(task_ids)):
+                raise GraphQLError("Task not found in your organization")
+
+            # Task ids are given in their new order, spaced by ORDER_GAP so later
+            # moves fit between neighbours; only rows that moved are written
+            now = timezone.now()
+            moved = []
+            for index, task_id in enumerate(task_ids):
+                task = tasks[task_id]
+                order = index * Task.ORDER_GAP
+                if task.order != order:
+                    task.order = order
+                    task.version += 1
+                    task.updated_at = now
+                    moved.append(task)
+
+            Task.objects.bulk_update(moved, ['order', 'version', 'updated_at'])
+            invalidate_queries(organization.id, project_id)
+
+        broadcast_tasks_event('tasks_update', moved, str(project_id))
+
+        return ReorderTasks(tasks=[tasks[task_id] for task_id in task_ids])
+
+
+class MoveTask(graphene.Mutation):
+    class Arguments:
+        id = graphene.UUID(required=True)
+        before_id = graphene.UUID(description="Task that should precede the moved task")
+        after_id = graphene.UUID(description="Task that should follow the moved task")
+        status = graphene.String()
+
+    task = graphene.Field(TaskType)
+
+    @offload
+    def mutate(self, info, id, before_id=None, after_id=None, status=None):
+        # Get current organization from middleware
+        organization = get_current_organization()
+        if not organization:
+            raise GraphQLError("Organization not specified. Please select an organization.")
+
+        if id in (before_id, after_id):
+            raise GraphQLError("A task cannot be moved relative to itself")
+
+        with transaction.atomic():
+            # Validate task belongs to current organization
+            try:
+                task = (
+                    Task.objects.select_related('project')
+                    .select_for_update(of=('self',))
+                    .get(id=id, project__organization=organization)
+                )
+            except Task.DoesNotExist:
+                raise GraphQLError("Task not found in your organization")
+
+            # Neighbours must be in the same project
+            neighbour_ids = [pk for pk in (before_id, after_id) if pk]
+            neighbours = {
+                neighbour.id: neighbour
+                for neighbour in Task.objects.filter(id__in=neighbour_ids, project_id=task.project_id)
+            }
+            if len(neighbours) != len(neighbour_ids):
+                raise GraphQLError("Task not found in this project")
+
+            before = neighbours.get(before_id)
+            after = neighbours.get(after_id)
+            if before and after and (before.order, before.id) > (after.order, after.id):
+                raise GraphQLError("beforeId must come before afterId")
+
+            snapshot = serialize_task(task)
+            if status is not None:
+                task.status = status
+            moved = task.move(before=before, after=after)
+            invalidate_queries(organization.id, task.project_id)
+
+        # Broadcast the move; a rebalance is sent as one coalesced event
+        if len(moved) == 1:
+            broadcast_task_patch(task, snapshot)
+        else:
+            broadcast_tasks_event('tasks_update', moved, str(task.project_id))
+
+        return MoveTask(task=task)
 
 
 # Comment Mutations
@@ -318,6 +665,7 @@ class CreateComment(graphene.Mutation):
 
     comment = graphene.Field(TaskCommentType)
 
+    @offload
     def mutate(self, info, task_id, author_name, content, author_email=''):
         # Get current organization from middleware
         organization = get_current_organization()
@@ -333,12 +681,14 @@ class CreateComment(graphene.Mutation):
         except Task.DoesNotExist:
             raise GraphQLError(f"Task not found in your organization")
 
-        comment = TaskComment.objects.create(
-            task=task,
-            author_name=author_name,
-            author_email=author_email,
-            content=content
-        )
+        with transaction.atomic():
+            comment = TaskComment.objects.create(
+                task=task,
+                author_name=author_name,
+                author_email=author_email,
+                content=content
+            )
+            invalidate_queries(organization.id, task.project_id)
 
         # Broadcast comment creation via WebSocket
         broadcast_comment_event(comment, task)
@@ -353,6 +703,7 @@ class UpdateComment(graphene.Mutation):
 
     comment = graphene.Field(TaskCommentType)
 
+    @offload
     def mutate(self, info, id, content):
         # Get current organization from middleware
         organization = get_current_organization()
@@ -367,6 +718,7 @@ class UpdateComment(graphene.Mutation):
             )
             comment.content = content
             comment.save()
+            invalidate_queries(organization.id, comment.task.project_id)
             return UpdateComment(comment=comment)
         except TaskComment.DoesNotExist:
             raise GraphQLError(f"Comment not found in your organization")
@@ -378,6 +730,7 @@ class DeleteComment(graphene.Mutation):
 
     success = graphene.Boolean()
 
+    @offload
     def mutate(self, info, id):
         # Get current organization from middleware
         organization = get_current_organization()
@@ -390,7 +743,9 @@ class DeleteComment(graphene.Mutation):
                 id=id,
                 task__project__organization=organization
             )
-            comment.delete()
+            with transaction.atomic():
+                comment.delete()
+                invalidate_queries(organization.id, comment.task.project_id)
             return DeleteComment(success=True)
         except TaskComment.DoesNotExist:
             raise GraphQLError(f"Comment not found in your organization")
@@ -407,6 +762,10 @@ class Mutation(graphene.ObjectType):
     create_task = CreateTask.Field()
     update_task = UpdateTask.Field()
     delete_task = DeleteTask.Field()
+    bulk_create_tasks = BulkCreateTasks.Field()
+    bulk_update_tasks = BulkUpdateTasks.Field()
+    reorder_tasks = ReorderTasks.Field()
+    move_task = MoveTask.Field()
 
     create_comment = CreateComment.Field()
     update_comment = UpdateComment.Field()
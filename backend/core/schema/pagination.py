@@ -0,0 +1,91 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from graphql import GraphQLError
+
+# Keyset orderings; each matches an existing index with id as the tie-breaker
+PROJECT_ORDERING = ('-created_at', '-id')  # (organization, -created_at)
+TASK_ORDERING = ('order', 'id')  # (project, order)
+COMMENT_ORDERING = ('-created_at', '-id')  # (task, -created_at)
+
+# Annotation added by core.search.search_queryset; search results are paged
+# best match first, with the keyset ordering breaking ties between equal ranks
+RANK_FIELD = 'search_rank'
+
+
+def ranked(ordering):
+    return ('-' + RANK_FIELD, *ordering)
+
+
+def encode_cursor(instance, ordering):
+    """Build an opaque cursor from the instance's ordering key values"""
+    if getattr(instance, RANK_FIELD, None) is not None:
+        ordering = ranked(ordering)
+    values = []
+    for field in ordering:
+        value = getattr(instance, field.lstrip('-'))
+        values.append(value.isoformat() if hasattr(value, 'isoformat') else str(value))
+    return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor, model, ordering):
+    """Decode a cursor back into typed ordering key values"""
+    try:
+        values = json.loads(urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise ValueError(cursor)
+        return [
+            float(value) if field.lstrip('-') == RANK_FIELD
+            else model._meta.get_field(field.lstrip('-')).to_python(value)
+            for field, value in zip(ordering, values)
+        ]
+    except (BinasciiError, ValueError, TypeError, ValidationError):
+        raise GraphQLError("Invalid cursor")
+
+
+def keyset_predicate(ordering, values):
+    """
+    Build the "comes after" predicate for a lexicographic ordering, e.g.
+    (created_at < c) OR (created_at = c AND id < i) for ('-created_at', '-id').
+    """
+    predicate = Q()
+    equal = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        predicate |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return predicate
+
+
+def paginate(queryset, ordering, first=None, after=None, limit=None, offset=None):
+    """
+    Apply keyset pagination (first/after) or legacy offset/limit slicing.
+
+    Keyset pages cost the same regardless of depth, whereas offset scans and
+    discards every skipped row. Search results keep their relevance order,
+    with the rank as the leading cursor key.
+    """
+    if first is None and after is None:
+        if offset:
+            queryset = queryset[offset:]
+        if limit:
+            queryset = queryset[:limit]
+        return queryset
+
+    if limit is not None or offset is not None:
+        raise GraphQLError("Use either first/after or limit/offset pagination, not both")
+
+    if RANK_FIELD in queryset.query.annotations:
+        ordering = ranked(ordering)
+    queryset = queryset.order_by(*ordering)
+    if after:
+        values = decode_cursor(after, queryset.model, ordering)
+        queryset = queryset.filter(keyset_predicate(ordering, values))
+    if first is not None:
+        if first < 0:
+            raise GraphQLError("first must be a non-negative integer")
+        queryset = queryset[:first]
+    return queryset
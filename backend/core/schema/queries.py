@@ -1,9 +1,18 @@
 import graphene
 from graphql import GraphQLError
-from django.db.models import Q
-from core.schema.types import OrganizationType, ProjectType, TaskType, TaskCommentType
+from core.schema.types import (
+    OrganizationType,
+    ProjectType,
+    SearchHitType,
+    TaskCommentType,
+    TaskType,
+)
 from core.models import Organization, Project, Task, TaskComment
 from core.middleware.tenant import get_current_organization
+from core.cache.query_results import cached_query
+from core.schema.execution import coalesce, offload
+from core.schema.pagination import COMMENT_ORDERING, PROJECT_ORDERING, TASK_ORDERING, paginate
+from core.search import search_queryset
 
 
 class Query(graphene.ObjectType):
@@ -17,7 +26,9 @@ class Query(graphene.ObjectType):
         status=graphene.String(),
         search=graphene.String(),
         limit=graphene.Int(),
-        offset=graphene.Int()
+        offset=graphene.Int(),
+        first=graphene.Int(),
+        after=graphene.String()
     )
     project = graphene.Field(ProjectType, id=graphene.UUID(required=True))
 
@@ -29,7 +40,9 @@ class Query(graphene.ObjectType):
         priority=graphene.String(),
         search=graphene.String(),
         limit=graphene.Int(),
-        offset=graphene.Int()
+        offset=graphene.Int(),
+        first=graphene.Int(),
+        after=graphene.String()
     )
     task = graphene.Field(TaskType, id=graphene.UUID(required=True))
 
@@ -38,19 +51,33 @@ class Query(graphene.ObjectType):
         TaskCommentType,
         task_id=graphene.UUID(required=True),
         limit=graphene.Int(),
-        offset=graphene.Int()
+        offset=graphene.Int(),
+        first=graphene.Int(),
+        after=graphene.String()
     )
 
+    # Full-text search across projects, tasks and comments
+    search = graphene.List(
+        SearchHitType,
+        query=graphene.String(required=True),
+        limit=graphene.Int(default_value=20)
+    )
+
+    @offload
     def resolve_organizations(self, info):
         return Organization.objects.all()
 
+    @offload
     def resolve_organization(self, info, slug):
         try:
             return Organization.objects.get(slug=slug)
         except Organization.DoesNotExist:
             raise GraphQLError(f"Organization with slug '{slug}' not found")
 
-    def resolve_projects(self, info, status=None, search=None, limit=None, offset=None):
+    @offload
+    @cached_query()
+    def resolve_projects(self, info, status=None, search=None, limit=None, offset=None,
+                         first=None, after=None):
         # Get current organization from middleware
         organization = get_current_organization()
         if not organization:
@@ -63,18 +90,13 @@ class Query(graphene.ObjectType):
             queryset = queryset.filter(status=status)
 
         if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) | Q(description__icontains=search)
-            )
+            queryset = search_queryset(queryset, search)
 
-        if offset:
-            queryset = queryset[offset:]
-
-        if limit:
-            queryset = queryset[:limit]
-
-        return queryset
+        return paginate(queryset, PROJECT_ORDERING, first, after, limit, offset)
 
+    @coalesce
+    @offload
+    @cached_query(project_arg='id')
     def resolve_project(self, info, id):
         # Get current organization from middleware
         organization = get_current_organization()
@@ -86,8 +108,11 @@ class Query(graphene.ObjectType):
         except Project.DoesNotExist:
             raise GraphQLError(f"Project not found in your organization")
 
+    @coalesce
+    @offload
+    @cached_query(project_arg='project_id')
     def resolve_tasks(self, info, project_id=None, status=None, priority=None,
-                      search=None, limit=None, offset=None):
+                      search=None, limit=None, offset=None, first=None, after=None):
         # Get current organization from middleware
         organization = get_current_organization()
         if not organization:
@@ -108,18 +133,11 @@ class Query(graphene.ObjectType):
             queryset = queryset.filter(priority=priority)
 
         if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) | Q(description__icontains=search)
-            )
+            queryset = search_queryset(queryset, search)
 
-        if offset:
-            queryset = queryset[offset:]
-
-        if limit:
-            queryset = queryset[:limit]
-
-        return queryset
+        return paginate(queryset, TASK_ORDERING, first, after, limit, offset)
 
+    @offload
     def resolve_task(self, info, id):
         # Get current organization from middleware
         organization = get_current_organization()
@@ -134,7 +152,10 @@ class Query(graphene.ObjectType):
         except Task.DoesNotExist:
             raise GraphQLError(f"Task not found in your organization")
 
-    def resolve_task_comments(self, info, task_id, limit=None, offset=None):
+    @offload
+    @cached_query()
+    def resolve_task_comments(self, info, task_id, limit=None, offset=None,
+                              first=None, after=None):
         # Get current organization from middleware
         organization = get_current_organization()
         if not organization:
@@ -151,10 +172,29 @@ class Query(graphene.ObjectType):
 
         queryset = TaskComment.objects.filter(task_id=task_id)
 
-        if offset:
-            queryset = queryset[offset:]
+        return paginate(queryset, COMMENT_ORDERING, first, after, limit, offset)
 
-        if limit:
-            queryset = queryset[:limit]
+    @offload
+    def resolve_search(self, info, query, limit=20):
+        # Get current organization from middleware
+        organization = get_current_organization()
+        if not organization:
+            raise GraphQLError("Organization not specified. Please select an organization.")
 
-        return queryset
+        limit = max(0, min(limit, 100))
+        querysets = [
+            Project.objects.filter(organization=organization),
+            Task.objects.select_related('project').filter(project__organization=organization),
+            TaskComment.objects.select_related('task').filter(
+                task__project__organization=organization
+            ),
+        ]
+
+        # Each model is searched through its own GIN index, then hits are merged by rank
+        hits = [
+            SearchHitType(rank=item.search_rank, item=item)
+            for queryset in querysets
+            for item in search_queryset(queryset, query)[:limit]
+        ]
+        hits.sort(key=lambda hit: hit.rank, reverse=True)
+        return hits[:limit]
@@ -1,30 +1,142 @@
+import asyncio
 import graphene
+from channels.db import database_sync_to_async
+from graphql import GraphQLError
+from core.broadcast import deserialize_comment, deserialize_task, expand_event, serialize_task
+from core.cache.lru import LRUCache
+from core.models import Project, Task
 from core.schema.types import TaskType, TaskCommentType
 
 
+@database_sync_to_async
+def get_project_group(organization, project_id):
+    """Return the channel layer group for a project in the organization"""
+    if not Project.objects.filter(id=project_id, organization=organization).exists():
+        raise GraphQLError("Project not found in your organization")
+    return f'project_{project_id}'
+
+
+@database_sync_to_async
+def get_task_group(organization, task_id):
+    """Return the channel layer group for the project a task in the organization belongs to"""
+    project_id = (
+        Task.objects.filter(id=task_id, project__organization=organization)
+        .values_list('project_id', flat=True)
+        .first()
+    )
+    if project_id is None:
+        raise GraphQLError("Task not found in your organization")
+    return f'project_{project_id}'
+
+
+# Rows read for task_patch events, keyed by task id and version. Every
+# subscription receiving the same patch shares one read, and each builds its
+# own Task from the serialized row
+_patched_rows = LRUCache(max_entries=1024)
+_pending_rows = {}
+
+
+@database_sync_to_async
+def get_task_row(task_id):
+    task = Task.objects.filter(id=task_id).first()
+    return serialize_task(task) if task is not None else None
+
+
+async def get_patched_task(event, project_id):
+    """Return the full task a patch event applies to, or None if it is gone"""
+    key = (event['task_id'], event['version'])
+    row = _patched_rows.get(key)
+    if row is None:
+        pending = _pending_rows.get(key)
+        if pending is None:
+            pending = _pending_rows[key] = asyncio.ensure_future(get_task_row(event['task_id']))
+            pending.add_done_callback(lambda _: _pending_rows.pop(key, None))
+        # Shielded so a subscriber going away does not cancel the read for the rest
+        row = await asyncio.shield(pending)
+        if row is None:
+            return None
+        _patched_rows.set(key, row)
+    return deserialize_task(row, project_id)
+
+
+async def task_events(info, group, project_id, single_type, bulk_type, patch_type=None):
+    """Yield Task instances for matching channel layer events of a project"""
+    async for event in info.context.listen(group):
+        event = expand_event(event)
+        if event['type'] == single_type:
+            tasks = [deserialize_task(event['task'], project_id)]
+        elif event['type'] == bulk_type:
+            tasks = [deserialize_task(task, project_id) for task in event['tasks']]
+        elif event['type'] == patch_type:
+            # Patches only carry changed fields, so read the full row
+            task = await get_patched_task(event, project_id)
+            tasks = [task] if task is not None else []
+        else:
+            continue
+
+        for task in tasks:
+            yield task
+
+
+async def deleted_task_ids(info, group):
+    """Yield the ids of tasks deleted from a project"""
+    async for event in info.context.listen(group):
+        if event['type'] == 'task_delete':
+            yield event['task_id']
+
+
+async def created_comments(info, group, task_id):
+    """Yield TaskComment instances created on a task"""
+    async for event in info.context.listen(group):
+        if event['type'] != 'comment_create':
+            continue
+        event = expand_event(event)
+        if event['comment']['taskId'] == str(task_id):
+            yield deserialize_comment(event['comment'])
+
+
 class TaskSubscription(graphene.ObjectType):
-    task_updated = graphene.Field(TaskType, project_id=graphene.UUID())
-    task_created = graphene.Field(TaskType, project_id=graphene.UUID())
-    task_deleted = graphene.Field(graphene.UUID, project_id=graphene.UUID())
+    task_updated = graphene.Field(TaskType, project_id=graphene.UUID(required=True))
+    task_created = graphene.Field(TaskType, project_id=graphene.UUID(required=True))
+    task_deleted = graphene.Field(graphene.UUID, project_id=graphene.UUID(required=True))
+
+    # Subscribe functions validate tenancy before returning the event stream,
+    # so a foreign project fails the subscription up front
+
+    async def subscribe_task_updated(root, info, project_id):
+        group = await get_project_group(info.context.organization, project_id)
+        return task_events(info, group, project_id, 'task_update', 'tasks_update', 'task_patch')
+
+    async def subscribe_task_created(root, info, project_id):
+        group = await get_project_group(info.context.organization, project_id)
+        return task_events(info, group, project_id, 'task_create', 'tasks_create')
+
+    async def subscribe_task_deleted(root, info, project_id):
+        group = await get_project_group(info.context.organization, project_id)
+        return deleted_task_ids(info, group)
 
     def resolve_task_updated(root, info, project_id=None):
-        # This will be triggered when a task is updated via WebSocket
+        # Root is the Task yielded by subscribe_task_updated
         return root
 
     def resolve_task_created(root, info, project_id=None):
-        # This will be triggered when a task is created via WebSocket
+        # Root is the Task yielded by subscribe_task_created
         return root
 
     def resolve_task_deleted(root, info, project_id=None):
-        # This will be triggered when a task is deleted via WebSocket
+        # Root is the id yielded by subscribe_task_deleted
         return root
 
 
 class CommentSubscription(graphene.ObjectType):
-    comment_created = graphene.Field(TaskCommentType, task_id=graphene.UUID())
+    comment_created = graphene.Field(TaskCommentType, task_id=graphene.UUID(required=True))
+
+    async def subscribe_comment_created(root, info, task_id):
+        group = await get_task_group(info.context.organization, task_id)
+        return created_comments(info, group, task_id)
 
     def resolve_comment_created(root, info, task_id=None):
-        # This will be triggered when a comment is created via WebSocket
+        # Root is the TaskComment yielded by subscribe_comment_created
         return root
 
 
@@ -1,12 +1,20 @@
 import graphene
 from graphene_django import DjangoObjectType
 from core.models import Organization, Project, Task, TaskComment
+from core.schema.loaders import get_loaders, load_related
+from core.schema.pagination import (
+    COMMENT_ORDERING,
+    PROJECT_ORDERING,
+    TASK_ORDERING,
+    encode_cursor,
+)
 
 
 class TaskStatsType(graphene.ObjectType):
     total = graphene.Int()
     todo = graphene.Int()
     in_progress = graphene.Int()
+    review = graphene.Int()
     completed = graphene.Int()
     completion_rate = graphene.Float()
 
@@ -16,31 +24,68 @@ class OrganizationType(DjangoObjectType):
         model = Organization
         fields = '__all__'
 
+    def resolve_projects(self, info):
+        return get_loaders(info).projects_by_organization.load(self.id)
+
 
 class ProjectType(DjangoObjectType):
     task_stats = graphene.Field(TaskStatsType)
+    cursor = graphene.String(description='Opaque cursor for the projects(after:) argument')
 
     class Meta:
         model = Project
-        fields = '__all__'
+        exclude = ['search_vector']
 
     def resolve_task_stats(self, info):
-        stats = self.task_stats
-        return TaskStatsType(**stats)
+        return TaskStatsType(**self.task_stats)
+
+    def resolve_cursor(self, info):
+        return encode_cursor(self, PROJECT_ORDERING)
+
+    def resolve_organization(self, info):
+        return load_related(info, self, 'organization', get_loaders(info).organization)
+
+    def resolve_tasks(self, info):
+        return get_loaders(info).tasks_by_project.load(self.id)
 
 
 class TaskType(DjangoObjectType):
     comment_count = graphene.Int()
+    cursor = graphene.String(description='Opaque cursor for the tasks(after:) argument')
 
     class Meta:
         model = Task
-        fields = '__all__'
+        exclude = ['search_vector']
+
+    def resolve_cursor(self, info):
+        return encode_cursor(self, TASK_ORDERING)
 
-    def resolve_comment_count(self, info):
-        return self.comments.count()
+    def resolve_project(self, info):
+        return load_related(info, self, 'project', get_loaders(info).project)
+
+    def resolve_comments(self, info):
+        return get_loaders(info).comments_by_task.load(self.id)
 
 
 class TaskCommentType(DjangoObjectType):
+    cursor = graphene.String(description='Opaque cursor for the taskComments(after:) argument')
+
     class Meta:
         model = TaskComment
-        fields = '__all__'
+        exclude = ['search_vector']
+
+    def resolve_cursor(self, info):
+        return encode_cursor(self, COMMENT_ORDERING)
+
+    def resolve_task(self, info):
+        return load_related(info, self, 'task', get_loaders(info).task)
+
+
+class SearchResult(graphene.Union):
+    class Meta:
+        types = (ProjectType, TaskType, TaskCommentType)
+
+
+class SearchHitType(graphene.ObjectType):
+    rank = graphene.Float()
+    item = graphene.Field(SearchResult)
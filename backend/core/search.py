@@ -0,0 +1,39 @@
+import re
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+SEARCH_CONFIG = 'english'
+
+
+def build_search_query(text):
+    """
+    Build a prefix-matching tsquery from free text, e.g. "des rev" becomes
+    'des:* & rev:*', so partial words keep matching as they did with icontains.
+    Returns None when the text contains no searchable words.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    return SearchQuery(
+        ' & '.join(f'{word}:*' for word in words),
+        search_type='raw',
+        config=SEARCH_CONFIG,
+    )
+
+
+def search_queryset(queryset, text):
+    """
+    Filter a queryset on its GIN-indexed search_vector column and annotate a
+    search_rank, ordered best match first. The rank is widened from real to
+    double precision so it round-trips exactly through pagination cursors.
+    """
+    query = build_search_query(text)
+    if query is None:
+        return queryset.none()
+
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(search_rank=Cast(SearchRank(F('search_vector'), query), FloatField()))
+        .order_by('-search_rank', '-created_at')
+    )
@@ -0,0 +1,102 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from core.cache.organizations import invalidate_organization
+from core.models import Organization, Project, Task, TaskComment
+
+
+@receiver(pre_save, sender=Organization)
+def invalidate_previous_organization_slug(sender, instance, **kwargs):
+    """Drop the cached entry for the old slug when a slug is renamed"""
+    if instance._state.adding:
+        return
+
+    previous_slug = (
+        Organization.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+    )
+    if previous_slug and previous_slug != instance.slug:
+        invalidate_organization(previous_slug)
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def invalidate_cached_organization(sender, instance, **kwargs):
+    """Drop the cached tenant on save (including is_active toggles) and delete"""
+    invalidate_organization(instance.slug)
+
+
+def deleted_with(origin, model):
+    """Whether a delete started from an instance or queryset of model (and cascaded)"""
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+    return isinstance(origin, model)
+
+
+def adjust_project_counters(task, added=(), removed=()):
+    """Update the counters of a task's project, refreshing the project if loaded"""
+    if Task.project.is_cached(task):
+        task.project.adjust_task_counters(added=added, removed=removed)
+    else:
+        Project.update_task_counters(task.project_id, added=added, removed=removed)
+
+
+def adjust_task_comment_count(comment, delta):
+    """Update the comment count of a comment's task, refreshing the task if loaded"""
+    if TaskComment.task.is_cached(comment):
+        comment.task.adjust_comment_count(delta)
+    else:
+        Task.update_comment_count(comment.task_id, delta)
+
+
+@receiver(pre_save, sender=Task)
+def remember_counted_task(sender, instance, **kwargs):
+    """Find the stored project and status of tasks not loaded through the ORM"""
+    if not instance._state.adding and not hasattr(instance, '_counted'):
+        instance._counted = (
+            Task.objects.filter(pk=instance.pk).values_list('project_id', 'status').first()
+        )
+
+
+@receiver(post_save, sender=Task)
+def count_saved_task(sender, instance, created, **kwargs):
+    """Keep the project task counters in step with tasks saved through the ORM"""
+    counted = None if created else getattr(instance, '_counted', None)
+    instance._counted = (instance.project_id, instance.status)
+    if counted is None:
+        adjust_project_counters(instance, added=[instance.status])
+        return
+
+    counted_project_id, counted_status = counted
+    if counted_project_id != instance.project_id:
+        Project.update_task_counters(counted_project_id, removed=[counted_status])
+        adjust_project_counters(instance, added=[instance.status])
+    elif counted_status != instance.status:
+        adjust_project_counters(instance, added=[instance.status], removed=[counted_status])
+
+
+@receiver(post_delete, sender=Task)
+def uncount_deleted_task(sender, instance, origin=None, **kwargs):
+    """Decrement the project counters, unless the project itself is being deleted"""
+    if deleted_with(origin, Project) or deleted_with(origin, Organization):
+        return
+    counted_project_id, counted_status = getattr(
+        instance, '_counted', (instance.project_id, instance.status)
+    )
+    if counted_project_id == instance.project_id:
+        adjust_project_counters(instance, removed=[counted_status])
+    else:
+        Project.update_task_counters(counted_project_id, removed=[counted_status])
+
+
+@receiver(post_save, sender=TaskComment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    if created:
+        adjust_task_comment_count(instance, 1)
+
+
+@receiver(post_delete, sender=TaskComment)
+def uncount_deleted_comment(sender, instance, origin=None, **kwargs):
+    """Decrement the task comment count, unless the task itself is being deleted"""
+    if any(deleted_with(origin, model) for model in (Task, Project, Organization)):
+        return
+    adjust_task_comment_count(instance, -1)
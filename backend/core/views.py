@@ -0,0 +1,219 @@
+import json
+from inspect import isawaitable
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.views import GraphQLView, HttpError
+from graphql import ExecutionResult, GraphQLError, OperationType, execute, get_operation_ast
+from graphql.type import validate_schema
+from core.schema.documents import get_document, resolve_persisted_query
+
+
+class AsyncGraphQLView(GraphQLView):
+    """
+    GraphQL view that runs operations with graphql-core's async executor.
+
+    Root Query and Mutation resolvers offload their ORM work to worker threads
+    (see core.schema.execution.offload) and loaders batch nested fields, so
+    independent root fields run concurrently and an ASGI worker is not tied up
+    for the duration of each request.
+
+    Clients may send automatic persisted queries (a sha256 hash in
+    extensions.persistedQuery instead of the query text), and parsed and
+    validated documents are cached by hash (see core.schema.documents).
+    """
+
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            if request.method.lower() not in ('get', 'post'):
+                raise HttpError(
+                    HttpResponseNotAllowed(
+                        ['GET', 'POST'], 'GraphQL only supports GET and POST requests.'
+                    )
+                )
+
+            data = self.parse_body(request)
+            show_graphiql = self.graphiql and self.can_display_graphiql(request, data)
+
+            if show_graphiql:
+                return self.render_graphiql(
+                    request,
+                    graphiql_version=self.graphiql_version,
+                    graphiql_sri=self.graphiql_sri,
+                    graphiql_css_sri=self.graphiql_css_sri,
+                    react_version=self.react_version,
+                    react_sri=self.react_sri,
+                    react_dom_sri=self.react_dom_sri,
+                    whatwg_fetch_version=self.whatwg_fetch_version,
+                    whatwg_fetch_sri=self.whatwg_fetch_sri,
+                    subscriptions_transport_ws_version=self.subscriptions_transport_ws_version,
+                    subscriptions_transport_ws_sri=self.subscriptions_transport_ws_sri,
+                    graphiql_plugin_explorer_version=self.graphiql_plugin_explorer_version,
+                    graphiql_plugin_explorer_sri=self.graphiql_plugin_explorer_sri,
+                    graphiql_plugin_explorer_css_sri=self.graphiql_plugin_explorer_css_sri,
+                    subscription_path=self.subscription_path,
+                    graphiql_header_editor_enabled=graphene_settings.GRAPHIQL_HEADER_EDITOR_ENABLED,
+                    graphiql_should_persist_headers=graphene_settings.GRAPHIQL_SHOULD_PERSIST_HEADERS,
+                    graphiql_input_value_deprecation=graphene_settings.GRAPHIQL_INPUT_VALUE_DEPRECATION,
+                )
+
+            if self.batch:
+                responses = [await self.get_async_response(request, entry) for entry in data]
+                result = '[{}]'.format(','.join([response[0] for response in responses]))
+                status_code = max((response[1] for response in responses), default=200)
+            else:
+                result, status_code = await self.get_async_response(request, data, show_graphiql)
+
+            return HttpResponse(status=status_code, content=result, content_type='application/json')
+
+        except HttpError as e:
+            response = e.response
+            response['Content-Type'] = 'application/json'
+            response.content = self.json_encode(request, {'errors': [self.format_error(e)]})
+            return response
+
+    async def get_async_response(self, request, data, show_graphiql=False):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+        try:
+            query = resolve_persisted_query(query, self.get_extensions(request, data))
+        except GraphQLError as error:
+            execution_result = ExecutionResult(errors=[error])
+        else:
+            # Parsing and validation are synchronous; execute() returns an
+            # awaitable as soon as any resolver is async
+            execution_result = self.execute_graphql_request(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+        if isawaitable(execution_result):
+            execution_result = await execution_result
+
+        if not execution_result:
+            return None, 200
+
+        status_code = 200
+        response = {}
+
+        if execution_result.errors:
+            response['errors'] = [self.format_error(e) for e in execution_result.errors]
+
+        if execution_result.errors and any(
+            not getattr(e, 'path', None) for e in execution_result.errors
+        ):
+            status_code = 400
+        else:
+            response['data'] = execution_result.data
+
+        if self.batch:
+            response['id'] = id
+            response['status'] = status_code
+
+        return self.json_encode(request, response, pretty=show_graphiql), status_code
+
+    @staticmethod
+    def get_extensions(request, data):
+        extensions = request.GET.get('extensions') or data.get('extensions')
+        if extensions and isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest('Extensions are invalid JSON.'))
+        return extensions if isinstance(extensions, dict) else None
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        # Same as GraphQLView, except that parsing and validation go through
+        # the document cache
+        if not query:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest('Must provide query string.'))
+
+        schema = self.schema.graphql_schema
+
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return ExecutionResult(data=None, errors=schema_validation_errors)
+
+        document, errors = get_document(
+            schema, query, self.validation_rules, graphene_settings.MAX_VALIDATION_ERRORS
+        )
+        if document is None:
+            return ExecutionResult(errors=errors)
+
+        operation_ast = get_operation_ast(document, operation_name)
+        if not self.allows_operation(request, operation_ast, show_graphiql):
+            return None
+
+        if errors:
+            return ExecutionResult(data=None, errors=errors)
+
+        try:
+            return self.execute_document(
+                request, schema, document, operation_ast, variables, operation_name
+            )
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+    @staticmethod
+    def allows_operation(request, operation_ast, show_graphiql=False):
+        """
+        Return whether the operation may run for the request method. GET only
+        runs queries; anything else renders nothing when showing GraphiQL and
+        is rejected with 405 otherwise.
+        """
+        if (
+            request.method.lower() != 'get'
+            or operation_ast is None
+            or operation_ast.operation == OperationType.QUERY
+        ):
+            return True
+
+        if show_graphiql:
+            return False
+
+        raise HttpError(
+            HttpResponseNotAllowed(
+                ['POST'],
+                'Can only perform a {} operation from a POST request.'.format(
+                    operation_ast.operation.value
+                ),
+            )
+        )
+
+    def execute_document(self, request, schema, document, operation_ast, variables, operation_name):
+        """Execute a validated document, wrapping mutations in a transaction if configured"""
+        execute_options = {
+            'root_value': self.get_root_value(request),
+            'context_value': self.get_context(request),
+            'variable_values': variables,
+            'operation_name': operation_name,
+            'middleware': self.get_middleware(request),
+        }
+        if self.execution_context_class:
+            execute_options['execution_context_class'] = self.execution_context_class
+
+        if operation_ast is None or operation_ast.operation != OperationType.MUTATION or not (
+            graphene_settings.ATOMIC_MUTATIONS is True
+            or connection.settings_dict.get('ATOMIC_MUTATIONS', False) is True
+        ):
+            return execute(schema, document, **execute_options)
+
+        # A transaction cannot span the worker threads resolvers offload to,
+        # so atomic mutations execute in one thread, where offload and the
+        # loaders call through inline
+        return sync_to_async(self.execute_atomic)(request, schema, document, execute_options)
+
+    @staticmethod
+    def execute_atomic(request, schema, document, execute_options):
+        """Execute a mutation synchronously in a transaction"""
+        with transaction.atomic():
+            result = execute(schema, document, **execute_options)
+            if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                transaction.set_rollback(True)
+        return result
@@ -1,6 +1,10 @@
 from django.urls import re_path
+from core.consumers.graphql_consumer import GraphQLConsumer
+from core.consumers.organization_consumer import OrganizationConsumer
 from core.consumers.task_consumer import TaskConsumer
 
 websocket_urlpatterns = [
     re_path(r'ws/projects/(?P<project_id>[0-9a-f-]+)/$', TaskConsumer.as_asgi()),
+    re_path(r'ws/org/$', OrganizationConsumer.as_asgi()),
+    re_path(r'graphql/$', GraphQLConsumer.as_asgi()),
 ]
@@ -15,6 +15,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'graphene_django',
     'django_filters',
     'corsheaders',
@@ -66,15 +67,91 @@ DATABASES = {
     }
 }
 
+REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/0')
+
+# Channel layer used for WebSocket fan-out. CHANNEL_LAYER selects:
+#   pubsub - one Redis PUBLISH per group message; each process fans it out to
+#            its own consumers in memory (channels_redis.pubsub)
+#   redis  - one Redis list push per group member (channels_redis.core)
+#   memory - process-local fan-out for single-node setups and tests
+CHANNEL_LAYER = config('CHANNEL_LAYER', default='pubsub')
 CHANNEL_LAYERS = {
     'default': {
-        'BACKEND': 'channels_redis.core.RedisChannelLayer',
-        'CONFIG': {
-            'hosts': [config('REDIS_URL', default='redis://localhost:6379/0')],
+        'pubsub': {
+            'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+            'CONFIG': {'hosts': [REDIS_URL]},
+        },
+        'redis': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [REDIS_URL]},
         },
+        'memory': {
+            'BACKEND': 'core.channel_layers.FanoutChannelLayer',
+        },
+    }[CHANNEL_LAYER],
+}
+
+# Replay buffer that gives WebSocket events per-group sequence ids so
+# reconnecting clients can resume (core.event_log)
+EVENT_LOG = {
+    'BACKEND': 'core.event_log.RedisEventLog',
+    'OPTIONS': {
+        'url': REDIS_URL,
+        'max_events': config('EVENT_LOG_MAX_EVENTS', default=1000, cast=int),
     },
 }
 
+# Tenant (organization slug) cache used by core.middleware.tenant.TenantMiddleware.
+# Set TENANT_CACHE_ALIAS to a Django cache alias to share entries between workers;
+# the in-process cache is then bypassed so invalidations apply cluster-wide at once.
+TENANT_CACHE_TTL = config('TENANT_CACHE_TTL', default=60, cast=int)
+TENANT_CACHE_MAX_ENTRIES = config('TENANT_CACHE_MAX_ENTRIES', default=1024, cast=int)
+TENANT_CACHE_ALIAS = config('TENANT_CACHE_ALIAS', default='') or None
+
+# Project -> organization cache used to authorize WebSocket connections
+# (core.cache.projects)
+PROJECT_CACHE_TTL = config('PROJECT_CACHE_TTL', default=300, cast=int)
+PROJECT_CACHE_MAX_ENTRIES = config('PROJECT_CACHE_MAX_ENTRIES', default=4096, cast=int)
+
+# Versioned cache for read-only root resolvers (core.cache.query_results).
+# Mutations bump per-organization and per-project versions; QUERY_CACHE_TTL=0
+# disables it. Set QUERY_CACHE_ALIAS to share entries between workers.
+QUERY_CACHE_TTL = config('QUERY_CACHE_TTL', default=30, cast=int)
+QUERY_CACHE_MAX_ENTRIES = config('QUERY_CACHE_MAX_ENTRIES', default=2048, cast=int)
+QUERY_CACHE_ALIAS = config('QUERY_CACHE_ALIAS', default='') or None
+
+# Parsed document cache and automatic persisted queries (core.schema.documents).
+# PERSISTED_QUERIES_MANIFEST points at a JSON file of pre-registered
+# {sha256: query} documents; set PERSISTED_QUERIES_AUTO_REGISTER=False to
+# accept only those. PERSISTED_QUERY_CACHE_ALIAS shares registrations between
+# workers for PERSISTED_QUERY_TTL seconds; documents longer than
+# PERSISTED_QUERY_MAX_LENGTH characters are never registered.
+GRAPHQL_DOCUMENT_CACHE_SIZE = config('GRAPHQL_DOCUMENT_CACHE_SIZE', default=512, cast=int)
+PERSISTED_QUERIES_MANIFEST = config('PERSISTED_QUERIES_MANIFEST', default='') or None
+PERSISTED_QUERIES_AUTO_REGISTER = config('PERSISTED_QUERIES_AUTO_REGISTER', default=True, cast=bool)
+PERSISTED_QUERY_MAX_ENTRIES = config('PERSISTED_QUERY_MAX_ENTRIES', default=4096, cast=int)
+PERSISTED_QUERY_CACHE_ALIAS = config('PERSISTED_QUERY_CACHE_ALIAS', default='') or None
+PERSISTED_QUERY_TTL = config('PERSISTED_QUERY_TTL', default=86400, cast=int)
+PERSISTED_QUERY_MAX_LENGTH = config('PERSISTED_QUERY_MAX_LENGTH', default=20000, cast=int)
+
+# Background WebSocket broadcaster used by core.broadcast. Messages beyond
+# BROADCAST_QUEUE_SIZE are dropped rather than delaying mutations.
+BROADCAST_QUEUE_SIZE = config('BROADCAST_QUEUE_SIZE', default=1000, cast=int)
+BROADCAST_BATCH_SIZE = config('BROADCAST_BATCH_SIZE', default=100, cast=int)
+BROADCAST_SEND_TIMEOUT = config('BROADCAST_SEND_TIMEOUT', default=5.0, cast=float)
+
+# Window in seconds that TaskConsumer merges events over for clients that
+# subscribe with batching enabled
+WEBSOCKET_BATCH_WINDOW = config('WEBSOCKET_BATCH_WINDOW', default=0.05, cast=float)
+
+# Per-connection outbound buffer of TaskConsumer; see OUTBOUND_POLICIES in
+# core.consumers.task_consumer for what happens when a slow client fills it
+WEBSOCKET_OUTBOUND_LIMIT = config('WEBSOCKET_OUTBOUND_LIMIT', default=256, cast=int)
+WEBSOCKET_OUTBOUND_POLICY = config('WEBSOCKET_OUTBOUND_POLICY', default='coalesce')
+
+# Seconds a WebSocket event arriving ahead of a lower seq id is held back for the missing one
+WEBSOCKET_REORDER_WINDOW = config('WEBSOCKET_REORDER_WINDOW', default=0.1, cast=float)
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -108,5 +185,6 @@ GRAPHENE = {
     'SCHEMA': 'core.schema.schema',
     'MIDDLEWARE': [
         'graphene_django.debug.DjangoDebugMiddleware',
+        'core.schema.loaders.DataLoaderMiddleware',
     ],
 }
@@ -2,9 +2,9 @@ from django.contrib import admin
 from django.urls import path
 from django.http import JsonResponse
 from django.db import connection
-from graphene_django.views import GraphQLView
 from django.views.decorators.csrf import csrf_exempt
 from core.schema import schema
+from core.views import AsyncGraphQLView
 
 
 def health_check(request):
@@ -27,6 +27,6 @@ def health_check(request):
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('graphql/', csrf_exempt(GraphQLView.as_view(graphiql=True, schema=schema))),
+    path('graphql/', csrf_exempt(AsyncGraphQLView.as_view(graphiql=True, schema=schema))),
     path('health/', health_check, name='health_check'),
 ]
@@ -0,0 +1,256 @@
+"""
+Tests for the async GraphQL endpoint.
+
+These tests go through the full ASGI-style request path: tenant middleware,
+AsyncGraphQLView and graphql-core's async executor.
+"""
+
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+
+from core.cache.organizations import clear_organization_cache
+from core.schema import documents
+from core.models import Project, Task, TaskComment
+
+
+def post_graphql(query, slug=None, extensions=None):
+    headers = {"X-Organization-Slug": slug} if slug else {}
+    data = {"query": query}
+    if extensions is not None:
+        data["extensions"] = extensions
+    response = async_to_sync(AsyncClient().post)(
+        "/graphql/",
+        data=json.dumps(data),
+        content_type="application/json",
+        headers=headers,
+    )
+    return response.status_code, json.loads(response.content)
+
+
+@pytest.mark.graphql
+@pytest.mark.django_db(transaction=True)
+class TestAsyncGraphQLView:
+    """Test suite for AsyncGraphQLView"""
+
+    def setup_method(self):
+        clear_organization_cache()
+
+    def test_query_with_nested_relations(self, organization, project, task):
+        """Test that root fields and batched nested fields resolve asynchronously"""
+        TaskComment.objects.create(task=task, author_name="Ann", content="Hi")
+        Task.objects.filter(pk=task.pk).update(comment_count=1)
+
+        status, body = post_graphql(
+            """
+            query {
+                projects {
+                    name
+                    tasks {
+                        title
+                        commentCount
+                        comments {
+                            content
+                        }
+                    }
+                }
+                tasks {
+                    title
+                    project {
+                        name
+                    }
+                }
+            }
+            """,
+            slug=organization.slug,
+        )
+
+        assert status == 200
+        assert "errors" not in body
+        assert body["data"]["projects"][0]["name"] == project.name
+        assert body["data"]["projects"][0]["tasks"][0]["commentCount"] == 1
+        assert body["data"]["projects"][0]["tasks"][0]["comments"][0]["content"] == "Hi"
+        assert body["data"]["tasks"][0]["project"]["name"] == project.name
+
+    def test_mutation(self, organization, project):
+        """Test that mutations execute through the async view"""
+        status, body = post_graphql(
+            f"""
+            mutation {{
+                createTask(projectId: "{project.id}", title: "Async Task") {{
+                    task {{
+                        title
+                    }}
+                }}
+            }}
+            """,
+            slug=organization.slug,
+        )
+
+        assert status == 200
+        assert "errors" not in body
+        assert body["data"]["createTask"]["task"]["title"] == "Async Task"
+        assert Task.objects.filter(title="Async Task").exists()
+
+    def test_atomic_mutations_run_in_one_transaction(self, organization, project, monkeypatch):
+        """Test that ATOMIC_MUTATIONS wraps the resolvers themselves in the transaction"""
+        from django.db import connection
+        from graphene_django.settings import graphene_settings
+
+        from core.schema import mutations
+
+        monkeypatch.setattr(graphene_settings, "ATOMIC_MUTATIONS", True)
+        in_transaction = []
+        broadcast = mutations.broadcast_task_event
+
+        def recording_broadcast(*args, **kwargs):
+            in_transaction.append(connection.in_atomic_block)
+            broadcast(*args, **kwargs)
+
+        monkeypatch.setattr(mutations, "broadcast_task_event", recording_broadcast)
+
+        status, body = post_graphql(
+            f'mutation {{ createTask(projectId: "{project.id}", title: "Atomic") {{ task {{ title }} }} }}',
+            slug=organization.slug,
+        )
+
+        assert status == 200
+        assert "errors" not in body
+        assert body["data"]["createTask"]["task"]["title"] == "Atomic"
+        assert in_transaction == [True]
+        assert Task.objects.filter(title="Atomic").exists()
+
+    def test_mutation_over_get_is_rejected(self, organization, project):
+        """Test that GET requests may only run queries"""
+        response = async_to_sync(AsyncClient().get)(
+            "/graphql/",
+            {"query": f'mutation {{ deleteProject(id: "{project.id}") {{ success }} }}'},
+            headers={"X-Organization-Slug": organization.slug, "Accept": "application/json"},
+        )
+
+        assert response.status_code == 405
+        assert "from a POST request" in json.loads(response.content)["errors"][0]["message"]
+        assert Project.objects.filter(pk=project.pk).exists()
+
+    def test_query_without_organization(self, project):
+        """Test that tenant checks still apply under async execution"""
+        status, body = post_graphql("query { projects { name } }")
+
+        assert status == 200
+        assert "Organization not specified" in body["errors"][0]["message"]
+
+
+@pytest.mark.graphql
+@pytest.mark.django_db(transaction=True)
+class TestPersistedQueries:
+    """Test suite for automatic persisted queries and the document cache"""
+
+    query = "query { projects { name } }"
+
+    def setup_method(self):
+        clear_organization_cache()
+        documents._persisted.clear()
+        documents._documents.clear()
+
+    def persisted(self, query):
+        return {"persistedQuery": {"version": 1, "sha256Hash": documents.query_hash(query)}}
+
+    def test_unknown_hash_asks_for_the_query(self, organization, project):
+        """Test that a hash the server has not seen returns PersistedQueryNotFound"""
+        status, body = post_graphql(None, organization.slug, self.persisted(self.query))
+
+        assert body["errors"][0]["message"] == "PersistedQueryNotFound"
+        assert body["errors"][0]["extensions"]["code"] == "PERSISTED_QUERY_NOT_FOUND"
+
+    def test_query_registered_with_its_hash_can_be_sent_by_hash(self, organization, project):
+        """Test that a query sent once with its hash is then served from the hash alone"""
+        status, body = post_graphql(self.query, organization.slug, self.persisted(self.query))
+        assert status == 200
+        assert body["data"]["projects"] == [{"name": project.name}]
+
+        status, body = post_graphql(None, organization.slug, self.persisted(self.query))
+        assert status == 200
+        assert body["data"]["projects"] == [{"name": project.name}]
+
+    def test_mismatched_hash_is_rejected(self, organization, project):
+        """Test that a query cannot be registered under another document's hash"""
+        other = "query { tasks { title } }"
+        status, body = post_graphql(self.query, organization.slug, self.persisted(other))
+
+        assert status == 400
+        assert body["errors"][0]["message"] == "provided sha does not match query"
+        assert documents.get_persisted_query(documents.query_hash(other)) is None
+
+    def test_shared_registrations_expire_and_are_size_capped(
+        self, organization, project, settings, monkeypatch
+    ):
+        """Test that registered queries get a TTL and oversized ones are not stored"""
+        from django.core.cache import caches
+
+        settings.CACHES = {
+            **settings.CACHES,
+            "persisted": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        }
+        settings.PERSISTED_QUERY_CACHE_ALIAS = "persisted"
+        settings.PERSISTED_QUERY_TTL = 60
+        shared = caches["persisted"]
+        shared.clear()
+        timeouts = []
+        store = shared.set
+        monkeypatch.setattr(
+            shared, "set", lambda key, value, timeout: timeouts.append(timeout) or store(key, value, timeout)
+        )
+
+        post_graphql(self.query, organization.slug, self.persisted(self.query))
+        key = documents.CACHE_KEY_PREFIX + documents.query_hash(self.query)
+        assert shared.get(key) == self.query
+        assert timeouts == [60]
+
+        settings.PERSISTED_QUERY_MAX_LENGTH = len(self.query) - 1
+        padded = self.query + " "
+        status, body = post_graphql(padded, organization.slug, self.persisted(padded))
+        assert body["data"]["projects"] == [{"name": project.name}]
+        assert documents.get_persisted_query(documents.query_hash(padded)) is None
+
+    def test_manifest_queries_without_auto_registration(
+        self, organization, project, settings, tmp_path, monkeypatch
+    ):
+        """Test that pre-registered queries work when clients cannot register new ones"""
+        manifest = tmp_path / "persisted.json"
+        manifest.write_text(json.dumps({documents.query_hash(self.query): self.query}))
+        settings.PERSISTED_QUERIES_MANIFEST = str(manifest)
+        settings.PERSISTED_QUERIES_AUTO_REGISTER = False
+        monkeypatch.setattr(documents, "_manifest", None)
+
+        status, body = post_graphql(None, organization.slug, self.persisted(self.query))
+        assert body["data"]["projects"] == [{"name": project.name}]
+
+        other = "query { tasks { title } }"
+        post_graphql(other, organization.slug, self.persisted(other))
+        status, body = post_graphql(None, organization.slug, self.persisted(other))
+        assert body["errors"][0]["message"] == "PersistedQueryNotFound"
+
+    def test_documents_are_parsed_and_validated_once(self, organization, project, monkeypatch):
+        """Test that repeated documents skip parsing and validation"""
+        calls = []
+        parse = documents.parse
+        monkeypatch.setattr(documents, "parse", lambda query: calls.append(query) or parse(query))
+
+        for _ in range(3):
+            status, body = post_graphql(self.query, organization.slug)
+            assert body["data"]["projects"] == [{"name": project.name}]
+
+        assert calls == [self.query]
+
+    def test_invalid_documents_still_report_errors(self, organization):
+        """Test that cached validation errors are returned on every request"""
+        for _ in range(2):
+            status, body = post_graphql("query { nope }", organization.slug)
+            assert status == 400
+            assert "nope" in body["errors"][0]["message"]
+
+        status, body = post_graphql("query {", organization.slug)
+        assert status == 400
+        assert "Syntax Error" in body["errors"][0]["message"]
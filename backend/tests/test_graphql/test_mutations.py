@@ -7,7 +7,7 @@ These tests demonstrate testing GraphQL mutations with organization validation.
 import pytest
 
 from core.middleware.tenant import set_current_organization
-from core.models import Project
+from core.models import Project, Task, TaskComment
 
 
 @pytest.mark.graphql
@@ -230,6 +230,385 @@ class TestProjectMutations:
         set_current_organization(None)
 
 
+@pytest.mark.graphql
+@pytest.mark.django_db
+class TestCounterMutations:
+    """Test suite for denormalized task and comment counters"""
+
+    def test_task_mutations_maintain_project_counters(self, graphql_query_with_org, project):
+        """Test that creating, moving and deleting tasks keeps the counters in sync"""
+        create = f"""
+            mutation {{
+                createTask(projectId: "{project.id}", title: "Counted", status: "todo") {{
+                    task {{
+                        id
+                    }}
+                }}
+            }}
+        """
+        result = graphql_query_with_org(create)
+        assert "errors" not in result
+        task_id = result["data"]["createTask"]["task"]["id"]
+
+        project.refresh_from_db()
+        assert project.task_count == 1
+        assert project.todo_task_count == 1
+
+        update = f"""
+            mutation {{
+                updateTask(id: "{task_id}", status: "completed") {{
+                    task {{
+                        status
+                    }}
+                }}
+            }}
+        """
+        result = graphql_query_with_org(update)
+        assert "errors" not in result
+
+        project.refresh_from_db()
+        assert project.task_count == 1
+        assert project.todo_task_count == 0
+        assert project.completed_task_count == 1
+        assert project.task_stats["completion_rate"] == 100.0
+
+        delete = f"""
+            mutation {{
+                deleteTask(id: "{task_id}") {{
+                    success
+                }}
+            }}
+        """
+        result = graphql_query_with_org(delete)
+        assert "errors" not in result
+
+        project.refresh_from_db()
+        assert project.task_count == 0
+        assert project.completed_task_count == 0
+
+    def test_comment_mutations_maintain_comment_count(self, graphql_query_with_org, task):
+        """Test that creating and deleting comments keeps Task.comment_count in sync"""
+        create = f"""
+            mutation {{
+                createComment(taskId: "{task.id}", authorName: "Ann", content: "Hi") {{
+                    comment {{
+                        id
+                        task {{
+                            commentCount
+                        }}
+                    }}
+                }}
+            }}
+        """
+        result = graphql_query_with_org(create)
+        assert "errors" not in result
+        assert result["data"]["createComment"]["comment"]["task"]["commentCount"] == 1
+        comment_id = result["data"]["createComment"]["comment"]["id"]
+
+        delete = f"""
+            mutation {{
+                deleteComment(id: "{comment_id}") {{
+                    success
+                }}
+            }}
+        """
+        result = graphql_query_with_org(delete)
+        assert "errors" not in result
+
+        task.refresh_from_db()
+        assert task.comment_count == 0
+
+    def test_mutations_on_orm_created_rows(self, graphql_query_with_org, project, task):
+        """Test that rows created outside the mutations are counted and can be removed"""
+        comment = TaskComment.objects.create(task=task, author_name="Ann", content="Hi")
+        task.refresh_from_db()
+        assert task.comment_count == 1
+
+        result = graphql_query_with_org(
+            f'mutation {{ deleteComment(id: "{comment.id}") {{ success }} }}'
+        )
+        assert "errors" not in result
+        task.refresh_from_db()
+        assert task.comment_count == 0
+
+        result = graphql_query_with_org(
+            f'mutation {{ updateTask(id: "{task.id}", status: "completed") {{ task {{ id }} }} }}'
+        )
+        assert "errors" not in result
+        result = graphql_query_with_org(f'mutation {{ deleteTask(id: "{task.id}") {{ success }} }}')
+        assert "errors" not in result
+
+        project.refresh_from_db()
+        assert project.task_count == 0
+        assert project.completed_task_count == 0
+
+    def test_repair_task_counters_fixes_drift(self, project, task):
+        """Test that the repair command recomputes counters from the real rows"""
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        TaskComment.objects.create(task=task, author_name="Ann", content="Hi")
+        Project.objects.filter(pk=project.pk).update(task_count=7, completed_task_count=3)
+        Task.objects.filter(pk=task.pk).update(comment_count=0)
+
+        out = StringIO()
+        call_command("repair_task_counters", stdout=out)
+
+        project.refresh_from_db()
+        task.refresh_from_db()
+        assert "1 project(s) and 1 task(s)" in out.getvalue()
+        assert project.task_count == 1
+        assert project.todo_task_count == 1
+        assert project.completed_task_count == 0
+        assert task.comment_count == 1
+
+
+@pytest.mark.graphql
+@pytest.mark.django_db
+class TestBulkTaskMutations:
+    """Test suite for bulk task mutations"""
+
+    def test_bulk_create_tasks(self, graphql_query_with_org, project):
+        """Test creating several tasks in one mutation keeps the counters in sync"""
+        mutation = f"""
+            mutation {{
+                bulkCreateTasks(projectId: "{project.id}", tasks: [
+                    {{title: "First"}},
+                    {{title: "Second", status: "in_progress"}},
+                    {{title: "Third", status: "completed", order: 2}}
+                ]) {{
+                    tasks {{
+                        id
+                        title
+                        status
+                    }}
+                }}
+            }}
+        """
+        result = graphql_query_with_org(mutation)
+        assert "errors" not in result
+        tasks = result["data"]["bulkCreateTasks"]["tasks"]
+        assert [t["title"] for t in tasks] == ["First", "Second", "Third"]
+        assert tasks[0]["status"] == "TODO"
+
+        project.refresh_from_db()
+        assert project.task_count == 3
+        assert project.todo_task_count == 1
+        assert project.in_progress_task_count == 1
+        assert project.completed_task_count == 1
+
+    def test_bulk_create_tasks_in_different_org(
+        self, graphql_query_with_org, second_project
+    ):
+        """Test that bulk creation cannot target another organization's project"""
+        mutation = f"""
+            mutation {{
+                bulkCreateTasks(projectId: "{second_project.id}", tasks: [{{title: "Nope"}}]) {{
+                    tasks {{
+                        id
+                    }}
+                }}
+            }}
+        """
+        result = graphql_query_with_org(mutation)
+        assert "errors" in result
+        assert "not found in your organization" in result["errors"][0]["message"]
+        assert not Task.objects.filter(project=second_project).exists()
+
+    def test_bulk_update_tasks(self, graphql_query_with_org, project, task):
+        """Test updating several tasks at once and moving their status counters"""
+        other = Task.objects.create(project=project, title="Other", status="todo")
+
+        mutation = f"""
+            mutation {{
+                bulkUpdateTasks(tasks: [
+                    {{id: "{task.id}", status: "completed"}},
+                    {{id: "{other.id}", title: "Renamed"}}
+                ]) {{
+                    tasks {{
+                        id
+                        title
+                        status
+                    }}
+                }}
+            }}
+        """
+        result = graphql_query_with_org(mutation)
+        assert "errors" not in result
+
+        task.refresh_from_db()
+        other.refresh_from_db()
+        assert task.status == "completed"
+        assert task.title == "Test Task"
+        assert other.title == "Renamed"
+        assert other.status == "todo"
+
+        project.refresh_from_db()
+        assert project.task_count == 2
+        assert project.todo_task_count == 1
+        assert project.completed_task_count == 1
+
+    def test_bulk_update_tasks_rejects_foreign_task(
+        self, graphql_query_with_org, task, second_project
+    ):
+        """Test that one task from another organization fails the whole batch"""
+        foreign = Task.objects.create(project=second_project, title="Foreign")
+
+        mutation = f"""
+            mutation {{
+                bulkUpdateTasks(tasks: [
+                    {{id: "{task.id}", title: "Changed"}},
+                    {{id: "{foreign.id}", title: "Changed"}}
+                ]) {{
+                    tasks {{
+                        id
+                    }}
+                }}
+            }}
+        """
+        result = graphql_query_with_org(mutation)
+        assert "errors" in result
+
+        task.refresh_from_db()
+        foreign.refresh_from_db()
+        assert task.title == "Test Task"
+        assert foreign.title == "Foreign"
+
+    def test_reorder_tasks(self, graphql_query_with_org, project):
+        """Test that tasks take their position in the given list as their order"""
+        tasks = [
+            Task.objects.create(project=project, title=f"Task {i}", order=i)
+            for i in range(3)
+        ]
+        ids = ", ".join(f'"{t.id}"' for t in reversed(tasks))
+
+        mutation = f"""
+            mutation {{
+                reorderTasks(projectId: "{project.id}", taskIds: [{ids}]) {{
+                    tasks {{
+                        title
+                        order
+                    }}
+                }}
+            }}
+        """
+        result = graphql_query_with_org(mutation)
+        assert "errors" not in result
+        assert result["data"]["reorderTasks"]["tasks"] == [
+            {"title": "Task 2", "order": 0},
+            {"title": "Task 1", "order": Task.ORDER_GAP},
+            {"title": "Task 0", "order": 2 * Task.ORDER_GAP},
+        ]
+
+
+@pytest.mark.graphql
+@pytest.mark.django_db
+class TestMoveTask:
+    """Test suite for moving tasks with sparse order values"""
+
+    MOVE = """
+        mutation Move($id: UUID!, $beforeId: UUID, $afterId: UUID, $status: String) {
+            moveTask(id: $id, beforeId: $beforeId, afterId: $afterId, status: $status) {
+                task {
+                    order
+                    status
+                }
+            }
+        }
+    """
+
+    def make_tasks(self, project, count, gap=Task.ORDER_GAP):
+        return [
+            Task.objects.create(project=project, title=f"Task {i}", order=i * gap)
+            for i in range(count)
+        ]
+
+    def test_created_tasks_are_spaced(self, graphql_query_with_org, project):
+        """Test that tasks created without an order are appended with a gap"""
+        mutation = f"""
+            mutation {{
+                createTask(projectId: "{project.id}", title: "Appended") {{
+                    task {{
+                        order
+                    }}
+                }}
+            }}
+        """
+        Task.objects.create(project=project, title="Existing", order=5)
+        result = graphql_query_with_org(mutation)
+        assert "errors" not in result
+        assert result["data"]["createTask"]["task"]["order"] == 5 + Task.ORDER_GAP
+
+    def test_move_to_top_writes_one_row(
+        self, graphql_query_with_org, project, django_assert_num_queries
+    ):
+        """Test that moving a task to the top issues a single UPDATE"""
+        tasks = self.make_tasks(project, 5)
+
+        # Savepoint, task lookup, neighbour lookup, UPDATE, release
+        with django_assert_num_queries(5) as captured:
+            result = graphql_query_with_org(
+                self.MOVE, {"id": str(tasks[-1].id), "afterId": str(tasks[0].id)}
+            )
+        assert "errors" not in result
+        assert result["data"]["moveTask"]["task"]["order"] == -Task.ORDER_GAP
+
+        updates = [q for q in captured.captured_queries if q["sql"].startswith("UPDATE")]
+        assert len(updates) == 1
+        assert [t.order for t in Task.objects.exclude(pk=tasks[-1].pk)] == [
+            t.order for t in tasks[:-1]
+        ]
+
+    def test_move_between_neighbours(self, graphql_query_with_org, project):
+        """Test that a task moved between two neighbours takes the midpoint"""
+        tasks = self.make_tasks(project, 3)
+
+        result = graphql_query_with_org(
+            self.MOVE,
+            {"id": str(tasks[2].id), "beforeId": str(tasks[0].id), "afterId": str(tasks[1].id)},
+        )
+        assert "errors" not in result
+        assert result["data"]["moveTask"]["task"]["order"] == Task.ORDER_GAP // 2
+
+    def test_move_without_gap_rebalances(self, graphql_query_with_org, project):
+        """Test that neighbours with no room left trigger a respace of the project"""
+        tasks = self.make_tasks(project, 4, gap=1)
+
+        result = graphql_query_with_org(
+            self.MOVE,
+            {"id": str(tasks[3].id), "beforeId": str(tasks[0].id), "afterId": str(tasks[1].id)},
+        )
+        assert "errors" not in result
+
+        titles = list(Task.objects.order_by("order").values_list("title", flat=True))
+        assert titles == ["Task 0", "Task 3", "Task 1", "Task 2"]
+        orders = list(Task.objects.order_by("order").values_list("order", flat=True))
+        assert orders == [0, Task.ORDER_GAP, 2 * Task.ORDER_GAP, 3 * Task.ORDER_GAP]
+
+    def test_move_to_another_column(self, graphql_query_with_org, project, task):
+        """Test that moving with a status keeps the project counters in sync"""
+        result = graphql_query_with_org(self.MOVE, {"id": str(task.id), "status": "review"})
+        assert "errors" not in result
+        assert result["data"]["moveTask"]["task"]["status"] == "REVIEW"
+
+        project.refresh_from_db()
+        assert project.todo_task_count == 0
+        assert project.review_task_count == 1
+
+    def test_move_relative_to_other_project(
+        self, graphql_query_with_org, project, task, second_project
+    ):
+        """Test that neighbours from another project are rejected"""
+        foreign = Task.objects.create(project=second_project, title="Foreign")
+
+        result = graphql_query_with_org(
+            self.MOVE, {"id": str(task.id), "afterId": str(foreign.id)}
+        )
+        assert "errors" in result
+        assert "not found" in result["errors"][0]["message"]
+
+
 @pytest.mark.graphql
 @pytest.mark.django_db
 class TestOrganizationMutations:
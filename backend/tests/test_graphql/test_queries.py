@@ -168,6 +168,47 @@ class TestProjectQueries:
         assert len(result["data"]["projects"]) == 1
         assert result["data"]["projects"][0]["status"] == "active"
 
+    def test_get_projects_task_stats_single_query(
+        self, graphql_query_with_org, organization, django_assert_num_queries
+    ):
+        """Test that task stats for a project list are read without extra queries"""
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        from core.models import Project, Task
+
+        for index in range(3):
+            proj = Project.objects.create(organization=organization, name=f"Project {index}")
+            Task.objects.create(project=proj, title="Done", status="completed")
+            Task.objects.create(project=proj, title="Review", status="review")
+        call_command("repair_task_counters", stdout=StringIO())
+
+        query = """
+            query {
+                projects {
+                    id
+                    taskStats {
+                        total
+                        review
+                        completed
+                        completionRate
+                    }
+                }
+            }
+        """
+
+        with django_assert_num_queries(1):
+            result = graphql_query_with_org(query)
+
+        assert "errors" not in result
+        assert len(result["data"]["projects"]) == 3
+        for stats in (p["taskStats"] for p in result["data"]["projects"]):
+            assert stats["total"] == 2
+            assert stats["review"] == 1
+            assert stats["completed"] == 1
+            assert stats["completionRate"] == 50.0
+
 
 @pytest.mark.graphql
 @pytest.mark.django_db
@@ -210,3 +251,452 @@ class TestOrganizationQueries:
         assert "errors" not in result
         assert result["data"]["organization"]["name"] == organization.name
         assert result["data"]["organization"]["slug"] == organization.slug
+
+
+@pytest.mark.graphql
+@pytest.mark.django_db
+class TestDataLoaders:
+    """Test suite for request-scoped batching of relation and count fields"""
+
+    def test_nested_relations_are_batched(
+        self, graphql_client, organization, project, django_assert_num_queries
+    ):
+        """Test that nested lists and counts cost one query per field, not per row"""
+        from types import SimpleNamespace
+
+        from core.models import Project, Task, TaskComment
+        from core.schema.loaders import DataLoaderMiddleware
+
+        second_project = Project.objects.create(organization=organization, name="Other")
+        for proj in (project, second_project):
+            for index in range(3):
+                task = Task.objects.create(project=proj, title=f"Task {index}")
+                TaskComment.objects.create(task=task, author_name="Author", content="Hi")
+
+        set_current_organization(organization)
+        query = """
+            query {
+                projects {
+                    name
+                    tasks {
+                        title
+                        commentCount
+                        comments {
+                            content
+                        }
+                    }
+                }
+            }
+        """
+
+        # projects, tasks, comments
+        with django_assert_num_queries(3):
+            result = graphql_client.execute(
+                query, context_value=SimpleNamespace(), middleware=[DataLoaderMiddleware()]
+            )
+
+        assert "errors" not in result
+        assert len(result["data"]["projects"]) == 2
+        for proj in result["data"]["projects"]:
+            assert len(proj["tasks"]) == 3
+            for task in proj["tasks"]:
+                assert task["commentCount"] == 1
+                assert task["comments"][0]["content"] == "Hi"
+
+
+@pytest.mark.graphql
+@pytest.mark.django_db
+class TestKeysetPagination:
+    """Test suite for first/after cursor pagination"""
+
+    def test_tasks_paginate_with_cursor(self, graphql_query_with_org, project):
+        """Test that walking pages by cursor returns every task exactly once in order"""
+        from core.models import Task
+
+        for index in range(5):
+            # Duplicate order values exercise the id tie-breaker
+            Task.objects.create(project=project, title=f"Task {index}", order=index // 2)
+
+        titles = []
+        after = None
+        while True:
+            after_arg = f', after: "{after}"' if after else ""
+            result = graphql_query_with_org(f"""
+                query {{
+                    tasks(projectId: "{project.id}", first: 2{after_arg}) {{
+                        title
+                        order
+                        cursor
+                    }}
+                }}
+            """)
+            assert "errors" not in result
+            page = result["data"]["tasks"]
+            if not page:
+                break
+            assert len(page) <= 2
+            titles.extend(task["title"] for task in page)
+            after = page[-1]["cursor"]
+
+        assert sorted(titles) == [f"Task {index}" for index in range(5)]
+        assert len(set(titles)) == 5
+        orders = [Task.objects.get(title=title).order for title in titles]
+        assert orders == sorted(orders)
+
+    def test_invalid_cursor_is_rejected(self, graphql_query_with_org):
+        """Test that a malformed cursor returns a GraphQL error"""
+        result = graphql_query_with_org("""
+            query {
+                projects(first: 2, after: "not-a-cursor") {
+                    id
+                }
+            }
+        """)
+
+        assert "errors" in result
+        assert "Invalid cursor" in result["errors"][0]["message"]
+
+    def test_cursor_and_offset_cannot_be_combined(self, graphql_query_with_org, project):
+        """Test that mixing pagination styles is rejected"""
+        result = graphql_query_with_org("""
+            query {
+                projects(first: 2, offset: 1) {
+                    id
+                }
+            }
+        """)
+
+        assert "errors" in result
+        assert "not both" in result["errors"][0]["message"]
+
+    def test_task_comments_paginate_newest_first(self, graphql_query_with_org, task):
+        """Test that comment cursors round-trip timestamps and keep newest-first order"""
+        from core.models import TaskComment
+
+        for index in range(3):
+            TaskComment.objects.create(task=task, author_name="Ann", content=f"Comment {index}")
+
+        query = """
+            query($taskId: UUID!, $after: String) {
+                taskComments(taskId: $taskId, first: 2, after: $after) {
+                    content
+                    cursor
+                }
+            }
+        """
+        first_page = graphql_query_with_org(query, {"taskId": str(task.id)})
+        assert "errors" not in first_page
+        page = first_page["data"]["taskComments"]
+        assert [c["content"] for c in page] == ["Comment 2", "Comment 1"]
+
+        second_page = graphql_query_with_org(
+            query, {"taskId": str(task.id), "after": page[-1]["cursor"]}
+        )
+        assert "errors" not in second_page
+        assert [c["content"] for c in second_page["data"]["taskComments"]] == ["Comment 0"]
+
+    def test_search_pages_keep_relevance_order(self, graphql_query_with_org, project):
+        """Test that paging through search results keeps best matches first"""
+        from core.models import Task
+
+        Task.objects.create(project=project, title="Cleanup", description="Billing", order=0)
+        Task.objects.create(project=project, title="Billing export", order=1)
+        Task.objects.create(project=project, title="Billing report", order=2)
+
+        query = """
+            query($projectId: UUID!, $after: String) {
+                tasks(projectId: $projectId, search: "billing", first: 1, after: $after) {
+                    title
+                    cursor
+                }
+            }
+        """
+        titles = []
+        after = None
+        for _ in range(4):
+            result = graphql_query_with_org(query, {"projectId": str(project.id), "after": after})
+            assert "errors" not in result
+            page = result["data"]["tasks"]
+            if not page:
+                break
+            titles.append(page[0]["title"])
+            after = page[0]["cursor"]
+
+        assert titles == ["Billing export", "Billing report", "Cleanup"]
+
+
+@pytest.mark.graphql
+@pytest.mark.django_db
+class TestFullTextSearch:
+    """Test suite for full-text search over projects, tasks and comments"""
+
+    def test_projects_search_matches_word_prefixes(self, graphql_query_with_org, organization):
+        """Test that the projects search argument uses prefix full-text matching"""
+        from core.models import Project
+
+        Project.objects.create(organization=organization, name="Website redesign")
+        Project.objects.create(organization=organization, name="Mobile app")
+
+        result = graphql_query_with_org("""
+            query {
+                projects(search: "websi") {
+                    name
+                }
+            }
+        """)
+
+        assert "errors" not in result
+        assert [p["name"] for p in result["data"]["projects"]] == ["Website redesign"]
+
+    def test_search_spans_models_and_ranks_title_matches_first(
+        self, graphql_query_with_org, project, second_project
+    ):
+        """Test that search returns projects, tasks and comments of the current org only"""
+        from core.models import Task, TaskComment
+
+        titled = Task.objects.create(project=project, title="Billing export")
+        described = Task.objects.create(
+            project=project, title="Cleanup", description="Remove old billing code"
+        )
+        TaskComment.objects.create(task=described, author_name="Ann", content="Billing is done")
+        Task.objects.create(project=second_project, title="Billing for other org")
+
+        result = graphql_query_with_org("""
+            query {
+                search(query: "billing") {
+                    rank
+                    item {
+                        __typename
+                        ... on TaskType { id }
+                        ... on TaskCommentType { content }
+                    }
+                }
+            }
+        """)
+
+        assert "errors" not in result
+        hits = result["data"]["search"]
+        assert len(hits) == 3
+        assert {hit["item"]["__typename"] for hit in hits} == {"TaskType", "TaskCommentType"}
+        assert hits[0]["item"]["id"] == str(titled.id)
+        assert [hit["rank"] for hit in hits] == sorted((hit["rank"] for hit in hits), reverse=True)
+
+
+@pytest.mark.graphql
+@pytest.mark.django_db
+class TestRequestCoalescing:
+    """Test suite for single-flight coalescing of root resolvers"""
+
+    def test_concurrent_identical_calls_share_one_execution(self):
+        """Test that callers arriving while a call is in flight each get a copy of its result"""
+        import asyncio
+
+        from asgiref.sync import async_to_sync
+
+        from core.schema.execution import SingleFlight
+
+        flight = SingleFlight()
+        executions = []
+
+        async def load():
+            executions.append(1)
+            await asyncio.sleep(0.05)
+            return [{"title": "row"}]
+
+        async def scenario():
+            results = await asyncio.gather(*(flight.do("key", load) for _ in range(4)))
+            # Nothing is cached once the call completes
+            await flight.do("key", load)
+            return results
+
+        results = async_to_sync(scenario)()
+        assert len(executions) == 2
+        assert results == [[{"title": "row"}]] * 4
+        assert len({id(result) for result in results}) == 4
+
+    def test_errors_are_shared_and_not_cached(self):
+        """Test that a failed call raises for every caller and the next call runs again"""
+        import asyncio
+
+        from asgiref.sync import async_to_sync
+
+        from core.schema.execution import SingleFlight
+
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def succeed():
+            return "ok"
+
+        async def scenario():
+            failures = await asyncio.gather(
+                flight.do("key", fail), flight.do("key", fail), return_exceptions=True
+            )
+            return failures, await flight.do("key", succeed)
+
+        failures, result = async_to_sync(scenario)()
+        assert [type(failure) for failure in failures] == [ValueError, ValueError]
+        assert result == "ok"
+
+    def test_calls_are_keyed_by_organization_and_arguments(self, organization):
+        """Test that different tenants or arguments never share a result"""
+        import asyncio
+
+        from asgiref.sync import async_to_sync
+
+        from core.middleware.tenant import organization_context
+        from core.models import Organization
+        from core.schema.execution import coalesce
+
+        other = Organization.objects.create(name="Other Org", slug="other-org")
+        executions = []
+
+        @coalesce
+        async def resolve(root, info, status=None):
+            executions.append(status)
+            await asyncio.sleep(0.01)
+            return (get_current_organization().slug, status)
+
+        async def call(org, status):
+            with organization_context(org):
+                return await resolve(None, None, status=status)
+
+        async def scenario():
+            return await asyncio.gather(
+                call(organization, "todo"),
+                call(other, "todo"),
+                call(organization, "done"),
+                call(organization, "todo"),
+            )
+
+        results = async_to_sync(scenario)()
+        assert results == [
+            (organization.slug, "todo"),
+            ("other-org", "todo"),
+            (organization.slug, "done"),
+            (organization.slug, "todo"),
+        ]
+        assert len(executions) == 3
+
+    def test_tasks_query_returns_shared_rows(self, graphql_client, organization, project, task):
+        """Test that coalesced resolvers still return complete results"""
+        set_current_organization(organization)
+        result = graphql_client.execute(
+            f'query {{ tasks(projectId: "{project.id}") {{ title }} project(id: "{project.id}") {{ name }} }}'
+        )
+
+        assert "errors" not in result
+        assert result["data"]["tasks"] == [{"title": task.title}]
+        assert result["data"]["project"]["name"] == project.name
+
+
+@pytest.mark.graphql
+@pytest.mark.django_db
+class TestQueryResultCache:
+    """Test suite for the versioned query result cache"""
+
+    def setup_method(self):
+        from core.cache.query_results import clear_query_cache
+
+        clear_query_cache()
+
+    def tasks_query(self, project):
+        return f'query {{ tasks(projectId: "{project.id}") {{ title }} }}'
+
+    def test_repeated_query_is_served_from_cache(
+        self, graphql_query_with_org, project, task, django_assert_num_queries
+    ):
+        """Test that an identical query does not hit the database again"""
+        first = graphql_query_with_org(self.tasks_query(project))
+
+        with django_assert_num_queries(0):
+            second = graphql_query_with_org(self.tasks_query(project))
+
+        assert second == first
+        assert second["data"]["tasks"] == [{"title": task.title}]
+
+    def test_hits_return_their_own_rows(self, organization, project, task):
+        """Test that changing a row returned from the cache does not change the next hit"""
+        from core.cache.query_results import cached_query
+        from core.middleware.tenant import organization_context
+        from core.models import Task
+
+        @cached_query(project_arg="project_id")
+        def resolve(root, info, project_id=None):
+            return Task.objects.filter(project_id=project_id)
+
+        with organization_context(organization):
+            resolve(None, None, project_id=project.id)
+            first = resolve(None, None, project_id=project.id)
+            first[0].title = "Changed by a resolver"
+            second = resolve(None, None, project_id=project.id)
+
+        assert second[0] is not first[0]
+        assert second[0].title == task.title
+
+    def test_mutation_invalidates_project_queries(self, graphql_query_with_org, project, task):
+        """Test that a task mutation makes cached project and organization queries miss"""
+        graphql_query_with_org(self.tasks_query(project))
+        graphql_query_with_org("query { projects { taskCount } }")
+
+        result = graphql_query_with_org(
+            f'mutation {{ createTask(projectId: "{project.id}", title: "New") {{ task {{ id }} }} }}'
+        )
+        assert "errors" not in result
+
+        tasks = graphql_query_with_org(self.tasks_query(project))
+        assert {"title": "New"} in tasks["data"]["tasks"]
+        projects = graphql_query_with_org("query { projects { taskCount } }")
+        assert projects["data"]["projects"] == [{"taskCount": 2}]
+
+    def test_other_project_mutation_keeps_entries(
+        self, graphql_query_with_org, organization, project, task, django_assert_num_queries
+    ):
+        """Test that writes to one project do not invalidate another project's queries"""
+        from core.models import Project
+
+        other = Project.objects.create(organization=organization, name="Other")
+        graphql_query_with_org(self.tasks_query(project))
+
+        result = graphql_query_with_org(
+            f'mutation {{ createTask(projectId: "{other.id}", title: "Elsewhere") {{ task {{ id }} }} }}'
+        )
+        assert "errors" not in result
+
+        with django_assert_num_queries(0):
+            graphql_query_with_org(self.tasks_query(project))
+
+    def test_entries_are_isolated_per_organization(
+        self, graphql_client, organization, second_organization, project
+    ):
+        """Test that organizations never read each other's cached results"""
+        query = "query { projects { name } }"
+
+        set_current_organization(organization)
+        assert graphql_client.execute(query)["data"]["projects"] == [{"name": project.name}]
+
+        set_current_organization(second_organization)
+        assert graphql_client.execute(query)["data"]["projects"] == []
+
+    def test_shared_backend_uses_django_cache(
+        self, graphql_query_with_org, project, task, settings, django_assert_num_queries
+    ):
+        """Test that QUERY_CACHE_ALIAS stores entries and versions in a Django cache"""
+        settings.CACHES = {
+            **settings.CACHES,
+            "queries": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        }
+        settings.QUERY_CACHE_ALIAS = "queries"
+
+        graphql_query_with_org(self.tasks_query(project))
+        with django_assert_num_queries(0):
+            graphql_query_with_org(self.tasks_query(project))
+
+        graphql_query_with_org(
+            f'mutation {{ updateTask(id: "{task.id}", title: "Renamed") {{ task {{ id }} }} }}'
+        )
+        result = graphql_query_with_org(self.tasks_query(project))
+        assert result["data"]["tasks"] == [{"title": "Renamed"}]
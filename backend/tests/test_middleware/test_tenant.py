@@ -0,0 +1,163 @@
+"""
+Tests for the tenant middleware.
+
+These tests cover organization resolution from the request header, the
+tenant cache that sits in front of it, and context isolation on the
+sync and async request paths.
+"""
+
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from core.cache.organizations import clear_organization_cache
+from core.middleware.tenant import TenantMiddleware, get_current_organization
+
+
+def capture_organization(request):
+    """Sync view that records the organization visible while handling the request"""
+    request.seen_organization = get_current_organization()
+    return HttpResponse()
+
+
+async def acapture_organization(request):
+    """Async view that yields to other requests before reading the organization"""
+    await asyncio.sleep(0.01)
+    request.seen_organization = get_current_organization()
+    return HttpResponse()
+
+
+@pytest.fixture
+def tenant_middleware():
+    clear_organization_cache()
+    yield TenantMiddleware(capture_organization)
+    clear_organization_cache()
+
+
+def make_request(slug):
+    return RequestFactory().get("/graphql/", HTTP_X_ORGANIZATION_SLUG=slug)
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestTenantMiddleware:
+    """Test suite for TenantMiddleware organization resolution"""
+
+    def test_resolves_organization_from_header(self, tenant_middleware, organization):
+        """Test that the slug header resolves to the active organization"""
+        request = make_request(organization.slug)
+        tenant_middleware(request)
+
+        assert request.organization == organization
+        assert request.seen_organization == organization
+
+    def test_context_is_reset_after_response(self, tenant_middleware, organization):
+        """Test that the organization does not leak past the request"""
+        tenant_middleware(make_request(organization.slug))
+
+        assert get_current_organization() is None
+
+    def test_repeated_requests_are_served_from_cache(
+        self, tenant_middleware, organization, django_assert_num_queries
+    ):
+        """Test that only the first request for a slug hits the database"""
+        tenant_middleware(make_request(organization.slug))
+
+        with django_assert_num_queries(0):
+            request = make_request(organization.slug)
+            tenant_middleware(request)
+
+        assert request.organization == organization
+
+    def test_deactivating_organization_invalidates_cache(self, tenant_middleware, organization):
+        """Test that toggling is_active is picked up on the next request"""
+        tenant_middleware(make_request(organization.slug))
+
+        organization.is_active = False
+        organization.save()
+
+        request = make_request(organization.slug)
+        tenant_middleware(request)
+        assert request.organization is None
+
+    def test_entry_cached_before_commit_is_dropped_on_commit(
+        self, tenant_middleware, organization, django_capture_on_commit_callbacks
+    ):
+        """Test that a row another request cached before the commit is not served afterwards"""
+        from core.cache import organizations
+        from core.models import Organization
+
+        stale = Organization.objects.get(pk=organization.pk)
+        with django_capture_on_commit_callbacks(execute=True):
+            organization.is_active = False
+            organization.save()
+            # A concurrent request still sees the committed row and caches it
+            organizations._local_cache.set(organization.slug, stale)
+
+        request = make_request(organization.slug)
+        tenant_middleware(request)
+        assert request.organization is None
+
+    def test_renamed_slug_is_not_served_from_cache(self, tenant_middleware, organization):
+        """Test that the old slug stops resolving after a slug change"""
+        old_slug = organization.slug
+        tenant_middleware(make_request(old_slug))
+
+        organization.slug = "renamed-organization"
+        organization.save()
+
+        request = make_request(old_slug)
+        tenant_middleware(request)
+        assert request.organization is None
+
+    def test_shared_cache_invalidation_applies_to_every_worker(
+        self, tenant_middleware, organization, settings
+    ):
+        """Test that with TENANT_CACHE_ALIAS no worker keeps a private copy to go stale"""
+        from core.cache import organizations
+
+        settings.CACHES = {
+            **settings.CACHES,
+            "tenants": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        }
+        settings.TENANT_CACHE_ALIAS = "tenants"
+
+        tenant_middleware(make_request(organization.slug))
+        assert len(organizations._local_cache) == 0
+
+        # Another worker deactivates the organization; its signal clears the shared entry
+        organization.is_active = False
+        organization.save()
+
+        request = make_request(organization.slug)
+        tenant_middleware(request)
+        assert request.organization is None
+
+    def test_unknown_slug_resolves_to_none(self, tenant_middleware):
+        """Test that an unknown slug leaves the request without organization"""
+        request = make_request("does-not-exist")
+        tenant_middleware(request)
+
+        assert request.organization is None
+        assert request.seen_organization is None
+
+    def test_concurrent_async_requests_are_isolated(
+        self, organization, second_organization
+    ):
+        """Test that interleaved async requests each see their own organization"""
+        clear_organization_cache()
+        middleware = TenantMiddleware(acapture_organization)
+        first = make_request(organization.slug)
+        second = make_request(second_organization.slug)
+
+        async def run_both():
+            await asyncio.gather(middleware(first), middleware(second))
+
+        async_to_sync(run_both)()
+
+        assert first.seen_organization == organization
+        assert second.seen_organization == second_organization
+        clear_organization_cache()
@@ -70,6 +70,28 @@ class TestProjectModel:
         assert stats["todo"] == 1
         assert stats["completionRate"] == 50.0  # 2/4 = 50%
 
+    def test_task_counters_follow_orm_writes(self, project):
+        """Test that counters stay in sync for tasks saved and deleted through the ORM"""
+        task = Task.objects.create(project=project, title="Task", status="todo")
+        project.refresh_from_db()
+        assert (project.task_count, project.todo_task_count) == (1, 1)
+
+        task.status = "review"
+        task.save()
+        project.refresh_from_db()
+        assert (project.todo_task_count, project.review_task_count) == (0, 1)
+
+        Task.objects.get(pk=task.pk).delete()
+        project.refresh_from_db()
+        assert (project.task_count, project.review_task_count) == (0, 0)
+
+    def test_task_counter_decrements_stop_at_zero(self, project):
+        """Test that decrementing counters that never counted a row does not go negative"""
+        project.adjust_task_counters(removed=["completed"])
+
+        assert project.task_count == 0
+        assert project.completed_task_count == 0
+
     def test_project_status_choices(self, organization):
         """Test that only valid status values are accepted"""
         valid_statuses = ["planning", "active", "on_hold", "completed", "cancelled"]
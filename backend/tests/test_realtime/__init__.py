@@ -0,0 +1,3 @@
+"""
+Realtime (WebSocket) Tests
+"""
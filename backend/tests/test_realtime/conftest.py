@@ -0,0 +1,23 @@
+"""
+Fixtures shared by the realtime (WebSocket) tests.
+"""
+
+import pytest
+
+from core.cache.organizations import clear_organization_cache
+
+
+@pytest.fixture(autouse=True)
+def in_memory_event_log(settings):
+    """Keep event sequence ids and replay buffers in-process for every test"""
+    settings.EVENT_LOG = {"BACKEND": "core.event_log.InMemoryEventLog"}
+
+
+@pytest.fixture
+def in_memory_channel_layer(settings):
+    """Use the in-process fan-out channel layer and a short batching window"""
+    settings.CHANNEL_LAYERS = {"default": {"BACKEND": "core.channel_layers.FanoutChannelLayer"}}
+    settings.WEBSOCKET_BATCH_WINDOW = 0.05
+    clear_organization_cache()
+    yield
+    clear_organization_cache()
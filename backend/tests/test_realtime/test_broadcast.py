@@ -0,0 +1,212 @@
+"""
+Tests for the background WebSocket broadcaster.
+
+These tests cover deferring broadcasts until commit, the bounded queue,
+and batched sending that keeps each group's messages in order.
+"""
+
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from core import broadcast
+from core.broadcast import Broadcaster, client_message
+from core.event_log import InMemoryEventLog
+
+
+class RecordingChannelLayer:
+    """Channel layer that records group sends, optionally stalling one group"""
+
+    def __init__(self, slow_group=None):
+        self.sent = []
+        self.slow_group = slow_group
+
+    async def group_send(self, group, message):
+        if group == self.slow_group:
+            await asyncio.sleep(1)
+        self.sent.append((group, message))
+
+
+@pytest.fixture
+def channel_layer(monkeypatch):
+    layer = RecordingChannelLayer()
+    monkeypatch.setattr(broadcast, "get_channel_layer", lambda: layer)
+    return layer
+
+
+@pytest.mark.unit
+class TestBroadcaster:
+    """Test suite for core.broadcast.Broadcaster"""
+
+    def test_sends_in_order_per_group(self, channel_layer):
+        """Test that queued messages reach the layer in order for each group"""
+        sender = Broadcaster()
+        for index in range(5):
+            sender.enqueue("project_a", {"type": "task_update", "index": index})
+            sender.enqueue("project_b", {"type": "task_update", "index": index})
+
+        assert sender.flush(timeout=5)
+        for group in ("project_a", "project_b"):
+            indexes = [client_message(m)["index"] for g, m in channel_layer.sent if g == group]
+            assert indexes == list(range(5))
+
+    def test_full_queue_drops_instead_of_blocking(self, channel_layer):
+        """Test that enqueue never blocks when the sender falls behind"""
+        channel_layer.slow_group = "slow"
+        sender = Broadcaster(max_queue=2, batch_size=1, send_timeout=5)
+
+        for index in range(10):
+            sender.enqueue("slow", {"type": "task_update", "index": index})
+
+        assert sender.flush(timeout=10)
+        assert len(channel_layer.sent) < 10
+
+    def test_send_timeout_does_not_stall_other_groups(self, channel_layer):
+        """Test that a stalled group send times out without losing other groups"""
+        channel_layer.slow_group = "slow"
+        sender = Broadcaster(send_timeout=0.05)
+        sender.enqueue("slow", {"type": "task_update"})
+        sender.enqueue("fast", {"type": "task_update"})
+
+        assert sender.flush(timeout=5)
+        assert channel_layer.sent == [("fast", {
+            "type": "task_update",
+            "seq": 1,
+            "frame": '{"type":"task_updated","seq":1}',
+            "stream": "fast",
+        })]
+
+    def test_channel_layer_gets_only_frame_and_routing_keys(self, channel_layer):
+        """Test that the payload crosses the channel layer once, inside the frame"""
+        sender = Broadcaster()
+        task = {"id": "7", "title": "Write docs", "status": "todo"}
+        sender.enqueue("project_a", {"type": "task_update", "project_id": "1", "task": task})
+
+        assert sender.flush(timeout=5)
+        [(_, message)] = channel_layer.sent
+        assert set(message) == {"type", "stream", "frame", "seq", "project_id", "task_id", "status"}
+        assert (message["task_id"], message["status"]) == ("7", "todo")
+        assert client_message(message) == {
+            "type": "task_updated", "project_id": "1", "task": task, "seq": 1
+        }
+
+    def test_messages_carry_sequence_ids_per_group(self, channel_layer):
+        """Test that each group numbers its messages from the event log"""
+        sender = Broadcaster()
+        for group in ("project_a", "project_a", "project_b"):
+            sender.enqueue(group, {"type": "task_update"})
+
+        assert sender.flush(timeout=5)
+        assert sorted((g, m["seq"]) for g, m in channel_layer.sent) == [
+            ("project_a", 1), ("project_a", 2), ("project_b", 1)
+        ]
+
+
+@pytest.mark.unit
+class TestInMemoryEventLog:
+    """Test suite for the in-process replay buffer"""
+
+    def test_since_replays_retained_events(self):
+        """Test replaying, catching up, and detecting events that were trimmed"""
+        log = InMemoryEventLog(max_events=3)
+
+        async def scenario():
+            for index in range(5):
+                await log.append("project_a", {"type": "task_update", "index": index})
+            return (
+                await log.since("project_a", 3),
+                await log.since("project_a", 5),
+                await log.since("project_a", 1),
+                await log.since("project_a", 9),
+            )
+
+        after_three, caught_up, trimmed, ahead = async_to_sync(scenario)()
+        assert [event["seq"] for event in after_three] == [4, 5]
+        assert caught_up == []
+        assert trimmed is None
+        assert ahead is None
+
+
+@pytest.mark.graphql
+@pytest.mark.django_db
+class TestMutationBroadcasts:
+    """Test suite for broadcasting from mutations after commit"""
+
+    def test_broadcast_waits_for_commit(
+        self, graphql_query_with_org, task, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        """Test that a mutation queues its broadcast only when the transaction commits"""
+        queued = []
+        monkeypatch.setattr(broadcast.broadcaster, "enqueue", lambda *args: queued.append(args))
+
+        mutation = f"""
+            mutation {{
+                deleteTask(id: "{task.id}") {{
+                    success
+                }}
+            }}
+        """
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            result = graphql_query_with_org(mutation)
+            assert "errors" not in result
+            assert queued == []
+
+        # The broadcast and the query cache invalidation
+        assert len(callbacks) == 2
+        for callback in callbacks:
+            callback()
+        assert len(queued) == 1
+        group, message = queued[0]
+        assert group == f"project_{task.project_id}"
+        assert message == {
+            "type": "task_delete",
+            "project_id": str(task.project_id),
+            "task_id": str(task.id),
+        }
+
+    def test_failed_mutation_does_not_broadcast(
+        self, graphql_query_with_org, second_project, django_capture_on_commit_callbacks
+    ):
+        """Test that a rejected mutation registers no broadcast"""
+        mutation = f"""
+            mutation {{
+                bulkCreateTasks(projectId: "{second_project.id}", tasks: [{{title: "Nope"}}]) {{
+                    tasks {{
+                        id
+                    }}
+                }}
+            }}
+        """
+        with django_capture_on_commit_callbacks() as callbacks:
+            result = graphql_query_with_org(mutation)
+
+        assert "errors" in result
+        assert callbacks == []
+
+    def test_update_broadcasts_only_changed_fields(
+        self, graphql_query_with_org, task, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        """Test that updateTask sends a versioned patch instead of the full task"""
+        queued = []
+        monkeypatch.setattr(broadcast.broadcaster, "enqueue", lambda *args: queued.append(args))
+
+        mutation = f"""
+            mutation {{
+                updateTask(id: "{task.id}", status: "review") {{
+                    task {{
+                        id
+                    }}
+                }}
+            }}
+        """
+        with django_capture_on_commit_callbacks(execute=True):
+            result = graphql_query_with_org(mutation)
+        assert "errors" not in result
+
+        _, message = queued[0]
+        assert message["type"] == "task_patch"
+        assert message["task_id"] == str(task.id)
+        assert (message["base_version"], message["version"]) == (1, 2)
+        assert set(message["changes"]) == {"status", "updatedAt"}
+        assert message["changes"]["status"] == "review"
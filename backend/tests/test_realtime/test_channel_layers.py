@@ -0,0 +1,98 @@
+"""
+Tests for the process-local fan-out channel layer.
+"""
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from core.channel_layers import FanoutChannelLayer
+
+
+@pytest.mark.unit
+class TestFanoutChannelLayer:
+    """Test suite for FanoutChannelLayer group delivery"""
+
+    def test_group_message_is_copied_once_for_all_members(self):
+        """Test that members share one copy that the sender cannot change afterwards"""
+
+        async def scenario():
+            layer = FanoutChannelLayer()
+            first = await layer.new_channel()
+            second = await layer.new_channel()
+            outsider = await layer.new_channel()
+            await layer.group_add("project_1", first)
+            await layer.group_add("project_1", second)
+
+            message = {"type": "task_update", "task": {"id": "1"}}
+            await layer.group_send("project_1", message)
+            message["task"]["id"] = "changed"
+
+            received = [await layer.receive(first), await layer.receive(second)]
+            return received, layer.channels.get(outsider)
+
+        (first, second), outsider_queue = async_to_sync(scenario)()
+        assert first is second
+        assert first == {"type": "task_update", "task": {"id": "1"}}
+        assert outsider_queue is None
+
+    def test_full_channels_miss_messages_without_blocking_others(self):
+        """Test that a member at capacity is skipped while the rest still receive"""
+
+        async def scenario():
+            layer = FanoutChannelLayer(capacity=1)
+            slow = await layer.new_channel()
+            fast = await layer.new_channel()
+            await layer.group_add("project_1", slow)
+            await layer.group_add("project_1", fast)
+
+            await layer.group_send("project_1", {"type": "first"})
+            await layer.receive(fast)
+            await layer.group_send("project_1", {"type": "second"})
+
+            return (
+                [(await layer.receive(slow))["type"]],
+                (await layer.receive(fast))["type"],
+                layer.channels.get(slow),
+            )
+
+        slow, fast, slow_queue = async_to_sync(scenario)()
+        assert slow == ["first"]
+        assert fast == "second"
+        assert slow_queue is None
+
+    def test_sends_from_another_thread_are_handed_to_the_receiving_loop(self):
+        """Test that a group send from a thread with its own loop fans out on the consumers' loop"""
+        import asyncio
+        import threading
+
+        layer = FanoutChannelLayer()
+        fan_out_threads = []
+        fan_out = layer.fan_out
+
+        async def recording_fan_out(group, message):
+            fan_out_threads.append(threading.current_thread())
+            await fan_out(group, message)
+
+        layer.fan_out = recording_fan_out
+
+        async def scenario():
+            channel = await layer.new_channel()
+            await layer.group_add("project_1", channel)
+            receiving = asyncio.ensure_future(layer.receive(channel))
+            await asyncio.sleep(0)
+
+            # The broadcaster sends from its own thread and event loop
+            await asyncio.get_running_loop().run_in_executor(
+                None, lambda: asyncio.run(layer.group_send("project_1", {"type": "task_update"}))
+            )
+            return await asyncio.wait_for(receiving, timeout=1), threading.current_thread()
+
+        received, receiving_thread = async_to_sync(scenario)()
+        assert received == {"type": "task_update"}
+        assert fan_out_threads == [receiving_thread]
+
+    @pytest.mark.usefixtures("in_memory_channel_layer")
+    def test_realtime_tests_run_on_the_fanout_layer(self):
+        """Test that the realtime fixture configures this layer"""
+        assert isinstance(get_channel_layer(), FanoutChannelLayer)
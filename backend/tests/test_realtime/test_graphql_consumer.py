@@ -0,0 +1,154 @@
+"""
+Tests for GraphQL subscriptions over WebSocket.
+
+These tests cover the graphql-transport-ws handshake, executing
+subscriptions from channel layer events with per-event field selection,
+and tenant isolation.
+"""
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+
+from core.broadcast import serialize_task
+from project_management.routing import websocket_urlpatterns
+
+TASK_UPDATED = """
+    subscription TaskUpdated($projectId: UUID!) {
+        taskUpdated(projectId: $projectId) {
+            id
+            title
+        }
+    }
+"""
+
+
+async def connect(organization, protocol="graphql-transport-ws"):
+    communicator = WebsocketCommunicator(
+        URLRouter(websocket_urlpatterns), "/graphql/", subprotocols=[protocol]
+    )
+    connected, subprotocol = await communicator.connect()
+    assert connected and subprotocol == protocol
+    await communicator.send_json_to(
+        {"type": "connection_init", "payload": {"organizationSlug": organization.slug}}
+    )
+    assert (await communicator.receive_json_from())["type"] == "connection_ack"
+    return communicator
+
+
+@pytest.mark.graphql
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("in_memory_channel_layer")
+class TestGraphQLSubscriptions:
+    """Test suite for GraphQLConsumer"""
+
+    def test_subscription_sends_selected_fields(self, organization, project, task):
+        """Test that each event is resolved with only the selected fields"""
+
+        async def scenario():
+            communicator = await connect(organization)
+            await communicator.send_json_to({
+                "id": "1",
+                "type": "subscribe",
+                "payload": {"query": TASK_UPDATED, "variables": {"projectId": str(project.id)}},
+            })
+            # Give the consumer a moment to join the project group
+            assert await communicator.receive_nothing(timeout=0.1)
+
+            task.title = "Pushed"
+            await get_channel_layer().group_send(f"project_{project.id}", {
+                "type": "task_update",
+                "project_id": str(project.id),
+                "task": serialize_task(task),
+            })
+            frame = await communicator.receive_json_from(timeout=2)
+
+            await communicator.send_json_to({"id": "1", "type": "complete"})
+            await communicator.disconnect()
+            return frame
+
+        frame = async_to_sync(scenario)()
+        assert frame == {
+            "type": "next",
+            "id": "1",
+            "payload": {"data": {"taskUpdated": {"id": str(task.id), "title": "Pushed"}}},
+        }
+
+    def test_patch_is_read_once_for_all_subscribers(self, organization, project, task, monkeypatch):
+        """Test that subscribers share one row read per patch, made in their tenant context"""
+        from core.middleware.tenant import get_current_organization
+        from core.schema import subscriptions
+
+        reads = []
+        get_task_row = subscriptions.get_task_row
+
+        async def counting_get_task_row(task_id):
+            reads.append(get_current_organization())
+            return await get_task_row(task_id)
+
+        monkeypatch.setattr(subscriptions, "get_task_row", counting_get_task_row)
+
+        async def scenario():
+            communicators = [await connect(organization) for _ in range(3)]
+            for communicator in communicators:
+                await communicator.send_json_to({
+                    "id": "1",
+                    "type": "subscribe",
+                    "payload": {"query": TASK_UPDATED, "variables": {"projectId": str(project.id)}},
+                })
+            assert await communicators[0].receive_nothing(timeout=0.1)
+
+            await get_channel_layer().group_send(f"project_{project.id}", {
+                "type": "task_patch",
+                "project_id": str(project.id),
+                "task_id": str(task.id),
+                "base_version": task.version,
+                "version": task.version + 1,
+                "changes": {"title": task.title},
+            })
+            frames = [await communicator.receive_json_from(timeout=2) for communicator in communicators]
+            for communicator in communicators:
+                await communicator.disconnect()
+            return frames
+
+        frames = async_to_sync(scenario)()
+        assert reads == [organization]
+        for frame in frames:
+            assert frame["payload"]["data"]["taskUpdated"] == {"id": str(task.id), "title": task.title}
+
+    def test_subscription_to_foreign_project_fails(self, organization, second_project):
+        """Test that subscribing to another organization's project returns an error"""
+
+        async def scenario():
+            communicator = await connect(organization, protocol="graphql-ws")
+            await communicator.send_json_to({
+                "id": "1",
+                "type": "start",
+                "payload": {"query": TASK_UPDATED, "variables": {"projectId": str(second_project.id)}},
+            })
+            frame = await communicator.receive_json_from(timeout=2)
+            await communicator.disconnect()
+            return frame
+
+        frame = async_to_sync(scenario)()
+        assert frame["type"] == "error"
+        assert "not found in your organization" in frame["payload"]["message"]
+
+    def test_rejects_unknown_organization(self):
+        """Test that connection_init with an unknown organization closes the socket"""
+
+        async def scenario():
+            communicator = WebsocketCommunicator(
+                URLRouter(websocket_urlpatterns), "/graphql/", subprotocols=["graphql-transport-ws"]
+            )
+            await communicator.connect()
+            await communicator.send_json_to(
+                {"type": "connection_init", "payload": {"organizationSlug": "missing"}}
+            )
+            closed = await communicator.receive_output(timeout=2)
+            await communicator.wait()
+            return closed
+
+        assert async_to_sync(scenario)() == {"type": "websocket.close", "code": 4403}
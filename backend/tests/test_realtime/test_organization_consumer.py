@@ -0,0 +1,194 @@
+"""
+Tests for the multiplexed organization WebSocket consumer.
+
+These tests cover resolving the tenant on connect, joining and leaving
+project groups over one connection, and organization-wide project events.
+"""
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+
+from project_management.routing import websocket_urlpatterns
+
+
+def communicator_for(slug=None):
+    path = f"/ws/org/?organization={slug}" if slug else "/ws/org/"
+    return WebsocketCommunicator(URLRouter(websocket_urlpatterns), path)
+
+
+@pytest.mark.unit
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("in_memory_channel_layer")
+class TestOrganizationConsumer:
+    """Test suite for OrganizationConsumer"""
+
+    def test_rejects_connection_without_organization(self):
+        """Test that a socket without a known organization is refused"""
+
+        async def scenario():
+            missing, _ = await communicator_for().connect()
+            unknown, _ = await communicator_for("no-such-org").connect()
+            return missing, unknown
+
+        assert async_to_sync(scenario)() == (False, False)
+
+    def test_multiplexes_subscribed_projects(self, organization, project, second_project):
+        """Test that one socket receives events for exactly the projects it follows"""
+        other = organization.projects.create(name="Other Project")
+
+        async def scenario():
+            communicator = communicator_for(organization.slug)
+            connected, _ = await communicator.connect()
+            assert connected
+
+            # Projects of another organization are ignored
+            await communicator.send_json_to({
+                "type": "subscribe",
+                "project_ids": [str(project.id), str(other.id), str(second_project.id)],
+            })
+            subscribed = await communicator.receive_json_from()
+
+            await communicator.send_json_to({"type": "unsubscribe", "project_ids": [str(other.id)]})
+            unsubscribed = await communicator.receive_json_from()
+
+            layer = get_channel_layer()
+            for target in (project, other):
+                await layer.group_send(f"project_{target.id}", {
+                    "type": "task_delete",
+                    "project_id": str(target.id),
+                    "task_id": "1",
+                })
+            await layer.group_send(f"organization_{organization.id}", {
+                "type": "project_create",
+                "project": {"id": "2"},
+            })
+
+            frames = [
+                await communicator.receive_json_from(timeout=1),
+                await communicator.receive_json_from(timeout=1),
+            ]
+            nothing_else = await communicator.receive_nothing(timeout=0.2)
+            await communicator.disconnect()
+            return subscribed, unsubscribed, frames, nothing_else
+
+        subscribed, unsubscribed, frames, nothing_else = async_to_sync(scenario)()
+        assert subscribed["project_ids"] == sorted([str(project.id), str(other.id)])
+        assert unsubscribed["project_ids"] == [str(project.id)]
+        assert frames == [
+            {"type": "task_deleted", "task_id": "1", "project_id": str(project.id)},
+            {"type": "project_created", "project": {"id": "2"}},
+        ]
+        assert nothing_else
+
+    def test_subscribing_to_more_projects_keeps_filters(self, organization, project):
+        """Test that a later subscribe only changes the options it names"""
+        other = organization.projects.create(name="Other Project")
+
+        async def scenario():
+            communicator = communicator_for(organization.slug)
+            connected, _ = await communicator.connect()
+            assert connected
+
+            await communicator.send_json_to({
+                "type": "subscribe",
+                "project_ids": [str(project.id)],
+                "events": ["comment_created"],
+            })
+            await communicator.receive_json_from()
+            await communicator.send_json_to({"type": "subscribe", "project_ids": [str(other.id)]})
+            await communicator.receive_json_from()
+
+            layer = get_channel_layer()
+            await layer.group_send(f"project_{other.id}", {
+                "type": "task_delete",
+                "project_id": str(other.id),
+                "task_id": "1",
+            })
+            await layer.group_send(f"project_{other.id}", {
+                "type": "comment_create",
+                "project_id": str(other.id),
+                "comment": {"id": "2", "taskId": "1"},
+            })
+
+            frame = await communicator.receive_json_from(timeout=1)
+            nothing_else = await communicator.receive_nothing(timeout=0.2)
+            await communicator.disconnect()
+            return frame, nothing_else
+
+        frame, nothing_else = async_to_sync(scenario)()
+        assert frame["type"] == "comment_created"
+        assert nothing_else
+
+    def test_rejected_subscribe_changes_nothing(self, organization, project, monkeypatch):
+        """Test that a subscribe over the project limit leaves filters and projects as they were"""
+        from core.consumers import organization_consumer
+
+        monkeypatch.setattr(organization_consumer, "MAX_SUBSCRIBED_PROJECTS", 1)
+        other = organization.projects.create(name="Other Project")
+
+        async def scenario():
+            communicator = communicator_for(organization.slug)
+            connected, _ = await communicator.connect()
+            assert connected
+            await communicator.send_json_to({"type": "subscribe", "project_ids": [str(project.id)]})
+            await communicator.receive_json_from()
+
+            await communicator.send_json_to({
+                "type": "subscribe",
+                "project_ids": [str(other.id)],
+                "events": ["comment_created"],
+            })
+            rejected = await communicator.receive_json_from()
+
+            await get_channel_layer().group_send(f"project_{project.id}", {
+                "type": "task_delete",
+                "project_id": str(project.id),
+                "task_id": "1",
+            })
+            frame = await communicator.receive_json_from(timeout=1)
+            await communicator.disconnect()
+            return rejected, frame
+
+        rejected, frame = async_to_sync(scenario)()
+        assert rejected["type"] == "error"
+        assert frame["type"] == "task_deleted"
+
+    def test_sequence_ids_are_tracked_per_stream(self, organization, project):
+        """Test that organization events are not dropped as already seen project events"""
+        project_group = f"project_{project.id}"
+        organization_group = f"organization_{organization.id}"
+
+        async def scenario():
+            communicator = communicator_for(organization.slug)
+            connected, _ = await communicator.connect()
+            assert connected
+            await communicator.send_json_to({"type": "subscribe", "project_ids": [str(project.id)]})
+            await communicator.receive_json_from()
+
+            layer = get_channel_layer()
+            for seq in (1, 2, 3):
+                await layer.group_send(project_group, {
+                    "type": "task_delete",
+                    "project_id": str(project.id),
+                    "task_id": str(seq),
+                    "seq": seq,
+                    "stream": project_group,
+                })
+            # The organization stream numbers its own events from 1
+            await layer.group_send(organization_group, {
+                "type": "project_delete",
+                "project_id": str(project.id),
+                "seq": 1,
+                "stream": organization_group,
+            })
+
+            frames = [await communicator.receive_json_from(timeout=1) for _ in range(4)]
+            await communicator.disconnect()
+            return frames
+
+        frames = async_to_sync(scenario)()
+        assert [frame["type"] for frame in frames] == ["task_deleted"] * 3 + ["project_deleted"]
+        assert frames[-1]["seq"] == 1
@@ -0,0 +1,573 @@
+"""
+Tests for the project WebSocket consumer.
+
+These tests cover the default one-frame-per-event mode and the opt-in
+batching mode that merges events into a single frame.
+"""
+
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+
+from core.broadcast import envelope
+from core.cache import projects
+from core.event_log import get_event_log
+from core.models import Organization, Project, Task
+from project_management.routing import websocket_urlpatterns
+
+PROJECT_ID = "7b7c6f3e-8d4c-4a4e-9a3b-5f2f1a0c9d11"
+GROUP = f"project_{PROJECT_ID}"
+ORGANIZATION_SLUG = "acme"
+
+
+@pytest.fixture
+def tenant_project():
+    """The organization and project the synthetic events are sent for"""
+    organization = Organization.objects.create(name="Acme", slug=ORGANIZATION_SLUG)
+    projects.clear_project_cache()
+    yield Project.objects.create(id=PROJECT_ID, organization=organization, name="Board")
+    projects.clear_project_cache()
+
+
+def project_url(project_id=PROJECT_ID, slug=ORGANIZATION_SLUG, query=""):
+    url = f"/ws/projects/{project_id}/?organization={slug}"
+    return f"{url}&{query}" if query else url
+
+
+def task_event(task_id, title, event_type="task_update"):
+    return {"type": event_type, "task": {"id": task_id, "title": title}}
+
+
+async def connect(batch, project_id=PROJECT_ID, slug=ORGANIZATION_SLUG, **filters):
+    communicator = WebsocketCommunicator(
+        URLRouter(websocket_urlpatterns), project_url(project_id, slug)
+    )
+    connected, _ = await communicator.connect()
+    assert connected
+    await communicator.send_json_to({"type": "subscribe", "batch": batch, **filters})
+    assert (await communicator.receive_json_from())["type"] == "subscription_success"
+    return communicator
+
+
+@pytest.mark.unit
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("in_memory_channel_layer", "tenant_project")
+class TestTaskConsumer:
+    """Test suite for TaskConsumer event delivery"""
+
+    def test_sends_one_frame_per_event_by_default(self):
+        """Test that clients without batching get every event as its own frame"""
+
+        async def scenario():
+            communicator = await connect(batch=False)
+            layer = get_channel_layer()
+            await layer.group_send(GROUP, task_event("1", "First"))
+            await layer.group_send(GROUP, task_event("1", "Second"))
+
+            first = await communicator.receive_json_from()
+            second = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return first, second
+
+        first, second = async_to_sync(scenario)()
+        assert first == {"type": "task_updated", "task": {"id": "1", "title": "First"}}
+        assert second["task"]["title"] == "Second"
+
+    def test_batching_merges_events_with_last_write_wins(self):
+        """Test that batching clients get one events frame with collapsed updates"""
+
+        async def scenario():
+            communicator = await connect(batch=True)
+            layer = get_channel_layer()
+            await layer.group_send(GROUP, task_event("1", "Draft"))
+            await layer.group_send(GROUP, task_event("2", "Created", "task_create"))
+            await layer.group_send(GROUP, {
+                "type": "tasks_update",
+                "tasks": [{"id": "1", "title": "Final"}, {"id": "3", "title": "Other"}],
+            })
+            await layer.group_send(GROUP, {"type": "task_delete", "task_id": "3"})
+
+            frame = await communicator.receive_json_from(timeout=1)
+            nothing_else = await communicator.receive_nothing(timeout=0.2)
+            await communicator.disconnect()
+            return frame, nothing_else
+
+        frame, nothing_else = async_to_sync(scenario)()
+        assert nothing_else
+        assert frame == {
+            "type": "events",
+            "events": [
+                {"type": "task_updated", "task": {"id": "1", "title": "Final"}},
+                {"type": "task_created", "task": {"id": "2", "title": "Created"}},
+                {"type": "task_deleted", "task_id": "3"},
+            ],
+        }
+
+    def test_batching_folds_patches_for_the_same_task(self):
+        """Test that consecutive patches merge into one spanning both versions"""
+
+        def patch(base_version, changes):
+            return {
+                "type": "task_patch",
+                "task_id": "1",
+                "base_version": base_version,
+                "version": base_version + 1,
+                "changes": changes,
+            }
+
+        async def scenario():
+            communicator = await connect(batch=True)
+            layer = get_channel_layer()
+            await layer.group_send(GROUP, patch(1, {"status": "review", "order": 5}))
+            await layer.group_send(GROUP, patch(2, {"status": "completed"}))
+
+            frame = await communicator.receive_json_from(timeout=1)
+            await communicator.disconnect()
+            return frame
+
+        frame = async_to_sync(scenario)()
+        assert frame["events"] == [{
+            "type": "task_patched",
+            "task_id": "1",
+            "base_version": 1,
+            "version": 3,
+            "changes": {"status": "completed", "order": 5},
+        }]
+
+    def test_filters_drop_unwanted_events(self):
+        """Test that a client watching one task's comments only gets those comments"""
+
+        async def scenario():
+            communicator = await connect(
+                batch=False, events=["comment_created"], task_ids=["1"]
+            )
+            layer = get_channel_layer()
+            await layer.group_send(GROUP, task_event("1", "Renamed"))
+            await layer.group_send(GROUP, {"type": "comment_create", "comment": {"taskId": "2"}})
+            await layer.group_send(GROUP, {"type": "comment_create", "comment": {"taskId": "1"}})
+
+            frame = await communicator.receive_json_from(timeout=1)
+            nothing_else = await communicator.receive_nothing(timeout=0.2)
+            await communicator.disconnect()
+            return frame, nothing_else
+
+        frame, nothing_else = async_to_sync(scenario)()
+        assert frame == {"type": "comment_created", "comment": {"taskId": "1"}}
+        assert nothing_else
+
+    def test_status_filter_trims_bulk_events(self):
+        """Test that bulk events only carry the tasks in the watched statuses"""
+
+        async def scenario():
+            communicator = await connect(batch=False, statuses=["todo"])
+            layer = get_channel_layer()
+            await layer.group_send(GROUP, {
+                "type": "tasks_update",
+                "tasks": [
+                    {"id": "1", "status": "todo"},
+                    {"id": "2", "status": "completed"},
+                ],
+            })
+
+            frame = await communicator.receive_json_from(timeout=1)
+            await communicator.disconnect()
+            return frame
+
+        frame = async_to_sync(scenario)()
+        assert frame == {"type": "tasks_updated", "tasks": [{"id": "1", "status": "todo"}]}
+
+    def test_pre_encoded_frames_are_forwarded_verbatim(self):
+        """Test that a broadcast's pre-encoded frame is sent as is unless it must change"""
+
+        def event(tasks):
+            message = {"type": "tasks_update", "project_id": PROJECT_ID, "seq": 1, "tasks": tasks}
+            return envelope(GROUP, message)
+
+        async def scenario():
+            plain = await connect(batch=False)
+            filtered = await connect(batch=False, statuses=["todo"])
+            layer = get_channel_layer()
+            await layer.group_send(GROUP, event([
+                {"id": "1", "status": "todo"},
+                {"id": "2", "status": "completed"},
+            ]))
+
+            verbatim = await plain.receive_from(timeout=1)
+            trimmed = await filtered.receive_json_from(timeout=1)
+            await plain.disconnect()
+            await filtered.disconnect()
+            return verbatim, trimmed
+
+        verbatim, trimmed = async_to_sync(scenario)()
+        assert verbatim == event([
+            {"id": "1", "status": "todo"},
+            {"id": "2", "status": "completed"},
+        ])["frame"]
+        assert trimmed == {
+            "type": "tasks_updated",
+            "project_id": PROJECT_ID,
+            "seq": 1,
+            "tasks": [{"id": "1", "status": "todo"}],
+        }
+
+    def test_resume_replays_missed_events(self):
+        """Test that reconnecting with resume_from replays only the missed events"""
+
+        async def publish(title):
+            message = task_event("1", title)
+            seq = await get_event_log().append(GROUP, message)
+            await get_channel_layer().group_send(GROUP, {**message, "seq": seq, "stream": GROUP})
+
+        async def scenario():
+            await publish("One")
+            await publish("Two")
+            await publish("Three")
+
+            communicator = WebsocketCommunicator(
+                URLRouter(websocket_urlpatterns), project_url(query="resume_from=1")
+            )
+            connected, _ = await communicator.connect()
+            assert connected
+            replayed = [
+                await communicator.receive_json_from(timeout=1),
+                await communicator.receive_json_from(timeout=1),
+            ]
+            await publish("Four")
+            live = await communicator.receive_json_from(timeout=1)
+            await communicator.disconnect()
+
+            stale = WebsocketCommunicator(
+                URLRouter(websocket_urlpatterns), project_url(query="resume_from=99")
+            )
+            await stale.connect()
+            resync = await stale.receive_json_from(timeout=1)
+            await stale.disconnect()
+            return replayed, live, resync
+
+        replayed, live, resync = async_to_sync(scenario)()
+        assert [(m["task"]["title"], m["seq"]) for m in replayed] == [("Two", 2), ("Three", 3)]
+        assert (live["task"]["title"], live["seq"]) == ("Four", 4)
+        assert resync["type"] == "resync_required"
+
+    def test_out_of_order_events_are_all_delivered(self, settings):
+        """Test that a lower seq arriving late is sent, and held events wait for their gap"""
+        settings.WEBSOCKET_REORDER_WINDOW = 0.2
+
+        async def send(title, seq):
+            await get_channel_layer().group_send(
+                GROUP, {**task_event(title, title), "seq": seq, "stream": GROUP}
+            )
+
+        async def scenario():
+            communicator = await connect(batch=False)
+            # Two workers broadcast 2 and 1 independently
+            await send("2", 2)
+            await send("1", 1)
+            late = [await communicator.receive_json_from(timeout=1) for _ in range(2)]
+
+            # 4 waits for 3, and 6 is released once the window passes without 5
+            await send("4", 4)
+            await send("3", 3)
+            await send("6", 6)
+            held = [await communicator.receive_json_from(timeout=1) for _ in range(3)]
+            await communicator.disconnect()
+            return late, held
+
+        late, held = async_to_sync(scenario)()
+        assert [m["seq"] for m in late] == [2, 1]
+        assert [m["seq"] for m in held] == [3, 4, 6]
+
+
+@pytest.mark.unit
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("in_memory_channel_layer")
+class TestConnectAuthorization:
+    """Test suite for tenant checks when a project WebSocket connects"""
+
+    def setup_method(self):
+        projects.clear_project_cache()
+
+    async def try_connect(self, path, headers=None):
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), path, headers=headers or []
+        )
+        connected, code = await communicator.connect()
+        await communicator.disconnect()
+        return connected, code
+
+    def test_rejects_projects_outside_the_organization(self, organization, project, second_project):
+        """Test that a missing organization, a foreign project or an unknown project is refused"""
+
+        async def scenario():
+            return [
+                await self.try_connect(f"/ws/projects/{project.id}/"),
+                await self.try_connect(project_url(second_project.id, organization.slug)),
+                await self.try_connect(project_url(PROJECT_ID, organization.slug)),
+                await self.try_connect(project_url(project.id, "missing")),
+            ]
+
+        assert async_to_sync(scenario)() == [(False, 4003)] * 4
+
+    def test_accepts_header_slug_and_caches_the_project(self, organization, project):
+        """Test that the organization header is accepted and the project lookup is cached"""
+
+        async def scenario():
+            return await self.try_connect(
+                f"/ws/projects/{project.id}/",
+                headers=[(b"x-organization-slug", organization.slug.encode())],
+            )
+
+        connected, _ = async_to_sync(scenario)()
+        assert connected
+        assert projects._local_cache.get(str(project.id)) == organization.id
+
+        projects.invalidate_project(project.id)
+        assert projects._local_cache.get(str(project.id)) is None
+
+
+@pytest.mark.unit
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("in_memory_channel_layer")
+class TestTaskSnapshot:
+    """Test suite for full task snapshots requested over the WebSocket"""
+
+    def test_snapshot_returns_requested_tasks(self, project, task, second_project):
+        """Test that a snapshot only includes the requested tasks of this project"""
+        foreign = Task.objects.create(project=second_project, title="Foreign")
+
+        async def scenario():
+            communicator = await connect(
+                batch=False, project_id=project.id, slug=project.organization.slug
+            )
+            await communicator.send_json_to(
+                {"type": "snapshot", "task_ids": [str(task.id), str(foreign.id)]}
+            )
+            frame = await communicator.receive_json_from(timeout=2)
+            await communicator.disconnect()
+            return frame
+
+        frame = async_to_sync(scenario)()
+        assert frame["type"] == "snapshot"
+        assert [t["id"] for t in frame["tasks"]] == [str(task.id)]
+        assert frame["tasks"][0]["version"] == task.version
+
+
+@pytest.mark.unit
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("in_memory_channel_layer", "tenant_project")
+class TestBinaryProtocols:
+    """Test suite for MessagePack and CBOR frames negotiated by subprotocol"""
+
+    TASK_ID = "0f8fad5b-d9cb-469f-a165-70867728950e"
+    UPDATED_AT = "2026-10-17T12:30:00+00:00"
+
+    async def exchange(self, subprotocols, subscribe):
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), project_url(),
+            subprotocols=subprotocols,
+        )
+        connected, subprotocol = await communicator.connect()
+        assert connected
+        await communicator.send_to(bytes_data=subscribe)
+        ack = await communicator.receive_from(timeout=1)
+
+        message = {
+            "type": "task_update",
+            "project_id": PROJECT_ID,
+            "seq": 1,
+            "task": {"id": self.TASK_ID, "title": "Binary", "updatedAt": self.UPDATED_AT},
+        }
+        await get_channel_layer().group_send(GROUP, envelope(GROUP, message))
+        frame = await communicator.receive_from(timeout=1)
+        await communicator.disconnect()
+        return subprotocol, ack, frame
+
+    def test_msgpack_frames(self):
+        """Test that msgpack clients get binary frames with compact ids and timestamps"""
+        import uuid
+        from datetime import datetime, timezone
+
+        import msgpack
+
+        subprotocol, ack, frame = async_to_sync(self.exchange)(
+            ["msgpack"], msgpack.packb({"type": "subscribe"})
+        )
+
+        assert subprotocol == "msgpack"
+        assert msgpack.unpackb(ack)["type"] == "subscription_success"
+        decoded = msgpack.unpackb(frame, timestamp=3)
+        assert decoded["type"] == "task_updated"
+        assert decoded["project_id"] == uuid.UUID(PROJECT_ID).bytes
+        assert decoded["task"]["id"] == uuid.UUID(self.TASK_ID).bytes
+        assert decoded["task"]["updatedAt"] == datetime(2026, 10, 17, 12, 30, tzinfo=timezone.utc)
+
+    def test_cbor_frames_and_binary_client_messages(self):
+        """Test that cbor clients get tagged UUIDs and may send binary filters"""
+        import uuid
+
+        import cbor2
+
+        subprotocol, ack, frame = async_to_sync(self.exchange)(
+            ["cbor", "msgpack"],
+            cbor2.dumps({"type": "subscribe", "task_ids": [uuid.UUID(self.TASK_ID)]}),
+        )
+
+        assert subprotocol == "cbor"
+        assert cbor2.loads(ack)["type"] == "subscription_success"
+        decoded = cbor2.loads(frame)
+        assert decoded["task"]["id"] == uuid.UUID(self.TASK_ID)
+        assert decoded["task"]["updatedAt"].isoformat() == self.UPDATED_AT
+
+    def test_json_stays_the_default(self):
+        """Test that clients offering no known subprotocol keep JSON text frames"""
+
+        async def scenario():
+            communicator = WebsocketCommunicator(
+                URLRouter(websocket_urlpatterns), project_url(),
+                subprotocols=["graphql-ws"],
+            )
+            connected, subprotocol = await communicator.connect()
+            await communicator.send_json_to({"type": "subscribe"})
+            ack = await communicator.receive_json_from(timeout=1)
+            await communicator.disconnect()
+            return subprotocol, ack
+
+        subprotocol, ack = async_to_sync(scenario)()
+        assert subprotocol is None
+        assert ack["type"] == "subscription_success"
+
+
+@pytest.mark.unit
+class TestOutboundBuffer:
+    """Test suite for per-connection outbound buffering of slow clients"""
+
+    def consumer(self, policy, limit=3):
+        """A consumer whose client accepts nothing until released"""
+        import asyncio
+
+        from core.consumers.task_consumer import TaskConsumer
+
+        consumer = TaskConsumer()
+        consumer.channel_name = "test"
+        consumer.outbound_policy = policy
+        consumer.outbound_limit = limit
+        consumer.sent = []
+        consumer.closed = []
+        consumer.release = asyncio.Event()
+
+        async def base_send(message):
+            if message["type"] == "websocket.close":
+                consumer.closed.append(message.get("code"))
+                return
+            await consumer.release.wait()
+            consumer.sent.append(json.loads(message["text"]))
+
+        consumer.base_send = base_send
+        return consumer
+
+    async def settle(self):
+        """Let the writer task pick up the first buffered message"""
+        import asyncio
+
+        await asyncio.sleep(0)
+
+    async def drain(self, consumer):
+        import asyncio
+
+        consumer.release.set()
+        while consumer.writer_task is not None:
+            await asyncio.sleep(0)
+
+    @staticmethod
+    def patch(version, **changes):
+        return {
+            "type": "task_patch",
+            "task_id": "1",
+            "base_version": version - 1,
+            "version": version,
+            "changes": changes,
+        }
+
+    def test_coalesce_folds_updates_and_drops_oldest(self):
+        """Test that unsent patches to a task fold together and overflow drops the oldest"""
+
+        async def scenario():
+            consumer = self.consumer("coalesce")
+            # The first message is taken by the writer and blocks in send
+            await consumer.dispatch({"type": "task_delete", "task_id": "0"})
+            await self.settle()
+            await consumer.dispatch(self.patch(2, title="A"))
+            await consumer.dispatch(self.patch(3, status="done"))
+            for task_id in ("2", "3", "4"):
+                await consumer.dispatch({"type": "task_delete", "task_id": task_id})
+            await self.drain(consumer)
+            return consumer
+
+        consumer = async_to_sync(scenario)()
+        assert consumer.coalesced == 1
+        assert consumer.dropped == 1
+        assert [m["type"] for m in consumer.sent] == ["task_deleted"] * 4
+        assert [m["task_id"] for m in consumer.sent] == ["0", "2", "3", "4"]
+
+    def test_coalesced_patch_keeps_all_changes(self):
+        """Test that a folded patch spans from the first base version to the last version"""
+
+        async def scenario():
+            consumer = self.consumer("coalesce")
+            await consumer.dispatch({"type": "task_delete", "task_id": "0"})
+            await self.settle()
+            await consumer.dispatch(self.patch(2, title="A"))
+            await consumer.dispatch(self.patch(3, status="done"))
+            await self.drain(consumer)
+            return consumer
+
+        consumer = async_to_sync(scenario)()
+        assert consumer.sent[1] == {
+            "type": "task_patched",
+            "task_id": "1",
+            "base_version": 1,
+            "version": 3,
+            "changes": {"title": "A", "status": "done"},
+        }
+
+    def test_drop_oldest_never_merges(self):
+        """Test that drop_oldest keeps the latest messages unchanged"""
+
+        async def scenario():
+            consumer = self.consumer("drop_oldest", limit=2)
+            await consumer.dispatch({"type": "task_delete", "task_id": "0"})
+            await self.settle()
+            for version in (2, 3, 4):
+                await consumer.dispatch(self.patch(version, title=str(version)))
+            await self.drain(consumer)
+            return consumer
+
+        consumer = async_to_sync(scenario)()
+        assert consumer.coalesced == 0
+        assert consumer.dropped == 1
+        assert [m.get("version") for m in consumer.sent] == [None, 3, 4]
+
+    def test_disconnect_sends_resync_hint(self):
+        """Test that the disconnect policy replaces the backlog with a resync hint and closes"""
+        from core.consumers.task_consumer import SLOW_CONSUMER_CLOSE_CODE
+
+        async def scenario():
+            consumer = self.consumer("disconnect", limit=2)
+            await consumer.dispatch({"type": "task_delete", "task_id": "0"})
+            await self.settle()
+            for task_id in ("1", "2", "3", "4"):
+                await consumer.dispatch({"type": "task_delete", "task_id": task_id})
+            await self.drain(consumer)
+            return consumer
+
+        consumer = async_to_sync(scenario)()
+        assert consumer.sent == [
+            {"type": "task_deleted", "task_id": "0"},
+            {"type": "resync_required", "reason": "slow_consumer"},
+        ]
+        assert consumer.closed == [SLOW_CONSUMER_CLOSE_CODE]
+        assert consumer.dropped == 3
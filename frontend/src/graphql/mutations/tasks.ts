@@ -66,6 +66,19 @@ export const UPDATE_TASK = gql`
   }
 `;
 
+export const MOVE_TASK = gql`
+  mutation MoveTask($id: UUID!, $beforeId: UUID, $afterId: UUID, $status: String) {
+    moveTask(id: $id, beforeId: $beforeId, afterId: $afterId, status: $status) {
+      task {
+        id
+        status
+        order
+        updatedAt
+      }
+    }
+  }
+`;
+
 export const DELETE_TASK = gql`
   mutation DeleteTask($id: UUID!) {
     deleteTask(id: $id) {
@@ -24,6 +24,7 @@ export const GET_TASKS = gql`
       priority
       dueDate
       order
+      version
       commentCount
       createdAt
       updatedAt
@@ -3,8 +3,13 @@ import { useEffect, useRef } from 'react';
 interface WebSocketMessage {
   type: string;
   task?: any;
+  tasks?: any[];
   task_id?: string;
   comment?: any;
+  events?: WebSocketMessage[];
+  base_version?: number;
+  version?: number;
+  changes?: Record<string, any>;
 }
 
 interface UseProjectWebSocketOptions {
@@ -13,6 +18,10 @@ interface UseProjectWebSocketOptions {
   onTaskUpdated?: (task: any) => void;
   onTaskDeleted?: (taskId: string) => void;
   onCommentCreated?: (comment: any) => void;
+  // Version of a task already held by the caller, e.g. in the Apollo cache
+  getTaskVersion?: (taskId: string) => number | undefined;
+  // Called when the server could not replay missed events and state must be reloaded
+  onResync?: () => void;
 }
 
 export const useProjectWebSocket = ({
@@ -21,14 +30,20 @@ export const useProjectWebSocket = ({
   onTaskUpdated,
   onTaskDeleted,
   onCommentCreated,
+  getTaskVersion,
+  onResync,
 }: UseProjectWebSocketOptions) => {
   const wsRef = useRef<WebSocket | null>(null);
+  // Last version seen per task id, used to detect missed patches
+  const versionsRef = useRef(new Map<string, number>());
 
   useEffect(() => {
     if (!projectId) return;
 
-    // Connect to Django Channels WebSocket
-    const wsUrl = `ws://localhost:8000/ws/projects/${projectId}/`;
+    // Connect to Django Channels WebSocket; the server only accepts projects
+    // of the organization named in the URL
+    const organizationSlug = localStorage.getItem('organizationSlug') || import.meta.env.VITE_ORGANIZATION_SLUG || '';
+    const wsUrl = `ws://localhost:8000/ws/projects/${projectId}/?organization=${encodeURIComponent(organizationSlug)}`;
     console.log('[WebSocket] Connecting to:', wsUrl);
 
     const ws = new WebSocket(wsUrl);
@@ -36,42 +51,99 @@ export const useProjectWebSocket = ({
 
     ws.onopen = () => {
       console.log('[WebSocket] Connected to project:', projectId);
-      // Subscribe to updates
-      ws.send(JSON.stringify({ type: 'subscribe' }));
+      // Subscribe to updates, merged into one frame per batch window
+      ws.send(JSON.stringify({ type: 'subscribe', batch: true }));
     };
 
-    ws.onmessage = (event) => {
-      try {
-        const message: WebSocketMessage = JSON.parse(event.data);
-        console.log('[WebSocket] Received:', message);
+    const versions = versionsRef.current;
+    const knownVersion = (taskId: string) => versions.get(taskId) ?? getTaskVersion?.(taskId);
+    // Full task payloads older than the version already applied are dropped
+    const isCurrent = (task: any) => {
+      if (!task?.id || task.version === undefined) return true;
+      const known = knownVersion(task.id);
+      if (known !== undefined && task.version <= known) return false;
+      versions.set(task.id, task.version);
+      return true;
+    };
 
-        switch (message.type) {
-          case 'task_created':
-            if (onTaskCreated && message.task) {
-              onTaskCreated(message.task);
-            }
-            break;
-          case 'task_updated':
-            if (onTaskUpdated && message.task) {
-              onTaskUpdated(message.task);
-            }
-            break;
-          case 'task_deleted':
-            if (onTaskDeleted && message.task_id) {
-              onTaskDeleted(message.task_id);
-            }
-            break;
-          case 'comment_created':
-            if (onCommentCreated && message.comment) {
-              onCommentCreated(message.comment);
-            }
+    const handleMessage = (message: WebSocketMessage) => {
+      switch (message.type) {
+        case 'task_created':
+          if (onTaskCreated && message.task && isCurrent(message.task)) {
+            onTaskCreated(message.task);
+          }
+          break;
+        case 'task_updated':
+          if (onTaskUpdated && message.task && isCurrent(message.task)) {
+            onTaskUpdated(message.task);
+          }
+          break;
+        case 'tasks_created':
+          // Coalesced event from a bulk mutation
+          if (onTaskCreated && message.tasks) {
+            message.tasks.filter(isCurrent).forEach((task) => onTaskCreated(task));
+          }
+          break;
+        case 'tasks_updated':
+          // Coalesced event from a bulk update or reorder
+          if (onTaskUpdated && message.tasks) {
+            message.tasks.filter(isCurrent).forEach((task) => onTaskUpdated(task));
+          }
+          break;
+        case 'task_patched': {
+          // Only the changed fields; fetch the full task if a version was missed
+          const taskId = message.task_id!;
+          const known = knownVersion(taskId);
+          if (known !== undefined && message.version! <= known) {
             break;
-          case 'subscription_success':
-            console.log('[WebSocket] Subscription confirmed');
+          }
+          if (known !== undefined && known !== message.base_version) {
+            ws.send(JSON.stringify({ type: 'snapshot', task_ids: [taskId] }));
             break;
-          default:
-            console.log('[WebSocket] Unknown message type:', message.type);
+          }
+          versions.set(taskId, message.version!);
+          if (onTaskUpdated) {
+            onTaskUpdated({ id: taskId, version: message.version, ...message.changes });
+          }
+          break;
         }
+        case 'snapshot':
+          if (onTaskUpdated && message.tasks) {
+            message.tasks.filter(isCurrent).forEach((task) => onTaskUpdated(task));
+          }
+          break;
+        case 'task_deleted':
+          message.task_id && versions.delete(message.task_id);
+          if (onTaskDeleted && message.task_id) {
+            onTaskDeleted(message.task_id);
+          }
+          break;
+        case 'comment_created':
+          if (onCommentCreated && message.comment) {
+            onCommentCreated(message.comment);
+          }
+          break;
+        case 'events':
+          // Batched frame of events merged by the server
+          message.events?.forEach(handleMessage);
+          break;
+        case 'resync_required':
+          versions.clear();
+          onResync?.();
+          break;
+        case 'subscription_success':
+          console.log('[WebSocket] Subscription confirmed');
+          break;
+        default:
+          console.log('[WebSocket] Unknown message type:', message.type);
+      }
+    };
+
+    ws.onmessage = (event) => {
+      try {
+        const message: WebSocketMessage = JSON.parse(event.data);
+        console.log('[WebSocket] Received:', message);
+        handleMessage(message);
       } catch (error) {
         console.error('[WebSocket] Error parsing message:', error);
       }
@@ -91,7 +163,7 @@ export const useProjectWebSocket = ({
         ws.close();
       }
     };
-  }, [projectId, onTaskCreated, onTaskUpdated, onTaskDeleted, onCommentCreated]);
+  }, [projectId, onTaskCreated, onTaskUpdated, onTaskDeleted, onCommentCreated, getTaskVersion, onResync]);
 
   return wsRef;
 };
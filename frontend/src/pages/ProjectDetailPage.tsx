@@ -1,13 +1,14 @@
-import React, { useState } from 'react';
+import React, { useCallback, useRef, useState } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { useQuery, useMutation } from '@apollo/client';
+import { useApolloClient, useQuery, useMutation } from '@apollo/client';
 import { GET_PROJECT } from '../graphql/queries/projects';
 import { GET_TASKS } from '../graphql/queries/tasks';
 import { GET_TASK_COMMENTS } from '../graphql/queries/comments';
-import { CREATE_TASK, UPDATE_TASK, DELETE_TASK } from '../graphql/mutations/tasks';
+import { CREATE_TASK, UPDATE_TASK, MOVE_TASK, DELETE_TASK } from '../graphql/mutations/tasks';
 import { UPDATE_PROJECT, DELETE_PROJECT } from '../graphql/mutations/projects';
 import { CREATE_COMMENT } from '../graphql/mutations/comments';
 import { useProjectWebSocket } from '../hooks/useProjectWebSocket';
+import { addTaskToList, applyTaskPatch, getCachedTaskVersion, removeCachedTask } from '../utils/taskCache';
 import { TaskCard } from '../components/tasks/TaskCard';
 import { Button } from '../components/common/Button';
 import { Spinner } from '../components/common/Spinner';
@@ -15,10 +16,12 @@ import { Spinner } from '../components/common/Spinner';
 export const ProjectDetailPage: React.FC = () => {
   const { id } = useParams<{ id: string }>();
   const navigate = useNavigate();
+  const { cache } = useApolloClient();
   const [selectedTask, setSelectedTask] = useState<any>(null);
   const [commentText, setCommentText] = useState('');
   const [authorName, setAuthorName] = useState('');
   const [authorEmail, setAuthorEmail] = useState('');
+  const [draggedTaskId, setDraggedTaskId] = useState<string | null>(null);
 
   const { data: projectData, loading: projectLoading } = useQuery(GET_PROJECT, {
     variables: { id },
@@ -51,6 +54,12 @@ export const ProjectDetailPage: React.FC = () => {
     awaitRefetchQueries: true,
   });
 
+  // Drag and drop writes only the moved task's order (and status); the
+  // returned fields update the cached task, so only the stats are refetched
+  const [moveTask] = useMutation(MOVE_TASK, {
+    refetchQueries: [{ query: GET_PROJECT, variables: { id } }],
+  });
+
   const [updateProject] = useMutation(UPDATE_PROJECT, {
     refetchQueries: [{ query: GET_PROJECT, variables: { id } }],
   });
@@ -69,28 +78,57 @@ export const ProjectDetailPage: React.FC = () => {
     refetchQueries: [{ query: GET_TASK_COMMENTS, variables: { taskId: selectedTask?.id } }],
   });
 
+  // Real-time WebSocket events are written straight into the Apollo cache;
+  // the task list is only refetched for a patch to a task it does not hold
+  // or when the server asks for a resync
+  const onTaskCreated = useCallback((task: any) => {
+    console.log('[WebSocket] Task created:', task);
+    if (!applyTaskPatch(cache, task.id, task)) {
+      addTaskToList(cache, id!, task);
+    }
+  }, [cache, id]);
+
+  const onTaskUpdated = useCallback((task: any) => {
+    console.log('[WebSocket] Task updated:', task);
+    if (applyTaskPatch(cache, task.id, task)) return;
+    if (task.title !== undefined) {
+      addTaskToList(cache, id!, task);
+    } else {
+      refetch();
+    }
+  }, [cache, id, refetch]);
+
+  const onTaskDeleted = useCallback((taskId: string) => {
+    console.log('[WebSocket] Task deleted:', taskId);
+    removeCachedTask(cache, taskId);
+  }, [cache]);
+
+  // Read through a ref so selecting a task does not reconnect the WebSocket
+  const selectedTaskIdRef = useRef<string | undefined>(undefined);
+  selectedTaskIdRef.current = selectedTask?.id;
+
+  const onCommentCreated = useCallback((comment: any) => {
+    console.log('[WebSocket] Comment created:', comment);
+    // Refetch comments if the comment is for the currently selected task
+    if (comment.taskId === selectedTaskIdRef.current) {
+      refetchComments();
+    }
+  }, [refetchComments]);
+
+  const getTaskVersion = useCallback(
+    (taskId: string) => getCachedTaskVersion(cache, taskId),
+    [cache]
+  );
+
   // Real-time WebSocket connection for this project
   useProjectWebSocket({
     projectId: id,
-    onTaskCreated: (task) => {
-      console.log('[WebSocket] Task created:', task);
-      refetch(); // Refetch tasks to update the UI
-    },
-    onTaskUpdated: (task) => {
-      console.log('[WebSocket] Task updated:', task);
-      refetch(); // Refetch tasks to update the UI
-    },
-    onTaskDeleted: (taskId) => {
-      console.log('[WebSocket] Task deleted:', taskId);
-      refetch(); // Refetch tasks to update the UI
-    },
-    onCommentCreated: (comment) => {
-      console.log('[WebSocket] Comment created:', comment);
-      // Refetch comments if the comment is for the currently selected task
-      if (selectedTask && comment.taskId === selectedTask.id) {
-        refetchComments();
-      }
-    },
+    onTaskCreated,
+    onTaskUpdated,
+    onTaskDeleted,
+    onCommentCreated,
+    getTaskVersion,
+    onResync: refetch,
   });
 
   const handleCreateTask = async () => {
@@ -107,7 +145,6 @@ export const ProjectDetailPage: React.FC = () => {
           description,
           status: 'todo',
           priority: 'medium',
-          order: 0,
         },
       });
       console.log('Task created:', result);
@@ -131,6 +168,28 @@ export const ProjectDetailPage: React.FC = () => {
     }
   };
 
+  const handleDropTask = async (status: string, target?: any) => {
+    const taskId = draggedTaskId;
+    setDraggedTaskId(null);
+    if (!taskId || target?.id === taskId) return;
+
+    // Place the task in front of the card it was dropped on, or at the end of the column
+    const column = tasksByStatus[status as keyof typeof tasksByStatus].filter(
+      (t: any) => t.id !== taskId
+    );
+    const index = target ? column.findIndex((t: any) => t.id === target.id) : column.length;
+    const before = column[index - 1];
+    const after = column[index];
+
+    try {
+      await moveTask({
+        variables: { id: taskId, beforeId: before?.id, afterId: after?.id, status },
+      });
+    } catch (err) {
+      console.error('Error moving task:', err);
+    }
+  };
+
   const handleUpdateProjectStatus = async (newStatus: string) => {
     try {
       await updateProject({
@@ -201,7 +260,8 @@ export const ProjectDetailPage: React.FC = () => {
   if (projectLoading || tasksLoading) return <div className="text-center py-8"><Spinner /></div>;
 
   const project = projectData?.project;
-  const tasks = tasksData?.tasks || [];
+  // Sorted client-side so order changes written to the cache reorder the columns
+  const tasks = [...(tasksData?.tasks || [])].sort((a: any, b: any) => a.order - b.order);
 
   console.log('Tasks data:', tasksData);
   console.log('Tasks array:', tasks);
@@ -216,6 +276,11 @@ export const ProjectDetailPage: React.FC = () => {
 
   console.log('Tasks by status:', tasksByStatus);
 
+  // Derived from the cached tasks so WebSocket updates move it without a project refetch
+  const completionRate = tasks.length
+    ? Math.round((tasksByStatus.completed.length / tasks.length) * 10000) / 100
+    : 0;
+
   return (
     <div className="w-full max-w-[1600px] mx-auto">
       <div className="mb-8">
@@ -257,24 +322,39 @@ export const ProjectDetailPage: React.FC = () => {
             </select>
           </div>
           <span>Total Tasks: <span className="font-semibold">{tasks.length}</span></span>
-          <span>Progress: <span className="font-semibold">{project?.taskStats?.completionRate || 0}%</span></span>
+          <span>Progress: <span className="font-semibold">{completionRate}%</span></span>
         </div>
       </div>
 
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-4">
         {['todo', 'in_progress', 'review', 'completed'].map((status) => (
-          <div key={status} className="bg-gray-100 rounded-lg p-4">
+          <div
+            key={status}
+            className="bg-gray-100 rounded-lg p-4"
+            onDragOver={(e) => e.preventDefault()}
+            onDrop={() => handleDropTask(status)}
+          >
             <h3 className="font-semibold text-lg mb-4 capitalize">
               {status.replace('_', ' ')} ({tasksByStatus[status as keyof typeof tasksByStatus].length})
             </h3>
             <div className="space-y-3">
               {tasksByStatus[status as keyof typeof tasksByStatus].map((task: any) => (
-                <TaskCard
+                <div
                   key={task.id}
-                  task={task}
-                  onClick={() => setSelectedTask(task)}
-                  onDelete={handleDeleteTask}
-                />
+                  draggable
+                  onDragStart={() => setDraggedTaskId(task.id)}
+                  onDragEnd={() => setDraggedTaskId(null)}
+                  onDrop={(e) => {
+                    e.stopPropagation();
+                    handleDropTask(status, task);
+                  }}
+                >
+                  <TaskCard
+                    task={task}
+                    onClick={() => setSelectedTask(task)}
+                    onDelete={handleDeleteTask}
+                  />
+                </div>
               ))}
             </div>
           </div>
@@ -0,0 +1,52 @@
+import { ApolloCache, gql } from '@apollo/client';
+import { GET_TASKS } from '../graphql/queries/tasks';
+
+const TASK_VERSION = gql`
+  fragment TaskVersion on TaskType {
+    version
+  }
+`;
+
+// Enum fields are upper-case over GraphQL but lower-case in WebSocket payloads
+const toCacheFields = (fields: Record<string, any>) => {
+  const { id, ...rest } = fields;
+  if (typeof rest.status === 'string') rest.status = rest.status.toUpperCase();
+  if (typeof rest.priority === 'string') rest.priority = rest.priority.toUpperCase();
+  return rest;
+};
+
+const taskCacheId = (cache: ApolloCache<any>, taskId: string) =>
+  cache.identify({ __typename: 'TaskType', id: taskId });
+
+export const getCachedTaskVersion = (cache: ApolloCache<any>, taskId: string): number | undefined =>
+  cache.readFragment<{ version: number }>({ id: taskCacheId(cache, taskId), fragment: TASK_VERSION })
+    ?.version;
+
+/**
+ * Write changed task fields into the cached task. Versions at or below the
+ * cached one are ignored. Returns false when the task is not cached.
+ */
+export const applyTaskPatch = (cache: ApolloCache<any>, taskId: string, fields: Record<string, any>) => {
+  const cachedVersion = getCachedTaskVersion(cache, taskId);
+  if (cachedVersion === undefined) return false;
+  if (fields.version !== undefined && fields.version <= cachedVersion) return true;
+
+  const updates = Object.fromEntries(
+    Object.entries(toCacheFields(fields)).map(([field, value]) => [field, () => value])
+  );
+  cache.modify({ id: taskCacheId(cache, taskId), fields: updates });
+  return true;
+};
+
+/** Append a full task payload to the cached task list of a project */
+export const addTaskToList = (cache: ApolloCache<any>, projectId: string, task: any) => {
+  cache.updateQuery({ query: GET_TASKS, variables: { projectId } }, (data: any) => {
+    if (!data || data.tasks.some((t: any) => t.id === task.id)) return data;
+    return { tasks: [...data.tasks, { __typename: 'TaskType', id: task.id, ...toCacheFields(task) }] };
+  });
+};
+
+export const removeCachedTask = (cache: ApolloCache<any>, taskId: string) => {
+  cache.evict({ id: taskCacheId(cache, taskId) });
+  cache.gc();
+};